@@ -0,0 +1,56 @@
+// Patch the tasks already listed on a page from the server-sent task events of their teams.
+document.querySelectorAll('[data-task-events]').forEach(function (list) {
+  var source = new EventSource(list.dataset.taskEvents);
+  var assignee = list.dataset.taskAssignee;
+  var team = list.dataset.taskTeam;
+
+  function belongs(task) {
+    return (!assignee || String(task.assignee) === assignee) && (!team || String(task.team) === team);
+  }
+
+  // Tell the user the list is out of date, for changes that may move tasks between pages.
+  function notify() {
+    if (list.querySelector('[data-task-notice]')) return;
+    var notice = document.createElement('div');
+    notice.className = 'alert alert-info';
+    notice.dataset.taskNotice = '';
+    notice.append('Tasks have changed since this page was loaded. ');
+    var reload = document.createElement('a');
+    reload.href = window.location.href;
+    reload.textContent = 'Reload';
+    notice.append(reload);
+    list.prepend(notice);
+  }
+
+  function fill(item, task) {
+    item.querySelectorAll('[data-field]').forEach(function (field) {
+      if (task[field.dataset.field] !== undefined) {
+        field.textContent = task[field.dataset.field];
+      }
+    });
+  }
+
+  source.addEventListener('saved', function (message) {
+    var task = JSON.parse(message.data);
+    var item = list.querySelector('[data-task-id="' + task.id + '"]');
+    if (!belongs(task)) {
+      if (item) item.remove();
+      return;
+    }
+    if (!item) {
+      notify();
+      return;
+    }
+    if (item.dataset.assignee !== String(task.assignee) || item.dataset.team !== String(task.team)) {
+      notify();
+    }
+    fill(item, task);
+  });
+
+  source.addEventListener('deleted', function (message) {
+    var item = list.querySelector('[data-task-id="' + JSON.parse(message.data).id + '"]');
+    if (item) item.remove();
+  });
+
+  source.addEventListener('refresh', notify);
+});
@@ -44,6 +44,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'tasks.middleware.QueryTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -144,3 +145,66 @@ MESSAGE_TAGS = {
     messages.ERROR: 'danger',
 }
 
+
+# Dotted path of the task search backend, chosen from the database vendor when None
+TASK_SEARCH_BACKEND = None
+
+# Number of tasks shown per page on the dashboards
+TASKS_PER_PAGE = 25
+
+# Directory where each process writes its per-view request metrics, disabled unless set in the environment
+REQUEST_METRICS_DIR = os.environ.get('REQUEST_METRICS_DIR') or None
+
+# Number of requests a process records between writes of its metrics file
+REQUEST_METRICS_FLUSH_EVERY = 100
+
+# Distinct SQL statements counted per request, and duplicated statements kept per view
+REQUEST_METRICS_MAX_STATEMENTS = 100
+
+# Serve gravatars through the local avatar cache instead of linking to gravatar.com
+AVATAR_PROXY = False
+AVATAR_CACHE_DIR = BASE_DIR / 'avatar_cache'
+AVATAR_FETCH_TIMEOUT = 5
+AVATAR_MAX_AGE = 60 * 60 * 24
+
+# Avatar sizes the proxy serves, and the number of avatars its disk cache keeps
+AVATAR_SIZES = [60, 120]
+AVATAR_CACHE_MAX_FILES = 1000
+
+# Cache shared by the worker processes; use memcached or redis when running several
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Seconds a rendered dashboard fragment is kept, on top of signal-driven invalidation
+DASHBOARD_CACHE_TIMEOUT = 60 * 10
+
+# Seconds the analytics of a team are cached, and the number of weeks of throughput shown
+TEAM_ANALYTICS_CACHE_TIMEOUT = 60
+TEAM_ANALYTICS_WEEKS = 12
+
+# Largest number of tasks one bulk update request may change
+BULK_UPDATE_MAX_TASKS = 1000
+
+# Number of rejected rows listed on the task import page
+IMPORT_ERRORS_SHOWN = 100
+
+# Rows fetched from the database at a time while streaming an export
+EXPORT_CHUNK_SIZE = 2000
+
+# Seconds the assignee choices and rendered assignee select of a team are kept, on top of signal-driven invalidation
+TEAM_MEMBER_CHOICES_CACHE_TIMEOUT = 60 * 60
+
+# Dotted path of the broker pushing task changes to the team event streams, in-process when None
+TASK_EVENTS_BROKER = None
+TASK_EVENTS_REDIS_URL = 'redis://localhost:6379/0'
+
+# Seconds between keep-alive comments on an idle event stream, and seconds before a stream closes and the browser reconnects
+TASK_EVENTS_HEARTBEAT = 15
+TASK_EVENTS_STREAM_SECONDS = 60 * 5
+TASK_EVENTS_RETRY_MS = 5000
+
+# Events buffered for a slow event stream before it is told to reload instead
+TASK_EVENTS_QUEUE_SIZE = 100
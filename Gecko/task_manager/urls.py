@@ -15,12 +15,13 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path
+from django.urls import include, path
 from tasks import views
 from django.contrib.auth import views as auth_views
 
 urlpatterns = [ 
     path('admin/', admin.site.urls),
+    path('api/', include('tasks.api_urls')),
     path('', views.home, name='home'),
     path('dashboard/', views.dashboard, name='dashboard'),
     path('log_in/', views.LogInView.as_view(), name='log_in'),
@@ -29,8 +30,13 @@ urlpatterns = [
     path('profile/', views.ProfileUpdateView.as_view(), name='profile'),
     path('sign_up/', views.SignUpView.as_view(), name='sign_up'),
     path('create_task/', views.TaskCreateView.as_view(), name='create_task'),
+    path('import_tasks/', views.import_tasks, name='import_tasks'),
     path('create_team/', views.TeamCreateView.as_view(), name='create_team'),
     path('task_dashboard/', views.task_dashboard, name='task_dashboard'),
+    path('save_task_view/', views.save_task_view, name='save_task_view'),
+    path('delete_task_view/<int:pk>/', views.delete_task_view, name='delete_task_view'),
+    path('export_tasks/', views.export_tasks, name='export_tasks'),
+    path('export_teams/', views.export_teams, name='export_teams'),
     path('task_description/<int:pk>/', views.task_description, name='task_description'),
     path('update_task/<int:pk>/', views.update_task, name='update_task'),
     path('task_edit/<int:pk>/', views.TaskEditView.as_view(), name='task_edit'),
@@ -41,7 +47,11 @@ urlpatterns = [
     path('remove_members/<int:pk>/', views.remove_members, name='remove_members'),
     path('delete_team/<int:pk>/', views.delete_team, name='delete_team'),
     path('team_detail/<int:pk>/', views.team_detail, name='team_detail'),
+    path('team_events/<int:pk>/', views.team_events, name='team_events'),
+    path('task_events/', views.task_events, name='task_events'),
+    path('team_analytics/<int:pk>/', views.team_analytics, name='team_analytics'),
     path('invites/', views.InvitesView.team_invites, name='invites'),
     path('invites/join_team/<str:team>/', views.InvitesView.join_team, name='join_team'),
     path('invites/reject_invite/<str:team>/', views.InvitesView.reject_invite, name='reject_invite'),
+    path('avatar/<str:email_hash>/<int:size>/', views.avatar, name='avatar'),
 ]
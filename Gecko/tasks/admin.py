@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Task, User, Team
+from django.db.models import Prefetch
+from .models import Membership, Task, User, Team
 
 # Register your models here.
 @admin.register(User)
@@ -7,9 +8,21 @@ class UserAdmin(admin.ModelAdmin):
     """Configuration of the admin interface for users."""
 
     list_display = [
-        'username', 'first_name', 'last_name', 'email', 'get_teams','get_invites'
+        'username', 'first_name', 'last_name', 'email', 'get_teams','get_invites',
+        'assigned_task_count', 'in_progress_task_count', 'completed_task_count'
 
     ]
+    search_fields = ['username', 'first_name', 'last_name', 'email']
+    autocomplete_fields = ['invites']
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        """Load the teams and invites of every listed user in one query each."""
+
+        return super().get_queryset(request).prefetch_related(
+            Prefetch('teams', queryset=Team.objects.only('name')),
+            Prefetch('invites', queryset=Team.objects.only('name')),
+        )
 
 
 @admin.register(Task)
@@ -19,7 +32,18 @@ class TaskAdmin(admin.ModelAdmin):
     list_display = [
         'title', 'description', 'assignee', 'due_date','team_of_task'
     ]
+    list_select_related = ['assignee', 'team_of_task']
+    search_fields = ['title']
+    autocomplete_fields = ['assignee', 'team_of_task']
+    show_full_result_count = False
+
 
+class MembershipInline(admin.TabularInline):
+    """Memberships of a team, edited on the team's admin page."""
+
+    model = Membership
+    extra = 0
+    autocomplete_fields = ['user']
 
 
 @admin.register(Team)
@@ -27,5 +51,19 @@ class TeamAdmin(admin.ModelAdmin):
     """Configuration of the admin interface for tasks."""
 
     list_display = [
-        'name', 'description', 'admin' , 'get_members' ,'get_tasks'
+        'name', 'description', 'admin' , 'get_members' ,'get_tasks',
+        'assigned_task_count', 'in_progress_task_count', 'completed_task_count'
     ]
+    list_select_related = ['admin']
+    search_fields = ['name']
+    autocomplete_fields = ['admin']
+    inlines = [MembershipInline]
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        """Load the members and tasks of every listed team in one query each."""
+
+        return super().get_queryset(request).prefetch_related(
+            Prefetch('members', queryset=User.objects.only('username')),
+            Prefetch('tasks', queryset=Task.objects.only('team_of_task')),
+        )
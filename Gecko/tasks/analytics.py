@@ -0,0 +1,68 @@
+"""Grouped task statistics of a team for its analytics page."""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.db.models.functions import TruncWeek
+from django.utils import timezone
+from tasks.models import Task
+
+
+def get_team_analytics(team):
+    """Return the task statistics of a team, cached until the team changes or the timeout expires."""
+
+    key = f'team-analytics:{team.pk}:{team.updated_at.timestamp()}'
+    analytics = cache.get(key)
+    if analytics is None:
+        analytics = compute_team_analytics(team)
+        cache.set(key, analytics, settings.TEAM_ANALYTICS_CACHE_TIMEOUT)
+    return analytics
+
+
+def compute_team_analytics(team):
+    """Compute the task statistics of a team with one grouped aggregate query each.
+
+    Tasks have no completion date, so weekly throughput counts completed tasks by the
+    week they were last updated.
+    """
+
+    now = timezone.now()
+    overdue = Q(due_date__lt=now) & ~Q(status='completed')
+    completed = Q(status='completed')
+    tasks = Task.objects.filter(team_of_task=team).order_by()
+    status_labels = dict(Task.STATUS_CHOICES)
+    priority_labels = dict(Task.PRIORITY_CHOICES)
+    since = now - timezone.timedelta(weeks=settings.TEAM_ANALYTICS_WEEKS)
+
+    summary = tasks.aggregate(
+        total=Count('pk'),
+        completed=Count('pk', filter=completed),
+        overdue=Count('pk', filter=overdue),
+    )
+    by_status = [
+        {'status': status_labels.get(row['status'], row['status']), 'count': row['count']}
+        for row in tasks.values('status').annotate(count=Count('pk')).order_by('status')
+    ]
+    by_priority = [
+        {'priority': priority_labels.get(row['priority'], row['priority']), 'count': row['count']}
+        for row in tasks.values('priority').annotate(count=Count('pk')).order_by('-priority')
+    ]
+    by_assignee = list(
+        tasks.values('assignee__username').annotate(
+            total=Count('pk'),
+            completed=Count('pk', filter=completed),
+            overdue=Count('pk', filter=overdue),
+        ).order_by('-total', 'assignee__username')
+    )
+    throughput = list(
+        tasks.filter(completed, updated_at__gte=since)
+        .annotate(week=TruncWeek('updated_at'))
+        .values('week').annotate(completed=Count('pk')).order_by('week')
+    )
+    return {
+        'summary': summary,
+        'by_status': by_status,
+        'by_priority': by_priority,
+        'by_assignee': by_assignee,
+        'throughput': throughput,
+        'computed_at': now,
+    }
@@ -0,0 +1,342 @@
+"""JSON API over tasks, teams and invites, with sparse fieldsets and cursor pagination."""
+import json
+from functools import wraps
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.db.models import Prefetch, Q
+from django.forms.models import model_to_dict
+from django.http import HttpResponse, JsonResponse
+from tasks.forms import BulkTaskChangeForm, TaskForm, TaskFilterForm, TeamForm
+from tasks.models import Membership, Task, Team, User
+from tasks.pagination import KeysetPaginator
+
+TASK_ORDERINGS = ['title', 'status', 'due_date', 'priority', '-priority']
+
+
+class ApiError(Exception):
+    """Error turned into a JSON response with the given status and errors."""
+
+    def __init__(self, status, errors):
+        super().__init__(errors)
+        self.status = status
+        self.errors = errors
+
+
+def api_view(methods):
+    """Decorator for API views answering the given methods with JSON, for logged in users only."""
+
+    def decorator(view_function):
+        @wraps(view_function)
+        def modified_view_function(request, *args, **kwargs):
+            if not request.user.is_authenticated:
+                return JsonResponse({'errors': {'__all__': ['Authentication required.']}}, status=401)
+            if request.method not in methods:
+                response = JsonResponse({'errors': {'__all__': [f'Method {request.method} not allowed.']}}, status=405)
+                response['Allow'] = ', '.join(methods)
+                return response
+            try:
+                return view_function(request, *args, **kwargs)
+            except ApiError as error:
+                return JsonResponse({'errors': error.errors}, status=error.status)
+            except ObjectDoesNotExist:
+                return JsonResponse({'errors': {'__all__': ['Not found.']}}, status=404)
+        return modified_view_function
+    return decorator
+
+
+def request_data(request):
+    """Return the JSON object sent in the request body."""
+
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        raise ApiError(400, {'__all__': ['Request body is not valid JSON.']})
+    if not isinstance(data, dict):
+        raise ApiError(400, {'__all__': ['Request body must be a JSON object.']})
+    return data
+
+
+def user_summary(user):
+    return {'id': user.pk, 'username': user.username}
+
+
+class Serializer:
+    """Turn model instances into dicts holding only the fields requested with ?fields=.
+
+    Each field lists the columns it reads, so the queryset loads only those columns
+    and joins only the relations the requested fields need.
+    """
+
+    model = None
+    fields = {}
+    default_fields = []
+
+    def __init__(self, request):
+        requested = request.GET.get('fields')
+        names = [name.strip() for name in requested.split(',') if name.strip()] if requested else self.default_fields
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise ApiError(400, {'fields': [f"Unknown field {name!r}." for name in unknown]})
+        self.names = ['id'] + [name for name in names if name != 'id']
+
+    def queryset(self, queryset, ordering=()):
+        """Return the queryset loading only what the requested fields and the ordering need."""
+
+        columns = {key.lstrip('-') for key in ordering if key.lstrip('-') != 'pk'}
+        related = set()
+        prefetches = []
+        for name in self.names:
+            field = self.fields[name]
+            columns.update(field.get('columns', []))
+            related.update(field.get('related', []))
+            prefetches += field.get('prefetch', [])
+        queryset = queryset.select_related(*related).prefetch_related(*prefetches)
+        return queryset.only(*columns) if columns else queryset.only('pk')
+
+    def serialize(self, obj):
+        return {name: self.fields[name]['value'](obj) for name in self.names}
+
+
+class TaskSerializer(Serializer):
+    model = Task
+    fields = {
+        'id': {'value': lambda task: task.pk},
+        'title': {'columns': ['title'], 'value': lambda task: task.title},
+        'description': {'columns': ['description'], 'value': lambda task: task.description},
+        'due_date': {'columns': ['due_date'], 'value': lambda task: task.due_date},
+        'status': {'columns': ['status'], 'value': lambda task: task.status},
+        'priority': {'columns': ['priority'], 'value': lambda task: task.priority},
+        'assignee': {
+            'columns': ['assignee', 'assignee__username'],
+            'related': ['assignee'],
+            'value': lambda task: user_summary(task.assignee),
+        },
+        'team': {
+            'columns': ['team_of_task', 'team_of_task__name'],
+            'related': ['team_of_task'],
+            'value': lambda task: task.team_of_task and {'id': task.team_of_task.pk, 'name': task.team_of_task.name},
+        },
+        'updated_at': {'columns': ['updated_at'], 'value': lambda task: task.updated_at},
+    }
+    default_fields = ['title', 'description', 'due_date', 'status', 'priority', 'assignee', 'team']
+
+
+class TeamSerializer(Serializer):
+    model = Team
+    fields = {
+        'id': {'value': lambda team: team.pk},
+        'name': {'columns': ['name'], 'value': lambda team: team.name},
+        'description': {'columns': ['description'], 'value': lambda team: team.description},
+        'admin': {
+            'columns': ['admin', 'admin__username'],
+            'related': ['admin'],
+            'value': lambda team: user_summary(team.admin),
+        },
+        'members': {
+            'prefetch': [Prefetch('members', queryset=User.objects.only('username'))],
+            'value': lambda team: [user_summary(member) for member in team.members.all()],
+        },
+        'task_counts': {
+            'columns': ['assigned_task_count', 'in_progress_task_count', 'completed_task_count'],
+            'value': lambda team: {
+                'assigned': team.assigned_task_count,
+                'in_progress': team.in_progress_task_count,
+                'completed': team.completed_task_count,
+            },
+        },
+        'updated_at': {'columns': ['updated_at'], 'value': lambda team: team.updated_at},
+    }
+    default_fields = ['name', 'description', 'admin']
+
+
+def paginated_response(request, serializer, queryset, ordering):
+    """Return one page of the serialized queryset, with the URLs of its neighbours."""
+
+    page = KeysetPaginator(serializer.queryset(queryset, ordering), ordering).page(request)
+    return JsonResponse({
+        'results': [serializer.serialize(obj) for obj in page],
+        'next': f'{request.path}?{page.next_query()}' if page.has_next() else None,
+        'previous': f'{request.path}?{page.previous_query()}' if page.has_previous() else None,
+    })
+
+
+def visible_tasks(user):
+    """Return the tasks assigned to the user or belonging to one of their teams."""
+
+    team_ids = Membership.objects.filter(user=user).values('team_id')
+    return Task.objects.filter(Q(assignee=user) | Q(team_of_task__in=team_ids))
+
+
+def is_id_list(value):
+    """Return whether a JSON value is a list of integer ids."""
+
+    return isinstance(value, list) and all(isinstance(pk, int) and not isinstance(pk, bool) for pk in value)
+
+
+def form_errors(form):
+    return {field: [str(error) for error in errors] for field, errors in form.errors.items()}
+
+
+def save_task(request, data, task=None):
+    """Validate the data with the task form rules and save it to a new or existing task."""
+
+    if task is None:
+        try:
+            team = Team.objects.filter(members=request.user).get(pk=data.get('team'))
+        except (Team.DoesNotExist, TypeError, ValueError):
+            raise ApiError(400, {'team': ['Select one of your teams.']})
+    else:
+        team = task.team_of_task
+        task.existing_task = True
+        data = {**model_to_dict(task, fields=TaskForm.Meta.fields), **data}
+    form = TaskForm(data, instance=task, team_id=team.pk if team else None)
+    if not form.is_valid():
+        raise ApiError(400, form_errors(form))
+    task = form.save(commit=False)
+    task.team_of_task = team
+    task.save()
+    return task
+
+
+@api_view(['GET', 'POST'])
+def task_list(request):
+    """List the current user's visible tasks, filtered like the task dashboard, or create a task."""
+
+    serializer = TaskSerializer(request)
+    if request.method == 'POST':
+        task = save_task(request, request_data(request))
+        return JsonResponse(serializer.serialize(serializer.queryset(Task.objects).get(pk=task.pk)), status=201)
+
+    form = TaskFilterForm(request.GET)
+    if not form.is_valid():
+        raise ApiError(400, form_errors(form))
+    tasks = form.filter_queryset(visible_tasks(request.user))
+    if request.GET.get('team'):
+        try:
+            team_id = int(request.GET['team'])
+        except ValueError:
+            raise ApiError(400, {'team': ['Give a team id.']})
+        tasks = tasks.filter(team_of_task=team_id)
+    sort_by = request.GET.get('sort_by', 'due_date')
+    if sort_by not in TASK_ORDERINGS:
+        raise ApiError(400, {'sort_by': [f'Choose one of {", ".join(TASK_ORDERINGS)}.']})
+    return paginated_response(request, serializer, tasks, [sort_by])
+
+
+@api_view(['POST'])
+def task_bulk_update(request):
+    """Apply one status, priority, assignee or due date change to a list of visible tasks."""
+
+    data = request_data(request)
+    ids = data.get('ids')
+    if not is_id_list(ids):
+        raise ApiError(400, {'ids': ['Give a list of task ids.']})
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > settings.BULK_UPDATE_MAX_TASKS:
+        raise ApiError(400, {'ids': [f'Give at most {settings.BULK_UPDATE_MAX_TASKS} task ids.']})
+    changes = data.get('changes')
+    form = BulkTaskChangeForm(changes if isinstance(changes, dict) else {})
+    if not form.is_valid():
+        raise ApiError(400, form_errors(form))
+    results = form.save(visible_tasks(request.user), ids)
+    return JsonResponse({
+        'updated': sum(1 for result in results if result.get('updated')),
+        'results': results,
+    })
+
+
+@api_view(['GET', 'PATCH', 'DELETE'])
+def task_detail(request, pk):
+    """Show, partially update or delete one of the current user's visible tasks."""
+
+    serializer = TaskSerializer(request)
+    if request.method == 'GET':
+        return JsonResponse(serializer.serialize(serializer.queryset(visible_tasks(request.user)).get(pk=pk)))
+
+    task = visible_tasks(request.user).get(pk=pk)
+    if request.method == 'DELETE':
+        task.delete()
+        return HttpResponse(status=204)
+    save_task(request, request_data(request), task)
+    return JsonResponse(serializer.serialize(serializer.queryset(Task.objects).get(pk=task.pk)))
+
+
+@api_view(['GET', 'POST'])
+def team_list(request):
+    """List the current user's teams, or create a team inviting the given members."""
+
+    serializer = TeamSerializer(request)
+    if request.method == 'POST':
+        form = TeamForm(request_data(request))
+        if not form.is_valid():
+            raise ApiError(400, form_errors(form))
+        team = form.save(request)
+        return JsonResponse(serializer.serialize(serializer.queryset(Team.objects).get(pk=team.pk)), status=201)
+
+    return paginated_response(request, serializer, Team.objects.filter(members=request.user), ['name'])
+
+
+@api_view(['GET', 'PATCH', 'DELETE'])
+def team_detail(request, pk):
+    """Show one of the current user's teams, or let its admin update or delete it."""
+
+    serializer = TeamSerializer(request)
+    if request.method == 'GET':
+        return JsonResponse(serializer.serialize(serializer.queryset(Team.objects.filter(members=request.user)).get(pk=pk)))
+
+    team = Team.objects.filter(admin=request.user).get(pk=pk)
+    if request.method == 'DELETE':
+        team.delete()
+        return HttpResponse(status=204)
+    data = request_data(request)
+    unknown = set(data) - {'name', 'description'}
+    if unknown:
+        raise ApiError(400, {name: ['This field cannot be updated.'] for name in sorted(unknown)})
+    for name, value in data.items():
+        if not isinstance(value, str):
+            raise ApiError(400, {name: ['Give a string.']})
+        setattr(team, name, value)
+    try:
+        team.full_clean()
+    except ValidationError as error:
+        raise ApiError(400, error.message_dict)
+    team.save()
+    return JsonResponse(serializer.serialize(serializer.queryset(Team.objects).get(pk=team.pk)))
+
+
+@api_view(['GET', 'POST'])
+def team_invites(request, pk):
+    """List the users invited to a team, or let its admin invite more users."""
+
+    team = Team.objects.filter(members=request.user).get(pk=pk)
+    if request.method == 'POST':
+        if team.admin_id != request.user.pk:
+            raise ApiError(403, {'__all__': ['Only the admin can invite members.']})
+        user_ids = request_data(request).get('users')
+        if not is_id_list(user_ids):
+            raise ApiError(400, {'users': ['Give a list of user ids.']})
+        users = User.objects.filter(pk__in=user_ids).exclude(teams=team)
+        team.invites.add(*users)
+    invited = team.invites.only('username').order_by('username')
+    return JsonResponse({'results': [user_summary(user) for user in invited]})
+
+
+@api_view(['GET'])
+def invite_list(request):
+    """List the teams the current user is invited to."""
+
+    serializer = TeamSerializer(request)
+    return paginated_response(request, serializer, request.user.invites.all(), ['name'])
+
+
+@api_view(['POST'])
+def invite_response(request, pk, action):
+    """Accept or reject the current user's invite to a team."""
+
+    if action not in ('accept', 'reject'):
+        raise ApiError(404, {'__all__': ['Not found.']})
+    team = request.user.invites.get(pk=pk)
+    if action == 'accept':
+        request.user.teams.add(team)
+    request.user.invites.remove(team)
+    return JsonResponse(TeamSerializer(request).serialize(team))
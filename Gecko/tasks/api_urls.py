@@ -0,0 +1,13 @@
+from django.urls import path
+from tasks import api
+
+urlpatterns = [
+    path('tasks/', api.task_list, name='api_task_list'),
+    path('tasks/bulk/', api.task_bulk_update, name='api_task_bulk_update'),
+    path('tasks/<int:pk>/', api.task_detail, name='api_task_detail'),
+    path('teams/', api.team_list, name='api_team_list'),
+    path('teams/<int:pk>/', api.team_detail, name='api_team_detail'),
+    path('teams/<int:pk>/invites/', api.team_invites, name='api_team_invites'),
+    path('invites/', api.invite_list, name='api_invite_list'),
+    path('invites/<int:pk>/<str:action>/', api.invite_response, name='api_invite_response'),
+]
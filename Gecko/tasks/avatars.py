@@ -0,0 +1,62 @@
+"""Gravatar URLs and the locally served avatar cache."""
+import os
+from functools import lru_cache
+from urllib.request import urlopen
+from django.conf import settings
+from django.urls import reverse
+from libgravatar import Gravatar
+
+
+@lru_cache(maxsize=4096)
+def gravatar_hash(email):
+    """Return the gravatar hash of an email address."""
+
+    return Gravatar(email).email_hash
+
+
+@lru_cache(maxsize=4096)
+def gravatar_url(email, size):
+    """Return the gravatar URL of an email address at the given size."""
+
+    return Gravatar(email).get_image(size=size, default='mp')
+
+
+def avatar_url(email, size):
+    """Return the URL the avatar should be loaded from, local when the avatar proxy is enabled."""
+
+    if settings.AVATAR_PROXY:
+        return reverse('avatar', kwargs={'email_hash': gravatar_hash(email), 'size': size})
+    return gravatar_url(email, size)
+
+
+def remote_avatar_url(email_hash, size):
+    return f'https://www.gravatar.com/avatar/{email_hash}.jpg?size={size}&default=mp'
+
+
+def cached_avatar_path(email_hash, size):
+    """Return the path of a locally cached avatar, downloading it first if needed."""
+
+    path = os.path.join(settings.AVATAR_CACHE_DIR, f'{email_hash}-{size}.jpg')
+    if not os.path.exists(path):
+        with urlopen(remote_avatar_url(email_hash, size), timeout=settings.AVATAR_FETCH_TIMEOUT) as response:
+            image = response.read()
+        os.makedirs(settings.AVATAR_CACHE_DIR, exist_ok=True)
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as file:
+            file.write(image)
+        os.replace(temporary, path)
+        evict_avatars()
+    return path
+
+
+def evict_avatars():
+    """Delete the least recently downloaded avatars beyond AVATAR_CACHE_MAX_FILES."""
+
+    with os.scandir(settings.AVATAR_CACHE_DIR) as entries:
+        files = [entry for entry in entries if entry.name.endswith('.jpg') and entry.is_file()]
+    files.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in files[settings.AVATAR_CACHE_MAX_FILES:]:
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,105 @@
+"""Per-user and per-team cache generations used to version cached fragments."""
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from tasks.models import User
+
+GENERATION_KEY = '{}-generation:{}'
+
+
+def generation(scope, pk):
+    """Return the cache generation of a user or team, starting a new one if the cache has none.
+
+    A fresh generation starts from the current time rather than zero, so fragments
+    cached under an evicted counter can never be served again.
+    """
+
+    key = GENERATION_KEY.format(scope, pk)
+    current = cache.get(key)
+    if current is None:
+        cache.add(key, time.time_ns(), None)
+        current = cache.get(key)
+    return current
+
+
+def invalidate(scope, pks):
+    """Bump the cache generation of the given users or teams once the current transaction commits.
+
+    Bumping before the commit would let a concurrent request cache the old rows under
+    the new generation.
+    """
+
+    pks = {pk for pk in pks if pk is not None}
+    if pks:
+        transaction.on_commit(lambda: bump_generations(scope, pks))
+
+
+def bump_generations(scope, pks):
+    """Bump the cache generation of the given users or teams, orphaning everything cached for them."""
+
+    for pk in pks:
+        try:
+            cache.incr(GENERATION_KEY.format(scope, pk))
+        except ValueError:
+            pass
+
+
+def user_generation(user_id):
+    return generation('user', user_id)
+
+
+def invalidate_users(user_ids):
+    invalidate('user', user_ids)
+
+
+def team_generation(team_id):
+    return generation('team', team_id)
+
+
+def invalidate_teams(team_ids):
+    invalidate('team', team_ids)
+
+
+def dashboard_cache_key(user_id, query_string=''):
+    """Return the cache key of a user's dashboard fragment for the given query string."""
+
+    query = hashlib.md5(query_string.encode()).hexdigest()
+    return f'dashboard:{user_id}:{user_generation(user_id)}:{query}'
+
+
+def cached_fragment(key, render, timeout=None):
+    """Return the fragment cached under key, rendering and caching it on a miss."""
+
+    fragment = cache.get(key)
+    if fragment is None:
+        fragment = render()
+        cache.set(key, fragment, timeout or settings.DASHBOARD_CACHE_TIMEOUT)
+    return fragment
+
+
+async def acached_fragment(key, render, timeout=None):
+    """Return the fragment cached under key, awaiting render() and caching its result on a miss."""
+
+    fragment = await cache.aget(key)
+    if fragment is None:
+        fragment = await render()
+        await cache.aset(key, fragment, timeout or settings.DASHBOARD_CACHE_TIMEOUT)
+    return fragment
+
+
+def team_member_choices(team_ids):
+    """Return the (id, username) choices of the members of the given teams, cached per team."""
+
+    choices = {}
+    for team_id in team_ids:
+        key = f'team-member-choices:{team_id}:{team_generation(team_id)}'
+        members = cache.get(key)
+        if members is None:
+            members = list(
+                User.objects.filter(memberships__team_id=team_id).order_by('username').values_list('pk', 'username')
+            )
+            cache.set(key, members, settings.TEAM_MEMBER_CHOICES_CACHE_TIMEOUT)
+        choices.update(members)
+    return sorted(choices.items(), key=lambda choice: choice[1])
@@ -0,0 +1,52 @@
+"""Per-status task counters denormalized onto users and teams."""
+from collections import Counter
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+COUNTER_FIELDS = {
+    'assigned': 'assigned_task_count',
+    'in progress': 'in_progress_task_count',
+    'completed': 'completed_task_count',
+}
+
+
+def count_task(user_model, team_model, user_id, team_id, status, delta):
+    """Add delta to the counter of a status on a task's assignee and team."""
+
+    field = COUNTER_FIELDS.get(status)
+    if field is None:
+        return
+    update = {field: F(field) + delta}
+    if user_id is not None:
+        user_model.objects.filter(pk=user_id).update(**update)
+    if team_id is not None:
+        team_model.objects.filter(pk=team_id).update(**update)
+
+
+def count_task_changes(user_model, team_model, changes):
+    """Move many tasks between counters, given (saved, current) pairs of (user_id, team_id, status).
+
+    Moves are netted per assignee, team and status first, so a bulk change costs a
+    couple of UPDATEs per distinct combination rather than per task.
+    """
+
+    deltas = Counter()
+    for saved, current in changes:
+        if saved != current:
+            deltas[saved] -= 1
+            deltas[current] += 1
+    for (user_id, team_id, status), delta in deltas.items():
+        if delta:
+            count_task(user_model, team_model, user_id, team_id, status, delta)
+
+
+def rebuild_counters(task_model, user_model, team_model):
+    """Recount the tasks of every user and team with one UPDATE per counter."""
+
+    for model, column in ((user_model, 'assignee'), (team_model, 'team_of_task')):
+        counts = {}
+        for status, field in COUNTER_FIELDS.items():
+            tasks = task_model.objects.filter(**{column: OuterRef('pk'), 'status': status})
+            tasks = tasks.order_by().values(column).annotate(count=Count('pk')).values('count')
+            counts[field] = Coalesce(Subquery(tasks), Value(0))
+        model.objects.update(**counts)
@@ -0,0 +1,197 @@
+"""Brokers pushing compact task change events to the per-team event streams."""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils import timezone
+from django.utils.formats import date_format
+from django.utils.module_loading import import_string
+
+
+def task_event(task, deleted=False):
+    """Return the event describing a saved or deleted task, with the fields the pages patch in place.
+
+    Related rows are named by id only, so building an event never queries the database.
+    """
+
+    if deleted:
+        return {'type': 'deleted', 'id': task.pk, 'team': task._saved_team_id}
+    return {
+        'type': 'saved',
+        'id': task.pk,
+        'team': task.team_of_task_id,
+        'title': task.title,
+        'description': task.description,
+        'due_date': task.due_date.isoformat(),
+        'due_date_display': date_format(timezone.localtime(task.due_date), 'DATETIME_FORMAT'),
+        'status': task.status,
+        'priority': task.priority,
+        'assignee': task.assignee_id,
+    }
+
+
+def publish_task_event(task, deleted=False):
+    """Send the change of a task to the streams of its old and new team once the transaction commits."""
+
+    event = task_event(task, deleted)
+    team_ids = {task._saved_team_id} if deleted else {task.team_of_task_id, task._saved_team_id}
+    broker = get_event_broker()
+    for team_id in team_ids - {None}:
+        transaction.on_commit(lambda team_id=team_id: broker.publish(team_id, event))
+
+
+def publish_team_refresh(team_ids):
+    """Tell the streams of the given teams to reload, after a bulk change the task signals did not see."""
+
+    broker = get_event_broker()
+    for team_id in set(team_ids) - {None}:
+        transaction.on_commit(lambda team_id=team_id: broker.publish(team_id, {'type': 'refresh', 'team': team_id}))
+
+
+class Subscription:
+    """Queue of the events of some teams, read by one event stream in its event loop."""
+
+    def __init__(self, broker, team_ids):
+        self.broker = broker
+        self.team_ids = set(team_ids)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=settings.TASK_EVENTS_QUEUE_SIZE)
+
+    def put(self, event):
+        """Hand an event over from any thread, without blocking the publisher."""
+
+        try:
+            self.loop.call_soon_threadsafe(self.deliver, event)
+        except RuntimeError:
+            self.broker.unsubscribe(self)
+
+    def deliver(self, event):
+        """Queue an event, replacing the backlog of a subscriber too slow to keep up with one refresh."""
+
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({'type': 'refresh', 'team': event.get('team')})
+
+    async def get(self, timeout):
+        """Return the next event, or None if there was none for timeout seconds."""
+
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """Broker delivering events to the streams served by the current process only.
+
+    This is enough for a single ASGI worker; deployments running several processes
+    need a broker shared between them, such as RedisBroker.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = defaultdict(set)
+
+    def publish(self, team_id, event):
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(team_id, ()))
+        for subscription in subscriptions:
+            subscription.put(event)
+
+    async def subscribe(self, team_ids):
+        subscription = Subscription(self, team_ids)
+        with self.lock:
+            for team_id in subscription.team_ids:
+                self.subscriptions[team_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            for team_id in subscription.team_ids:
+                self.subscriptions[team_id].discard(subscription)
+                if not self.subscriptions[team_id]:
+                    del self.subscriptions[team_id]
+
+
+class RedisSubscription:
+    """Redis pub/sub subscription to the channels of some teams."""
+
+    def __init__(self, client, pubsub):
+        self.client = client
+        self.pubsub = pubsub
+
+    async def get(self, timeout):
+        message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        return json.loads(message['data']) if message else None
+
+    async def close(self):
+        await self.pubsub.reset()
+        await self.client.close()
+
+
+class RedisBroker:
+    """Broker sharing events between processes through Redis pub/sub, at TASK_EVENTS_REDIS_URL."""
+
+    channel = 'task-events:{}'
+
+    def __init__(self):
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured("RedisBroker needs the redis package")
+        self.client = redis.Redis.from_url(settings.TASK_EVENTS_REDIS_URL)
+
+    def publish(self, team_id, event):
+        self.client.publish(self.channel.format(team_id), json.dumps(event))
+
+    async def subscribe(self, team_ids):
+        from redis import asyncio as aioredis
+
+        client = aioredis.Redis.from_url(settings.TASK_EVENTS_REDIS_URL)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(*[self.channel.format(team_id) for team_id in team_ids])
+        return RedisSubscription(client, pubsub)
+
+
+_brokers = {}
+
+
+def get_event_broker():
+    """Return the task event broker configured by TASK_EVENTS_BROKER, shared by the whole process."""
+
+    path = settings.TASK_EVENTS_BROKER or 'tasks.events.InProcessBroker'
+    if path not in _brokers:
+        _brokers[path] = import_string(path)()
+    return _brokers[path]
+
+
+async def event_stream(team_ids):
+    """Yield the server-sent events of the given teams, with keep-alive comments while they are idle.
+
+    The stream ends after TASK_EVENTS_STREAM_SECONDS and the browser reconnects, so a
+    stream whose client went away unnoticed is not kept forever.
+    """
+
+    loop = asyncio.get_running_loop()
+    closes_at = loop.time() + settings.TASK_EVENTS_STREAM_SECONDS
+    subscription = await get_event_broker().subscribe(team_ids)
+    try:
+        yield f'retry: {settings.TASK_EVENTS_RETRY_MS}\n\n'
+        while loop.time() < closes_at:
+            event = await subscription.get(min(settings.TASK_EVENTS_HEARTBEAT, closes_at - loop.time()))
+            if event is None:
+                yield ': keep-alive\n\n'
+            else:
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    finally:
+        await subscription.close()
+
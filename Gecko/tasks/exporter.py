@@ -0,0 +1,61 @@
+"""Streaming export of tasks and teams as CSV or JSON Lines."""
+import csv
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+TASK_COLUMNS = [
+    ('id', 'pk'),
+    ('title', 'title'),
+    ('description', 'description'),
+    ('due_date', 'due_date'),
+    ('assignee', 'assignee__username'),
+    ('team', 'team_of_task__name'),
+    ('status', 'status'),
+    ('priority', 'priority'),
+    ('updated_at', 'updated_at'),
+]
+
+TEAM_COLUMNS = [
+    ('id', 'pk'),
+    ('name', 'name'),
+    ('description', 'description'),
+    ('admin', 'admin__username'),
+    ('assigned_tasks', 'assigned_task_count'),
+    ('in_progress_tasks', 'in_progress_task_count'),
+    ('completed_tasks', 'completed_task_count'),
+    ('updated_at', 'updated_at'),
+]
+
+
+class LineBuffer:
+    """File-like object handing back each line the csv writer writes instead of storing it."""
+
+    def write(self, line):
+        return line
+
+
+def export_rows(queryset, columns, file_format, chunk_size=None):
+    """Yield the rows of a queryset as lines of CSV or JSON Lines, in constant memory.
+
+    Related names are read through joins in the same query, and rows are fetched
+    chunk_size at a time rather than all at once.
+    """
+
+    names = [name for name, _ in columns]
+    rows = queryset.values_list(*[lookup for _, lookup in columns]).iterator(
+        chunk_size=chunk_size or settings.EXPORT_CHUNK_SIZE
+    )
+    if file_format == 'jsonl':
+        encoder = DjangoJSONEncoder()
+        for row in rows:
+            yield encoder.encode(dict(zip(names, row))) + '\n'
+        return
+    writer = csv.writer(LineBuffer())
+    yield writer.writerow(names)
+    for row in rows:
+        yield writer.writerow(row)
@@ -1,10 +1,19 @@
 """Forms for the tasks app."""
+import hashlib
 from django import forms
+from django.conf import settings
 from django.contrib.auth import authenticate
 from django.core.validators import RegexValidator
-from .models import User, Task, Team
+from .models import User, Task, Team, Membership, SavedView
 from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+from datetime import timedelta
+from tasks.caching import cached_fragment, invalidate_users, team_generation, team_member_choices
+from tasks.counters import count_task_changes
+from tasks.events import publish_team_refresh
+from tasks.signals import expire_saved_views, touch_teams
 
 
 class LogInForm(forms.Form):
@@ -129,8 +138,7 @@ class TeamForm(forms.ModelForm):
             admin = request.user,
             description = self.cleaned_data.get('description')
         )
-        team.members.add(request.user)
-        request.user.teams.add(team)
+        team.members.add(request.user, through_defaults={'role': Membership.ADMIN})
 
         for member in self.cleaned_data.get('members').all():
             if member != request.user:
@@ -178,6 +186,21 @@ class RemoveMembersForm(forms.Form):
         self.fields['members_to_remove'].queryset = team_members
         
 
+class CachedSelect(forms.Select):
+    """ Select widget reusing its rendered HTML for as long as its cache_key stays the same. """
+    cache_key = None
+
+    def render(self, name, value, attrs=None, renderer=None):
+        if self.cache_key is None:
+            return super().render(name, value, attrs, renderer)
+        rendering = repr((name, value, sorted({**self.attrs, **(attrs or {})}.items())))
+        key = f'{self.cache_key}:{hashlib.md5(rendering.encode()).hexdigest()}'
+        return cached_fragment(
+            key,
+            lambda: super(CachedSelect, self).render(name, value, attrs, renderer),
+            settings.TEAM_MEMBER_CHOICES_CACHE_TIMEOUT,
+        )
+
 class TaskForm(forms.ModelForm):
     """ Form enabling team members to create and assign tasks. """
 
@@ -186,6 +209,7 @@ class TaskForm(forms.ModelForm):
         model= Task
         fields=['title', 'description', 'assignee', 'due_date', 'status', 'priority']
         widgets= {
+                'assignee': CachedSelect(),
                 'due_date': forms.DateTimeInput(
                 format= '%Y-%m-%dT%H:%M',
                 attrs={'type': 'datetime-local'}
@@ -197,18 +221,29 @@ class TaskForm(forms.ModelForm):
         team_id = kwargs.pop('team_id', None)
         super(TaskForm, self).__init__(*args, **kwargs)
         if team_id:
-             team = Team.objects.get(id= team_id)
-             self.fields['assignee'].queryset = team.members.all()
+            self.limit_assignees([team_id])
         elif user:
-            teams= user.teams.all()
-            members= User.objects.filter(teams__in= teams).distinct()
-            self.fields['assignee'].queryset = members
+            self.limit_assignees(list(user.memberships.values_list('team_id', flat=True)))
+
+    def limit_assignees(self, team_ids):
+        """Offer the members of the given teams as assignees, from the per-team choice cache.
+
+        The queryset only runs when a submitted assignee is validated, and the rendered
+        select is reused until the membership of one of the teams changes.
+        """
+
+        assignee = self.fields['assignee']
+        assignee.queryset = User.objects.filter(memberships__team_id__in=team_ids).distinct()
+        assignee.choices = [('', assignee.empty_label)] + team_member_choices(team_ids)
+        assignee.widget.cache_key = 'assignee-select:' + ':'.join(
+            f'{team_id}-{team_generation(team_id)}' for team_id in sorted(team_ids)
+        )
 
     def clean(self):
         super().clean()
         due_date = self.cleaned_data.get('due_date')
 
-        if due_date is not None and due_date < timezone.now():
+        if due_date is not None and due_date != self.instance.due_date and due_date < timezone.now():
             self.add_error('due_date', 'Due date cannot be in the past')
 
 class TeamSelectForm(forms.Form):
@@ -236,10 +271,176 @@ class AssignNewAdminForm(forms.Form):
 
 class TaskFilterForm(forms.Form):
     """ Form enabling users to filter their assigned tasks based on task fields. """
+    DUE_WINDOW_CHOICES = [
+        ('', 'Any time'),
+        ('overdue', 'Overdue'),
+        ('today', 'Due today'),
+        ('this_week', 'Due this week'),
+        ('next_7_days', 'Due in the next 7 days'),
+        ('next_30_days', 'Due in the next 30 days'),
+    ]
+
     title = forms.CharField(required=False)
     assignee = forms.ModelChoiceField(queryset=User.objects.all(), required=False)
     due_date_start = forms.DateTimeField(required=False)
     due_date_end = forms.DateTimeField(required=False)
+    due_window = forms.ChoiceField(choices=DUE_WINDOW_CHOICES, required=False)
     status = forms.ChoiceField(choices=Task.STATUS_CHOICES, required=False)
     priority = forms.ChoiceField(choices=Task.PRIORITY_CHOICES, required=False)
 
+    def __init__(self, *args, now=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.now = (now or timezone.now()).replace(second=0, microsecond=0)
+
+    def clean(self):
+        super().clean()
+        start, end = self.cleaned_data.get('due_date_start'), self.cleaned_data.get('due_date_end')
+        if start is not None and end is not None and start > end:
+            self.add_error('due_date_end', 'End of the due date range cannot be before its start')
+
+    def window_range(self, window):
+        """Return the [start, end) due date range of a relative window, either end None when open.
+
+        Windows are resolved against the current minute in the current time zone, so the
+        same URL selects the same slice until the minute changes.
+        """
+
+        today = timezone.localtime(self.now).replace(hour=0, minute=0)
+        if window == 'overdue':
+            return None, self.now
+        if window == 'today':
+            return today, today + timedelta(days=1)
+        if window == 'this_week':
+            monday = today - timedelta(days=today.weekday())
+            return monday, monday + timedelta(days=7)
+        if window == 'next_7_days':
+            return self.now, self.now + timedelta(days=7)
+        if window == 'next_30_days':
+            return self.now, self.now + timedelta(days=30)
+        return None, None
+
+    def due_date_range(self, relative=True):
+        """Return the [start, end) due date range selected by the cleaned filters, either end None when open.
+
+        An end given as a bare date covers that whole day, and a relative window narrows
+        the explicit range rather than replacing it. With relative False the window is left
+        out, leaving only the part of the range that does not move with time.
+        """
+
+        start = self.cleaned_data.get('due_date_start')
+        end = self.cleaned_data.get('due_date_end')
+        if end is not None:
+            end += timedelta(days=1) if parse_date(str(self.data.get('due_date_end')).strip()) else timedelta(microseconds=1)
+        window_start, window_end = self.window_range(self.cleaned_data.get('due_window') if relative else None)
+        if window_start is not None:
+            start = window_start if start is None else max(start, window_start)
+        if window_end is not None:
+            end = window_end if end is None else min(end, window_end)
+        return start, end
+
+    def filter_queryset(self, tasks, relative=True):
+        """Return the tasks matching the cleaned filters, ignoring the relative due window if relative is False.
+
+        Due dates are filtered with one half-open range, which the (assignee, due_date)
+        and (team, due_date) indexes answer without scanning other tasks.
+        """
+
+        data = self.cleaned_data
+        if data.get('title'):
+            tasks = tasks.filter(title__icontains=data['title'])
+        if data.get('assignee'):
+            tasks = tasks.filter(assignee=data['assignee'])
+        start, end = self.due_date_range(relative)
+        if start is not None:
+            tasks = tasks.filter(due_date__gte=start)
+        if end is not None:
+            tasks = tasks.filter(due_date__lt=end)
+        if data.get('due_window') == 'overdue':
+            tasks = tasks.exclude(status='completed')
+        if data.get('status'):
+            tasks = tasks.filter(status=data['status'])
+        if data.get('priority'):
+            tasks = tasks.filter(priority=data['priority'])
+        return tasks
+
+class SavedViewForm(forms.ModelForm):
+    """ Form enabling users to name the current task dashboard query and save it as a view. """
+    class Meta:
+        """Form options."""
+        model = SavedView
+        fields = ['name']
+        widgets = {'name': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'View name'})}
+
+class BulkTaskChangeForm(forms.Form):
+    """ Form applying the same status, priority, assignee or due date change to many tasks at once. """
+    status = forms.ChoiceField(choices=Task.STATUS_CHOICES, required=False)
+    priority = forms.TypedChoiceField(choices=Task.PRIORITY_CHOICES, coerce=int, required=False)
+    assignee = forms.ModelChoiceField(queryset=User.objects.all(), required=False)
+    due_date = forms.DateTimeField(required=False)
+
+    def clean_due_date(self):
+        due_date = self.cleaned_data.get('due_date')
+        if due_date is not None and due_date < timezone.now():
+            raise ValidationError('Due date cannot be in the past')
+        return due_date
+
+    def clean(self):
+        super().clean()
+        self.changes = {
+            name: value for name, value in self.cleaned_data.items()
+            if self.data.get(name) not in (None, '')
+        }
+        if not self.changes and not self.errors:
+            raise ValidationError('Give at least one of status, priority, assignee or due_date.')
+
+    def save(self, tasks, ids):
+        """Apply the changes to the tasks with the given ids in one transaction, returning a result per id.
+
+        Tasks that are missing from the queryset or whose team the new assignee does not
+        belong to are reported and left unchanged; the others are written with bulk_update.
+        """
+
+        assignee = self.changes.get('assignee')
+        fields = list(self.changes) + ['updated_at']
+        now = timezone.now()
+        results, updated, moves = [], [], []
+        with transaction.atomic():
+            found = tasks.filter(pk__in=ids).select_for_update().only(
+                'assignee', 'team_of_task', 'status', 'priority', 'due_date', 'updated_at'
+            ).in_bulk()
+            if assignee is not None:
+                member_teams = set(Membership.objects.filter(user=assignee).values_list('team_id', flat=True))
+            for pk in ids:
+                task = found.get(pk)
+                if task is None:
+                    results.append({'id': pk, 'errors': {'__all__': ['Task not found.']}})
+                    continue
+                if assignee is not None and task.team_of_task_id not in member_teams:
+                    results.append({'id': pk, 'errors': {'assignee': [f"{assignee} is not a member of the task's team."]}})
+                    continue
+                saved = (task.assignee_id, task.team_of_task_id, task.status)
+                for name, value in self.changes.items():
+                    setattr(task, name, value)
+                task.updated_at = now
+                moves.append((saved, (task.assignee_id, task.team_of_task_id, task.status)))
+                updated.append(task)
+                results.append({'id': pk, 'updated': True})
+
+            Task.objects.bulk_update(updated, fields, batch_size=500)
+            count_task_changes(User, Team, moves)
+            user_ids = [user_id for saved, current in moves for user_id in (saved[0], current[0])]
+            invalidate_users(user_ids)
+            expire_saved_views(user_ids)
+            touch_teams([saved[1] for saved, current in moves])
+            publish_team_refresh([saved[1] for saved, current in moves])
+        return results
+
+class TaskImportForm(forms.Form):
+    """ Form enabling users to upload a CSV or JSON Lines file of tasks for their teams. """
+    file = forms.FileField(
+        help_text="Columns: title, description, due_date, assignee (username), team (name), status, priority"
+    )
+    format = forms.ChoiceField(
+        choices=[('', 'From the file extension'), ('csv', 'CSV'), ('jsonl', 'JSON Lines')],
+        required=False
+    )
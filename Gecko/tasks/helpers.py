@@ -1,5 +1,13 @@
+import hashlib
+from functools import wraps
+from asgiref.sync import iscoroutinefunction, sync_to_async
 from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.contrib.messages import get_messages
 from django.shortcuts import redirect
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from tasks.caching import user_generation
 
 def login_prohibited(view_function):
     """Decorator for view functions that redirect users away if they are logged in."""
@@ -9,4 +17,88 @@ def login_prohibited(view_function):
             return redirect(settings.REDIRECT_URL_WHEN_LOGGED_IN)
         else:
             return view_function(request)
-    return modified_view_function
\ No newline at end of file
+    return modified_view_function
+
+def async_login_required(view_function):
+    """Decorator for async view functions that redirect anonymous users to the log in page.
+
+    The user is loaded from the session off the event loop, so the view can read
+    request.user without touching the database itself.
+    """
+
+    @wraps(view_function)
+    async def modified_view_function(request, *args, **kwargs):
+        user = await load_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view_function(request, *args, **kwargs)
+    return modified_view_function
+
+async def load_user(request):
+    """Return the user of a request, loading it from the session off the event loop."""
+
+    await sync_to_async(lambda: request.user.is_authenticated)()
+    return request.user
+
+def conditional_page(version_function):
+    """Decorator for view functions that answer unchanged GET requests with 304 Not Modified.
+
+    version_function(request, **kwargs) returns a (version, last_modified) pair that changes
+    whenever the page does, or None when the page cannot be validated. The ETag also covers
+    the user, their session and the query string, since the pages are rendered per user.
+    Async views are supported too, with the version looked up off the event loop.
+    """
+
+    def decorator(view_function):
+        if iscoroutinefunction(view_function):
+            @wraps(view_function)
+            async def async_view_function(request, *args, **kwargs):
+                etag, last_modified, response = await sync_to_async(check_page_version)(
+                    request, version_function, *args, **kwargs
+                )
+                if response is None:
+                    response = await view_function(request, *args, **kwargs)
+                    mark_page_version(response, etag, last_modified)
+                return response
+            return async_view_function
+
+        @wraps(view_function)
+        def modified_view_function(request, *args, **kwargs):
+            etag, last_modified, response = check_page_version(request, version_function, *args, **kwargs)
+            if response is None:
+                response = view_function(request, *args, **kwargs)
+                mark_page_version(response, etag, last_modified)
+            return response
+        return modified_view_function
+    return decorator
+
+def check_page_version(request, version_function, *args, **kwargs):
+    """Return the ETag and last modified time of the requested page, with a 304 response if it is unchanged."""
+
+    etag = last_modified = None
+    if request.method in ('GET', 'HEAD') and not len(get_messages(request)):
+        page_version = version_function(request, *args, **kwargs)
+        if page_version is not None:
+            version, last_modified = page_version
+            etag = page_etag(request, version)
+            last_modified = last_modified and int(last_modified.timestamp())
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is not None:
+                patch_cache_control(response, private=True, no_cache=True)
+                return etag, last_modified, response
+    return etag, last_modified, None
+
+def mark_page_version(response, etag, last_modified):
+    if etag and response.status_code == 200:
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+
+def page_etag(request, version):
+    """Return the quoted ETag of a page version as rendered for the current request."""
+
+    parts = [str(version), request.get_full_path()]
+    if request.user.is_authenticated:
+        parts += [str(request.user.pk), str(user_generation(request.user.pk)), request.session.session_key or '']
+    return '"%s"' % hashlib.md5('|'.join(parts).encode()).hexdigest()
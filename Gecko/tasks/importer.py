@@ -0,0 +1,201 @@
+"""Streaming import of tasks from CSV or JSON Lines files."""
+import codecs
+import csv
+import json
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from tasks.caching import invalidate_users
+from tasks.counters import count_task_changes
+from tasks.events import publish_team_refresh
+from tasks.models import Membership, Task, Team, User
+from tasks.search import get_search_backend
+from tasks.signals import expire_saved_views, touch_teams
+
+FORMATS = ['csv', 'jsonl']
+COLUMNS = ['title', 'description', 'due_date', 'assignee', 'team', 'status', 'priority']
+
+
+def guess_format(filename):
+    """Return the import format matching a file name's extension, defaulting to CSV."""
+
+    return 'jsonl' if filename.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+class ImportFileError(ValueError):
+    """Raised when an import file cannot be read any further, such as when it is not UTF-8."""
+
+
+def decode_lines(stream):
+    """Yield the lines of a binary stream decoded as UTF-8, skipping a leading byte order mark."""
+
+    for line_number, line in enumerate(stream, start=1):
+        if line_number == 1 and line.startswith(codecs.BOM_UTF8):
+            line = line[len(codecs.BOM_UTF8):]
+        try:
+            yield line.decode('utf-8')
+        except UnicodeDecodeError:
+            raise ImportFileError(f"Line {line_number} is not UTF-8 text.")
+
+
+def read_rows(stream, file_format):
+    """Yield (line number, row dict) pairs from a binary stream, one row at a time.
+
+    Raise ImportFileError, naming the line, when the rest of the file cannot be decoded or parsed.
+    """
+
+    lines = decode_lines(stream)
+    if file_format == 'csv':
+        reader = csv.DictReader(lines)
+        try:
+            for row in reader:
+                yield reader.line_num, row
+        except csv.Error as error:
+            raise ImportFileError(f"The file is not valid CSV after line {reader.line_num}: {error}.")
+        return
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else None
+
+
+class TaskImporter:
+    """Validate task rows with the TaskForm rules and insert them in batched transactions.
+
+    Teams and their members are looked up once per team name and reused for every row,
+    and title uniqueness is checked with one query per batch, so the cost per row stays
+    constant however large the file is.
+    """
+
+    def __init__(self, user=None, batch_size=1000):
+        self.user = user
+        self.batch_size = batch_size
+        self.teams = {}
+        self.titles = set()
+        self.imported = 0
+        self.errors = []
+        self.due_date_field = forms.DateTimeField()
+        self.status_choices = dict(Task.STATUS_CHOICES)
+        self.priority_choices = {str(value): value for value, label in Task.PRIORITY_CHOICES}
+        self.priority_choices.update({label.lower(): value for value, label in Task.PRIORITY_CHOICES})
+
+    def run(self, stream, file_format):
+        """Import every row of the stream, returning the number of imported tasks.
+
+        The rows before a line that cannot be read are still imported when ImportFileError is raised.
+        """
+
+        batch = []
+        try:
+            for line_number, row in read_rows(stream, file_format):
+                task = self.build_task(line_number, row)
+                if task is not None:
+                    batch.append((line_number, task))
+                if len(batch) >= self.batch_size:
+                    self.insert(batch)
+                    batch = []
+        except ImportFileError:
+            if batch:
+                self.insert(batch)
+            self.errors.sort(key=lambda error: error['line'])
+            raise
+        if batch:
+            self.insert(batch)
+        self.errors.sort(key=lambda error: error['line'])
+        return self.imported
+
+    def build_task(self, line_number, row):
+        """Return an unsaved task for a valid row, recording the errors of an invalid one."""
+
+        if row is None:
+            self.errors.append({'line': line_number, 'errors': {'__all__': ['Row is not a JSON object.']}})
+            return None
+        row = {column: str(row.get(column) or '').strip() for column in COLUMNS}
+        errors = {}
+
+        for column in ('title', 'description'):
+            max_length = Task._meta.get_field(column).max_length
+            if len(row[column]) > max_length:
+                errors[column] = [f'Ensure this value has at most {max_length} characters.']
+        if not row['title']:
+            errors['title'] = ['This field is required.']
+        elif row['title'] in self.titles:
+            errors['title'] = ['Task with this Title already exists in the file.']
+
+        due_date = None
+        try:
+            due_date = self.due_date_field.clean(row['due_date'])
+            if due_date < timezone.now():
+                errors['due_date'] = ['Due date cannot be in the past']
+        except ValidationError as error:
+            errors['due_date'] = error.messages
+
+        status = row['status'] or 'assigned'
+        if status not in self.status_choices:
+            errors['status'] = [f"Select a valid choice. {status} is not one of the available choices."]
+        priority = self.priority_choices.get(row['priority'].lower() or '2')
+        if priority is None:
+            errors['priority'] = [f"Select a valid choice. {row['priority']} is not one of the available choices."]
+
+        team = self.team(row['team'])
+        if team is None:
+            errors['team'] = [f"Unknown team {row['team']!r}."]
+        elif row['assignee'] not in team['members']:
+            errors['assignee'] = [f"{row['assignee'] or 'Assignee'} is not a member of {row['team']}."]
+
+        if errors:
+            self.errors.append({'line': line_number, 'errors': errors})
+            return None
+        self.titles.add(row['title'])
+        return Task(
+            title=row['title'],
+            description=row['description'],
+            due_date=due_date,
+            assignee_id=team['members'][row['assignee']],
+            team_of_task_id=team['id'],
+            status=status,
+            priority=priority,
+        )
+
+    def team(self, name):
+        """Return the id and members of a team the importing user may add tasks to, or None."""
+
+        if name not in self.teams:
+            teams = Team.objects.filter(name=name)
+            if self.user is not None:
+                teams = teams.filter(members=self.user)
+            team_id = teams.values_list('pk', flat=True).first()
+            self.teams[name] = team_id and {
+                'id': team_id,
+                'members': dict(
+                    Membership.objects.filter(team_id=team_id).values_list('user__username', 'user_id')
+                ),
+            }
+        return self.teams[name]
+
+    def insert(self, batch):
+        """Insert one batch of tasks in a transaction, reporting titles already taken in the database."""
+
+        taken = set(Task.objects.filter(title__in=[task.title for _, task in batch]).values_list('title', flat=True))
+        tasks = []
+        for line_number, task in batch:
+            if task.title in taken:
+                self.errors.append({'line': line_number, 'errors': {'title': ['Task with this Title already exists.']}})
+            else:
+                tasks.append(task)
+        with transaction.atomic():
+            Task.objects.bulk_create(tasks)
+            get_search_backend().index_tasks(tasks)
+            count_task_changes(User, Team, [
+                ((None, None, None), (task.assignee_id, task.team_of_task_id, task.status)) for task in tasks
+            ])
+            invalidate_users({task.assignee_id for task in tasks})
+            expire_saved_views({task.assignee_id for task in tasks})
+            touch_teams({task.team_of_task_id for task in tasks})
+            publish_team_refresh({task.team_of_task_id for task in tasks})
+        self.imported += len(tasks)
@@ -0,0 +1,148 @@
+import json
+import math
+import time
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import URLPattern, reverse
+from task_manager import urls
+from tasks.avatars import gravatar_hash
+from tasks.models import User, Task, Team
+
+ANONYMOUS_ROUTES = {'home', 'log_in', 'sign_up'}
+LAST_ROUTES = ['log_out']
+STREAMING_ROUTES = {'team_events', 'task_events'}
+
+
+def percentile(values, percent):
+    """Return the nearest-rank percentile of a list of values."""
+
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(len(ordered) * percent / 100) - 1)]
+
+
+def compare_reports(previous, current, threshold):
+    """Return a description of every route that got slower, heavier or ran more queries."""
+
+    regressions = []
+    for name, result in current['routes'].items():
+        before = previous['routes'].get(name)
+        if before is None:
+            continue
+        if result['p95_ms'] > before['p95_ms'] * threshold:
+            regressions.append(f"{name}: p95 {before['p95_ms']:.1f}ms -> {result['p95_ms']:.1f}ms")
+        if result['max_queries'] > before['max_queries']:
+            regressions.append(f"{name}: queries {before['max_queries']} -> {result['max_queries']}")
+        if result['bytes'] > before['bytes'] * threshold:
+            regressions.append(f"{name}: response size {before['bytes']} -> {result['bytes']} bytes")
+    return regressions
+
+
+class Command(BaseCommand):
+    """Build automation command to benchmark every named route."""
+
+    help = 'Seeds a throwaway database and records latency, query counts and response sizes of every route'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='Number of users seeded')
+        parser.add_argument('--teams', type=int, default=20, help='Number of teams seeded')
+        parser.add_argument('--tasks', type=int, default=5000, help='Number of tasks seeded')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed of the dataset')
+        parser.add_argument('--requests', type=int, default=20, help='Timed requests per route')
+        parser.add_argument('--output', default='benchmark.json', help='Path of the JSON report')
+        parser.add_argument('--compare', help='Path of a previous report to check for regressions')
+        parser.add_argument('--threshold', type=float, default=1.2, help='Slowdown ratio reported as a regression')
+
+    def handle(self, *args, **options):
+        """Run the benchmark against a freshly created test database."""
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            call_command('seed', users=options['users'], teams=options['teams'], tasks=options['tasks'], seed=options['seed'])
+            report = {
+                'dataset': {name: options[name] for name in ('users', 'teams', 'tasks', 'seed')},
+                'requests': options['requests'],
+                'routes': self.run_routes(options['requests']),
+            }
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2)
+        for name, result in report['routes'].items():
+            self.stdout.write(
+                f"{name:<18}{result['status']:>5}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}"
+                f"{result['p99_ms']:>9.1f} ms{result['max_queries']:>5} queries{result['bytes']:>9} bytes"
+            )
+        self.stdout.write(f"Report written to {options['output']}")
+
+        if options['compare']:
+            with open(options['compare']) as previous:
+                regressions = compare_reports(json.load(previous), report, options['threshold'])
+            if regressions:
+                raise CommandError("Performance regressions:\n" + "\n".join(regressions))
+            self.stdout.write("No regressions against " + options['compare'])
+
+    def run_routes(self, requests):
+        user, team, task = self.benchmark_objects()
+        arguments = {
+            'pk': lambda name: task.pk if name.startswith(('task', 'update_task')) else team.pk,
+            'team': lambda name: team.name,
+            'email_hash': lambda name: gravatar_hash(user.email),
+            'size': lambda name: 60,
+        }
+        patterns = [
+            pattern for pattern in urls.urlpatterns
+            if isinstance(pattern, URLPattern) and pattern.name and pattern.name not in STREAMING_ROUTES
+        ]
+        patterns.sort(key=lambda pattern: pattern.name in LAST_ROUTES)
+        results = {}
+        for pattern in patterns:
+            kwargs = {
+                key: arguments[key](pattern.name) for key in pattern.pattern.converters
+            }
+            results[pattern.name] = self.run_route(reverse(pattern.name, kwargs=kwargs), pattern.name, user, requests)
+        return results
+
+    def run_route(self, url, name, user, requests):
+        """Time repeated GET requests to one url, after one warm-up request."""
+
+        client = Client(raise_request_exception=False)
+        latencies, queries = [], []
+        for number in range(requests + 1):
+            if name not in ANONYMOUS_ROUTES:
+                client.force_login(user)
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                response = client.get(url)
+                content = b''.join(response) if response.streaming else response.content
+                elapsed = (time.perf_counter() - start) * 1000
+            if number:
+                latencies.append(elapsed)
+                queries.append(len(context.captured_queries))
+        return {
+            'url': url,
+            'status': response.status_code,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'max_queries': max(queries),
+            'bytes': len(content),
+        }
+
+    def benchmark_objects(self):
+        """Return the busiest team admin with one of their teams and tasks."""
+
+        team = Team.objects.annotate(task_count=Count('tasks')).order_by('-task_count').first()
+        if team is None:
+            raise CommandError("The benchmark needs at least one team")
+        user = User.objects.get(pk=team.admin_id)
+        task = Task.objects.filter(assignee=user).first() or team.tasks.first()
+        if task is None:
+            raise CommandError("The benchmark needs at least one task")
+        return user, team, task
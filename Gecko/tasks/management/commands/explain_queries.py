@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from tasks.models import User, Task, Team
+
+class Command(BaseCommand):
+    """Build automation command to report the query plans of the task views."""
+
+    help = 'Prints the database query plan of every hot Task/Team query used by the views'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', help='User whose dashboards are explained (defaults to the first user)')
+
+    def handle(self, *args, **options):
+        """Explain each view's queries against the current database."""
+
+        user = self.get_user(options.get('username'))
+        team = Team.objects.filter(members=user).first() or Team.objects.first()
+        for label, queryset in self.view_querysets(user, team):
+            self.stdout.write(f"== {label}")
+            self.stdout.write(queryset.explain())
+            self.stdout.write("")
+
+    def get_user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f"User {username} does not exist")
+        user = User.objects.first()
+        if user is None:
+            raise CommandError("The database has no users, run the seed command first")
+        return user
+
+    def view_querysets(self, user, team):
+        """Return the (label, queryset) pairs issued by the dashboard views."""
+
+        tasks = Task.objects.filter(assignee=user)
+        querysets = [
+            ('dashboard: user tasks', tasks),
+            ('dashboard: user teams', Team.objects.filter(members=user)),
+            ('task_dashboard: sort by due date', tasks.order_by('due_date')),
+            ('task_dashboard: sort by priority', tasks.order_by('-priority')),
+            ('task_dashboard: filter by status', tasks.filter(status='assigned').order_by('due_date')),
+            ('task_dashboard: filter by priority', tasks.filter(priority=3)),
+        ]
+        if team is not None:
+            querysets.append(('team_detail: team tasks', Task.objects.filter(team_of_task=team).order_by('due_date')))
+        return querysets
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from tasks.exporter import EXPORT_FORMATS, TASK_COLUMNS, TEAM_COLUMNS, export_rows
+from tasks.forms import TaskFilterForm
+from tasks.models import User, Task, Team
+from tasks.search import get_search_backend
+
+class Command(BaseCommand):
+    """Build automation command to export tasks or teams as CSV or JSON Lines."""
+
+    help = 'Streams every task or team, optionally filtered like the task dashboard, to a CSV or JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=['tasks', 'teams'], help='What to export')
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='csv', help='Output format')
+        parser.add_argument('--output', help='File to write, standard output by default')
+        parser.add_argument('--chunk-size', type=int, help='Rows fetched from the database at a time')
+        parser.add_argument('--search', help='Only export tasks matching this search')
+        for name in TaskFilterForm.base_fields:
+            parser.add_argument(f"--{name.replace('_', '-')}", dest=name, help=f'Only export tasks with this {name}')
+
+    def handle(self, *args, **options):
+        """Export the selected rows."""
+
+        if options['model'] == 'teams':
+            queryset, columns = Team.objects.order_by('pk'), TEAM_COLUMNS
+        else:
+            queryset, columns = self.tasks(options), TASK_COLUMNS
+
+        output = open(options['output'], 'w', newline='') if options['output'] else self.stdout
+        try:
+            for line in export_rows(queryset, columns, options['format'], options['chunk_size']):
+                output.write(line)
+        finally:
+            if options['output']:
+                output.close()
+
+    def tasks(self, options):
+        filters = {name: options[name] for name in TaskFilterForm.base_fields if options[name]}
+        if 'assignee' in filters:
+            assignee = User.objects.filter(username=filters['assignee']).first()
+            if assignee is None:
+                raise CommandError(f"Unknown assignee {filters['assignee']}")
+            filters['assignee'] = assignee.pk
+        form = TaskFilterForm(filters)
+        if not form.is_valid():
+            raise CommandError(f"Invalid filters: {form.errors.as_text()}")
+        tasks = form.filter_queryset(Task.objects.order_by('pk'))
+        if options['search']:
+            tasks = get_search_backend().search(tasks, options['search'])
+        return tasks
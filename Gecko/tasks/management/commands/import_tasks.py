@@ -0,0 +1,35 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from tasks.importer import FORMATS, ImportFileError, TaskImporter, guess_format
+
+class Command(BaseCommand):
+    """Build automation command to import tasks from a CSV or JSON Lines file."""
+
+    help = 'Imports tasks from a CSV or JSON Lines file with title, description, due_date, assignee, team, status and priority columns'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import')
+        parser.add_argument('--format', choices=FORMATS, help='File format, guessed from the extension by default')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows inserted per transaction')
+        parser.add_argument('--errors', help='Write the per-row errors to this JSON Lines file')
+
+    def handle(self, *args, **options):
+        """Import the file and report the rows that were rejected."""
+
+        importer = TaskImporter(batch_size=options['batch_size'])
+        try:
+            with open(options['path'], 'rb') as stream:
+                importer.run(stream, options['format'] or guess_format(options['path']))
+        except OSError as error:
+            raise CommandError(f"Cannot read {options['path']}: {error}")
+        except ImportFileError as error:
+            raise CommandError(f"Stopped reading {options['path']} after importing {importer.imported} tasks: {error}")
+
+        if options['errors']:
+            with open(options['errors'], 'w') as report:
+                for error in importer.errors:
+                    report.write(json.dumps(error) + '\n')
+        else:
+            for error in importer.errors:
+                self.stderr.write(f"Line {error['line']}: {json.dumps(error['errors'])}")
+        self.stdout.write(f"Imported {importer.imported} tasks, rejected {len(importer.errors)} rows.")
@@ -0,0 +1,150 @@
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from tasks.management.commands.benchmark import percentile
+from tasks.models import User
+
+
+async def read_response(reader):
+    """Read one HTTP/1.1 response, returning its status code and body size."""
+
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Connection closed by the server")
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        size = 0
+        while True:
+            chunk_size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(chunk_size + 2)
+            size += chunk_size
+            if not chunk_size:
+                return status, size
+    size = int(headers.get('content-length', 0))
+    await reader.readexactly(size)
+    return status, size
+
+
+class Command(BaseCommand):
+    """Build automation command to load test a running server with many concurrent keep-alive clients."""
+
+    help = 'Holds many concurrent keep-alive connections to a running WSGI or ASGI server and records their latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='Base URL of the running server, such as http://127.0.0.1:8000')
+        parser.add_argument('--path', action='append', help='Page requested by every client, repeatable (default /dashboard/)')
+        parser.add_argument('--user', help='Username the clients log in as, the first user by default')
+        parser.add_argument('--clients', type=int, default=1000, help='Number of concurrent clients')
+        parser.add_argument('--requests', type=int, default=5, help='Requests sent by each client')
+        parser.add_argument('--think', type=float, default=1.0, help='Seconds each client stays idle between requests')
+        parser.add_argument('--timeout', type=float, default=60.0, help='Seconds a client waits for a response')
+        parser.add_argument('--output', help='Path of a JSON report')
+        parser.add_argument('--compare', help='Path of the report of another server to compare against')
+
+    def handle(self, *args, **options):
+        """Run the clients and print a summary of the run."""
+
+        url = urlsplit(options['url'])
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError("Give the server as an http:// URL")
+        paths = options['path'] or ['/dashboard/']
+        session = self.session_cookie(options['user'])
+        report = asyncio.run(self.run_clients(url, paths, session, options))
+
+        self.stdout.write(self.summary(options['url'], report))
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(f"Report written to {options['output']}")
+        if options['compare']:
+            with open(options['compare']) as other:
+                other_report = json.load(other)
+            self.stdout.write(self.summary(other_report['url'], other_report))
+
+    def session_cookie(self, username):
+        """Return the value of a session cookie logged in as the given user."""
+
+        user = User.objects.filter(username=username).first() if username else User.objects.order_by('pk').first()
+        if user is None:
+            raise CommandError(f"Unknown user {username}" if username else "The load test needs at least one user")
+        client = Client()
+        client.force_login(user)
+        return client.cookies[settings.SESSION_COOKIE_NAME].value
+
+    async def run_clients(self, url, paths, session, options):
+        port = url.port or 80
+        latencies, statuses, errors = [], {}, []
+        connected = 0
+        peak = 0
+
+        async def client(number):
+            nonlocal connected, peak
+            try:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(url.hostname, port), options['timeout'])
+            except (OSError, asyncio.TimeoutError) as error:
+                errors.append(f'connect: {error.__class__.__name__}')
+                return
+            connected += 1
+            peak = max(peak, connected)
+            try:
+                for count in range(options['requests']):
+                    path = paths[(number + count) % len(paths)]
+                    request = (
+                        f'GET {path} HTTP/1.1\r\nHost: {url.netloc}\r\n'
+                        f'Cookie: {settings.SESSION_COOKIE_NAME}={session}\r\n'
+                        'Connection: keep-alive\r\n\r\n'
+                    )
+                    start = time.perf_counter()
+                    writer.write(request.encode())
+                    await writer.drain()
+                    status, _ = await asyncio.wait_for(read_response(reader), options['timeout'])
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    statuses[status] = statuses.get(status, 0) + 1
+                    await asyncio.sleep(options['think'])
+            except (OSError, ValueError, IndexError, ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError) as error:
+                errors.append(f'request: {error.__class__.__name__}')
+            finally:
+                connected -= 1
+                writer.close()
+
+        start = time.perf_counter()
+        await asyncio.gather(*[client(number) for number in range(options['clients'])])
+        elapsed = time.perf_counter() - start
+        return {
+            'url': f'{url.scheme}://{url.netloc}',
+            'paths': paths,
+            'clients': options['clients'],
+            'requests_per_client': options['requests'],
+            'think_s': options['think'],
+            'elapsed_s': elapsed,
+            'completed': len(latencies),
+            'throughput_rps': len(latencies) / elapsed if elapsed else 0.0,
+            'peak_connections': peak,
+            'statuses': {str(status): count for status, count in sorted(statuses.items())},
+            'errors': {error: errors.count(error) for error in sorted(set(errors))},
+            'p50_ms': percentile(latencies, 50) if latencies else None,
+            'p95_ms': percentile(latencies, 95) if latencies else None,
+            'p99_ms': percentile(latencies, 99) if latencies else None,
+        }
+
+    def summary(self, name, report):
+        latency = (
+            f"{report['p50_ms']:.1f}/{report['p95_ms']:.1f}/{report['p99_ms']:.1f} ms"
+            if report['completed'] else 'no responses'
+        )
+        return (
+            f"{name}: {report['completed']} responses from {report['clients']} clients in {report['elapsed_s']:.1f}s "
+            f"({report['throughput_rps']:.1f} req/s), {report['peak_connections']} peak connections, "
+            f"p50/p95/p99 {latency}, statuses {report['statuses']}, errors {report['errors'] or 'none'}"
+        )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from tasks.counters import rebuild_counters
+from tasks.models import User, Task, Team
+
+class Command(BaseCommand):
+    """Build automation command to recount the task counters of users and teams."""
+
+    help = 'Recomputes the per-status task counters of every user and team from the task table'
+
+    def handle(self, *args, **options):
+        """Rebuild the task counters."""
+
+        with transaction.atomic():
+            rebuild_counters(Task, User, Team)
+        self.stdout.write("Task counters rebuilt.")
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from tasks.search import get_search_backend
+
+class Command(BaseCommand):
+    """Build automation command to rebuild the task search index."""
+
+    help = 'Rebuilds the full-text search index from the task table'
+
+    def handle(self, *args, **options):
+        """Rebuild the search index of the configured backend."""
+
+        get_search_backend().rebuild()
+        self.stdout.write("Search index rebuilt.")
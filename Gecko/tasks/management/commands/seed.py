@@ -1,6 +1,10 @@
+from django.contrib.auth.hashers import make_password
 from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 
-from tasks.models import User, Task, Team
+from tasks.models import User, Task, Team, Membership
+from tasks.counters import rebuild_counters
+from tasks.search import get_search_backend
 
 import pytz
 from faker import Faker
@@ -8,6 +12,7 @@ from random import randint, random
 from datetime import timedelta
 from django.utils import timezone
 import random
+import re
 
 user_fixtures = [
     {'username': '@johndoe', 'email': 'john.doe@example.org', 'first_name': 'John', 'last_name': 'Doe'},
@@ -35,17 +40,45 @@ class Command(BaseCommand):
     TASK_COUNT = 10
     TEAM_COUNT = 10
     MAX_TEAM_MEMBERS = 8
-    MAX_TASKS_PER_TEAM = 10
     MAX_TEAMS_PER_USER = 10
     DEFAULT_PASSWORD = 'Password123'
     help = 'Seeds the database with sample data'
     task_status_options= ['assigned', 'in progress', 'completed']
     task_priority_options= [1, 2, 3]
 
-    def __init__(self):
+    SCALE_USERS = 100
+    SCALE_TEAMS = 10
+    SCALE_TASKS = 1000
+    MAX_INVITES_PER_USER = 3
+    BATCH_SIZE = 5000
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
         self.faker = Faker('en_GB')
-    
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, help=f'Bulk seed {self.SCALE_USERS} users, {self.SCALE_TEAMS} teams and {self.SCALE_TASKS} tasks per unit of scale')
+        parser.add_argument('--users', type=int, help='Number of users to bulk seed')
+        parser.add_argument('--teams', type=int, help='Number of teams to bulk seed')
+        parser.add_argument('--tasks', type=int, help='Number of tasks to bulk seed')
+        parser.add_argument('--seed', type=int, help='Random seed making the generated data reproducible')
+        parser.add_argument('--batch-size', type=int, default=self.BATCH_SIZE, help='Rows inserted per bulk_create batch')
+
     def handle(self, *args, **options):
+        if options.get('seed') is not None:
+            random.seed(options['seed'])
+            self.faker.seed_instance(options['seed'])
+        scale = options.get('scale')
+        counts = [options.get(name) for name in ('users', 'teams', 'tasks')]
+        if scale is not None or any(count is not None for count in counts):
+            scale = scale or 0
+            self.seed_bulk(
+                counts[0] if counts[0] is not None else scale * self.SCALE_USERS,
+                counts[1] if counts[1] is not None else scale * self.SCALE_TEAMS,
+                counts[2] if counts[2] is not None else scale * self.SCALE_TASKS,
+                options['batch_size'],
+            )
+            return
         self.create_users()
         self.users = User.objects.all()
         self.create_teams()
@@ -71,7 +104,9 @@ class Command(BaseCommand):
     
     def generate_task_fixtures(self):
         for data in task_fixtures:
-            self.try_create_task(data)
+            assignee = User.objects.filter(username=data['assignee']).first()
+            if assignee is not None:
+                self.try_create_task({**data, 'assignee': assignee, 'team_of_task': assignee.teams.order_by('?').first()})
     
     def generate_team_fixtures(self):
         for data in team_fixtures:
@@ -115,8 +150,9 @@ class Command(BaseCommand):
         due_date = timezone.now() + timezone.timedelta(days= random.randint(1,365))
         status = random.choice(self.task_status_options)
         priority= random.choice(self.task_priority_options)
+        team_of_task= assignee.teams.order_by('?').first()
         self.try_create_task({
-            'title': title, 'description': description, 'assignee': assignee, 'due_date': due_date, 'status': status, 'priority': priority })
+            'title': title, 'description': description, 'assignee': assignee, 'due_date': due_date, 'status': status, 'priority': priority, 'team_of_task': team_of_task })
           
     def generate_team(self):
         name = self.faker.unique.word()
@@ -162,8 +198,8 @@ class Command(BaseCommand):
             due_date=data['due_date'],
             status=data['status'], 
             priority=data['priority'],
+            team_of_task=data.get('team_of_task'),
         )
-        team.tasks.add(task)
     
     
     def create_team(self, data):
@@ -174,20 +210,14 @@ class Command(BaseCommand):
                 description=data['description'],
                 admin=admin_user,
             )
-        team.members.add(admin_user)
+        team.members.add(admin_user, through_defaults={'role': Membership.ADMIN})
         self.add_team_members(team, admin_user)
-        self.add_tasks_for_teams(team)
         
     def add_team_members(self, team, admin_user):
         non_admin_users= User.objects.exclude(id=admin_user.id)
         for user in non_admin_users[:self.MAX_TEAM_MEMBERS - 1]:
             team.members.add(user)
         
-    def add_tasks_for_teams(self, team):
-        tasks= Task.objects.all()[:self.MAX_TASKS_PER_TEAM]
-        for task in tasks:
-            team.tasks.add(task)
-    
     def add_teams_invites_to_users(self, user):
         teams_objects= Team.objects.all()
         for _ in range(random.randint(0, self.MAX_TEAMS_PER_USER)):
@@ -209,8 +239,117 @@ class Command(BaseCommand):
         return title
     
 
+    def seed_bulk(self, user_count, team_count, task_count, batch_size):
+        """Seed large volumes of data with batched inserts inside a single transaction."""
+
+        if team_count and not user_count:
+            raise CommandError("Teams need at least one user to be their admin")
+        if task_count and not team_count:
+            raise CommandError("Tasks need at least one team to belong to")
+        self.batch_size = batch_size
+        self.today = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        with transaction.atomic():
+            user_ids = self.bulk_create_users(user_count)
+            team_members = self.bulk_create_teams(team_count, user_ids)
+            self.bulk_create_invites(user_ids, list(team_members))
+            self.bulk_create_tasks(task_count, team_members)
+            get_search_backend().rebuild()
+            rebuild_counters(Task, User, Team)
+        print("Bulk seeding complete.      ")
+
+    def bulk_insert(self, model, rows, label, total):
+        """Insert the rows produced by a generator in batches, returning the created objects' ids."""
+
+        ids = []
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                ids += [obj.pk for obj in model.objects.bulk_create(batch)]
+                batch = []
+                print(f"Seeding {label} {len(ids)}/{total}", end='\r')
+        if batch:
+            ids += [obj.pk for obj in model.objects.bulk_create(batch)]
+        return ids
+
+    def bulk_create_users(self, count):
+        password = make_password(Command.DEFAULT_PASSWORD)
+        offset = User.objects.count()
+
+        def rows():
+            for number in range(offset, offset + count):
+                first_name = self.faker.first_name()
+                last_name = self.faker.last_name()
+                yield User(
+                    username=create_username(first_name, last_name)[:22] + str(number),
+                    email=f'{number}.' + create_email(first_name, last_name),
+                    password=password,
+                    first_name=first_name,
+                    last_name=last_name,
+                )
+        return self.bulk_insert(User, rows(), 'user', count)
+
+    def bulk_create_teams(self, count, user_ids):
+        """Create teams with random members, returning a mapping of team id to member ids."""
+
+        offset = Team.objects.count()
+        admins = [random.choice(user_ids) for _ in range(count)]
+
+        def rows():
+            for number, admin_id in enumerate(admins, start=offset):
+                yield Team(
+                    name=f'{self.faker.word()} team {number}',
+                    description=self.faker.sentence(),
+                    admin_id=admin_id,
+                )
+        team_ids = self.bulk_insert(Team, rows(), 'team', count)
+
+        team_members = {}
+        for team_id, admin_id in zip(team_ids, admins):
+            members = set(random.sample(user_ids, min(len(user_ids), random.randint(0, self.MAX_TEAM_MEMBERS - 1))))
+            members.discard(admin_id)
+            team_members[team_id] = [admin_id] + sorted(members)
+
+        def memberships():
+            for team_id, member_ids in team_members.items():
+                for user_id in member_ids:
+                    role = Membership.ADMIN if user_id == member_ids[0] else Membership.MEMBER
+                    yield Membership(user_id=user_id, team_id=team_id, role=role)
+        self.bulk_insert(Membership, memberships(), 'membership', sum(map(len, team_members.values())))
+        return team_members
+
+    def bulk_create_invites(self, user_ids, team_ids):
+        if not team_ids:
+            return
+        Invite = User.invites.through
+
+        def rows():
+            for user_id in user_ids:
+                for team_id in set(random.choices(team_ids, k=random.randint(0, self.MAX_INVITES_PER_USER))):
+                    yield Invite(user_id=user_id, team_id=team_id)
+        self.bulk_insert(Invite, rows(), 'invite', len(user_ids))
+
+    def bulk_create_tasks(self, count, team_members):
+        team_ids = list(team_members)
+        offset = Task.objects.count()
+
+        def rows():
+            for number in range(offset, offset + count):
+                team_id = random.choice(team_ids)
+                yield Task(
+                    title=f'{self.faker.sentence(nb_words=4)[:-1][:40]} {number}',
+                    description=self.faker.sentence(nb_words=12),
+                    assignee_id=random.choice(team_members[team_id]),
+                    team_of_task_id=team_id,
+                    due_date=self.today + timedelta(days=random.randint(1, 365)),
+                    status=random.choice(self.task_status_options),
+                    priority=random.choice(self.task_priority_options),
+                )
+        self.bulk_insert(Task, rows(), 'task', count)
+
+
 def create_username(first_name, last_name):
-    return '@' + first_name.lower() + last_name.lower()
+    return '@' + re.sub(r'\W', '', first_name.lower() + last_name.lower())
 
 def create_email(first_name, last_name):
     return first_name + '.' + last_name + '@example.org'
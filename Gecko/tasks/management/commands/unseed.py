@@ -1,14 +1,56 @@
+from django.apps import apps
 from django.core.management.base import BaseCommand, CommandError
-from tasks.models import User, Task, Team
+from django.db import connection, transaction
+from tasks.models import User, Task, Team, Membership, SavedView
+from tasks.counters import rebuild_counters
+from tasks.search import get_search_backend
 
 class Command(BaseCommand):
     """Build automation command to unseed the database."""
-    
-    help = 'Seeds the database with sample data'
+
+    help = 'Removes all seeded data with bulk deletes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-staff', dest='keep_staff', action='store_true', default=True, help='Keep staff users (default)')
+        parser.add_argument('--no-keep-staff', dest='keep_staff', action='store_false', help='Delete staff users as well')
 
     def handle(self, *args, **options):
         """Unseed the database."""
 
-        User.objects.filter(is_staff=False).delete()
-        Task.objects.all().delete()
-        Team.objects.all().delete()
\ No newline at end of file
+        user_table = User._meta.db_table
+        if options['keep_staff']:
+            users = f'SELECT id FROM {user_table} WHERE NOT is_staff'
+        else:
+            users = f'SELECT id FROM {user_table}'
+        with transaction.atomic():
+            self.delete_all(Task)
+            self.delete_all(User.invites.through)
+            self.delete_all(Membership)
+            self.delete_all(Team)
+            for model, column in self.user_references():
+                self.delete_where(model, f'{column} IN ({users})')
+            self.delete_where(User, f'id IN ({users})')
+            SavedView.objects.update(task_ids=None)
+            get_search_backend().rebuild()
+            rebuild_counters(Task, User, Team)
+        print("Unseeding complete.")
+
+    def user_references(self):
+        """Return the (model, column) pairs of the remaining tables that reference users."""
+
+        references = [
+            (User.groups.through, 'user_id'),
+            (User.user_permissions.through, 'user_id'),
+            (SavedView, 'user_id'),
+        ]
+        if apps.is_installed('django.contrib.admin'):
+            references.append((apps.get_model('admin', 'LogEntry'), 'user_id'))
+        return references
+
+    def delete_all(self, model):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)}')
+
+    def delete_where(self, model, condition):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)} WHERE {condition}')
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from tasks.metrics import clear_metrics, load_metrics
+
+class Command(BaseCommand):
+    """Build automation command to report per-view request metrics."""
+
+    help = 'Prints latency, database time and query count percentiles for every view'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duplicates', type=int, default=3, help='Number of duplicated queries listed per view')
+        parser.add_argument('--reset', action='store_true', help='Delete the recorded metrics')
+
+    def handle(self, *args, **options):
+        """Print the merged metrics of every process."""
+
+        if options['reset']:
+            clear_metrics()
+            self.stdout.write("Request metrics cleared.")
+            return
+        views = load_metrics()
+        if not views:
+            self.stdout.write("No request metrics recorded yet.")
+            return
+        self.stdout.write(
+            f"{'view':<24}{'requests':>9}"
+            f"{'wall p50/p95/p99 ms':>24}{'db p50/p95/p99 ms':>24}{'queries p50/p95/p99':>22}"
+        )
+        for view_name, stats in sorted(views.items(), key=lambda item: -item[1].requests()):
+            self.stdout.write(
+                f"{view_name:<24}{stats.requests():>9}"
+                f"{self.percentiles(stats.wall, '.1f'):>24}{self.percentiles(stats.db, '.1f'):>24}"
+                f"{self.percentiles(stats.queries, 'd'):>22}"
+            )
+            for sql, count in stats.duplicates.most_common(options['duplicates']):
+                self.stdout.write(f"    {count} duplicate runs: {sql[:120]}")
+
+    def percentiles(self, histogram, spec):
+        return '/'.join(format(histogram.percentile(percent), spec) for percent in (50, 95, 99))
@@ -0,0 +1,179 @@
+"""Per-view request timing and query statistics."""
+import json
+import math
+import os
+import threading
+from collections import Counter
+from pathlib import Path
+from django.conf import settings
+
+BUCKET_BASE = 1.1
+MIN_MILLISECONDS = 0.01
+
+
+class Histogram:
+    """Histogram with logarithmic buckets, accurate to about 10% at any scale."""
+
+    def __init__(self, exact=False, buckets=None):
+        self.exact = exact
+        self.buckets = Counter(buckets or {})
+
+    def bucket(self, value):
+        if self.exact:
+            return int(value)
+        return math.ceil(math.log(max(value, MIN_MILLISECONDS), BUCKET_BASE))
+
+    def bucket_value(self, bucket):
+        if self.exact:
+            return bucket
+        return BUCKET_BASE ** bucket
+
+    def add(self, value):
+        self.buckets[self.bucket(value)] += 1
+
+    def count(self):
+        return sum(self.buckets.values())
+
+    def percentile(self, percent):
+        """Return the upper bound of the bucket holding the given percentile, or None if empty."""
+
+        total = self.count()
+        if not total:
+            return None
+        rank = math.ceil(total * percent / 100)
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return self.bucket_value(bucket)
+
+    def merge(self, other):
+        self.buckets.update(other.buckets)
+
+    def to_dict(self):
+        return {str(bucket): count for bucket, count in self.buckets.items()}
+
+    @classmethod
+    def from_dict(cls, data, exact=False):
+        return cls(exact, {int(bucket): count for bucket, count in data.items()})
+
+
+class ViewStats:
+    """Timing histograms and duplicate query counts of one view."""
+
+    def __init__(self):
+        self.wall = Histogram()
+        self.db = Histogram()
+        self.queries = Histogram(exact=True)
+        self.duplicates = Counter()
+
+    def add(self, wall_ms, db_ms, queries, duplicates):
+        self.wall.add(wall_ms)
+        self.db.add(db_ms)
+        self.queries.add(queries)
+        self.duplicates.update(duplicates)
+        self.trim_duplicates()
+
+    def trim_duplicates(self):
+        """Keep only the REQUEST_METRICS_MAX_STATEMENTS most duplicated statements."""
+
+        if len(self.duplicates) > settings.REQUEST_METRICS_MAX_STATEMENTS:
+            self.duplicates = Counter(dict(self.duplicates.most_common(settings.REQUEST_METRICS_MAX_STATEMENTS)))
+
+    def requests(self):
+        return self.wall.count()
+
+    def merge(self, other):
+        self.wall.merge(other.wall)
+        self.db.merge(other.db)
+        self.queries.merge(other.queries)
+        self.duplicates.update(other.duplicates)
+
+    def to_dict(self):
+        return {
+            'wall': self.wall.to_dict(),
+            'db': self.db.to_dict(),
+            'queries': self.queries.to_dict(),
+            'duplicates': dict(self.duplicates),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.wall = Histogram.from_dict(data['wall'])
+        stats.db = Histogram.from_dict(data['db'])
+        stats.queries = Histogram.from_dict(data['queries'], exact=True)
+        stats.duplicates = Counter(data['duplicates'])
+        return stats
+
+
+class MetricsRecorder:
+    """Collect view statistics in memory and periodically write them to a per-process file.
+
+    Every process owns one file in REQUEST_METRICS_DIR holding its cumulative statistics,
+    so the view_metrics command can merge the files of all workers.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+        self.unflushed = 0
+
+    def record(self, view_name, wall_ms, db_ms, queries, duplicates):
+        with self.lock:
+            self.views.setdefault(view_name, ViewStats()).add(wall_ms, db_ms, queries, duplicates)
+            self.unflushed += 1
+            flush = self.unflushed >= settings.REQUEST_METRICS_FLUSH_EVERY
+        if flush:
+            self.flush()
+
+    def flush(self):
+        """Write the statistics of this process to its metrics file."""
+
+        directory = metrics_directory()
+        if directory is None:
+            return
+        with self.lock:
+            data = {view_name: stats.to_dict() for view_name, stats in self.views.items()}
+            self.unflushed = 0
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f'metrics-{os.getpid()}.json'
+        temporary = path.with_suffix('.tmp')
+        temporary.write_text(json.dumps(data))
+        os.replace(temporary, path)
+
+    def reset(self):
+        with self.lock:
+            self.views = {}
+            self.unflushed = 0
+
+
+def metrics_directory():
+    directory = settings.REQUEST_METRICS_DIR
+    return Path(directory) if directory else None
+
+
+def load_metrics():
+    """Return the view statistics of every process merged by view name."""
+
+    views = {}
+    directory = metrics_directory()
+    if directory is None or not directory.exists():
+        return views
+    for path in sorted(directory.glob('metrics-*.json')):
+        for view_name, data in json.loads(path.read_text()).items():
+            views.setdefault(view_name, ViewStats()).merge(ViewStats.from_dict(data))
+    return views
+
+
+def clear_metrics():
+    """Delete the metrics files of every process."""
+
+    recorder.reset()
+    directory = metrics_directory()
+    if directory is not None and directory.exists():
+        for path in directory.glob('metrics-*.json'):
+            path.unlink()
+
+
+recorder = MetricsRecorder()
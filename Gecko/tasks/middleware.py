@@ -0,0 +1,89 @@
+"""Middleware for the tasks app."""
+import time
+from collections import Counter
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+from tasks.metrics import recorder
+
+
+class QueryCollector:
+    """Database execute wrapper counting and timing the queries of one request.
+
+    Only the first REQUEST_METRICS_MAX_STATEMENTS distinct statements are told apart,
+    so a request running many different statements cannot grow the counter without bound.
+    """
+
+    def __init__(self):
+        self.duration = 0.0
+        self.queries = 0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.queries += 1
+            if sql in self.statements or len(self.statements) < settings.REQUEST_METRICS_MAX_STATEMENTS:
+                self.statements[sql] += 1
+
+    def count(self):
+        return self.queries
+
+    def duplicates(self):
+        """Return the statements run more than once, with the number of extra runs."""
+
+        return {sql: count - 1 for sql, count in self.statements.items() if count > 1}
+
+
+class QueryTimingMiddleware:
+    """Record the wall time, database time and queries of every request per view.
+
+    The figures are sent back in a Server-Timing header and aggregated into
+    histograms that the view_metrics command reports on. Under ASGI the middleware
+    stays async, so async views are not pushed onto a thread by it.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        collector = QueryCollector()
+        start = time.perf_counter()
+        with connection.execute_wrapper(collector):
+            response = self.get_response(request)
+        return self.record(request, response, collector, start)
+
+    async def __acall__(self, request):
+        """Time an async request, counting the queries its sync ORM calls run on the request's thread."""
+
+        collector = QueryCollector()
+        start = time.perf_counter()
+        await sync_to_async(lambda: connection.execute_wrappers.append(collector))()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(lambda: connection.execute_wrappers.remove(collector))()
+        return self.record(request, response, collector, start)
+
+    def record(self, request, response, collector, start):
+        wall_ms = (time.perf_counter() - start) * 1000
+        db_ms = collector.duration * 1000
+
+        resolver_match = getattr(request, 'resolver_match', None)
+        view_name = resolver_match.view_name if resolver_match else 'unresolved'
+        recorder.record(view_name, wall_ms, db_ms, collector.count(), collector.duplicates())
+        response['Server-Timing'] = (
+            f'total;dur={wall_ms:.1f}, '
+            f'db;dur={db_ms:.1f};desc="{collector.count()} queries"'
+        )
+        return response
@@ -0,0 +1,76 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def reconcile_memberships(apps, schema_editor):
+    """Merge the User.teams and Team.members join tables into Membership rows."""
+
+    Team = apps.get_model('tasks', 'Team')
+    User = apps.get_model('tasks', 'User')
+    Membership = apps.get_model('tasks', 'Membership')
+    pairs = set(Team.members.through.objects.values_list('user_id', 'team_id'))
+    pairs |= set(User.teams.through.objects.values_list('user_id', 'team_id'))
+    admins = dict(Team.objects.values_list('id', 'admin_id'))
+    Membership.objects.bulk_create([
+        Membership(user_id=user_id, team_id=team_id, role='admin' if admins.get(team_id) == user_id else 'member')
+        for user_id, team_id in sorted(pairs)
+    ], batch_size=1000)
+
+
+def split_memberships(apps, schema_editor):
+    """Copy Membership rows back into both legacy join tables."""
+
+    Team = apps.get_model('tasks', 'Team')
+    Membership = apps.get_model('tasks', 'Membership')
+    pairs = list(Membership.objects.values_list('user_id', 'team_id'))
+    Team.members.through.objects.bulk_create([
+        Team.members.through(user_id=user_id, team_id=team_id) for user_id, team_id in pairs
+    ], batch_size=1000)
+    User = apps.get_model('tasks', 'User')
+    User.teams.through.objects.bulk_create([
+        User.teams.through(user_id=user_id, team_id=team_id) for user_id, team_id in pairs
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_task_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Membership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('admin', 'Admin'), ('member', 'Member')], default='member', max_length=10)),
+                ('joined_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='tasks.team')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='membership',
+            constraint=models.UniqueConstraint(fields=('user', 'team'), name='membership_user_team_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='membership',
+            index=models.Index(fields=['team', 'user'], name='membership_team_user_idx'),
+        ),
+        migrations.RunPython(reconcile_memberships, split_memberships),
+        migrations.RemoveField(
+            model_name='user',
+            name='teams',
+        ),
+        migrations.RemoveField(
+            model_name='team',
+            name='members',
+        ),
+        migrations.AddField(
+            model_name='team',
+            name='members',
+            field=models.ManyToManyField(related_name='teams', through='tasks.Membership', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,44 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_team_of_task(apps, schema_editor):
+    """Set team_of_task from the Team.tasks join table for tasks that have no team yet."""
+
+    Task = apps.get_model('tasks', 'Task')
+    Team = apps.get_model('tasks', 'Team')
+    team_tasks = Team.tasks.through.objects.filter(task_id=models.OuterRef('pk')).order_by('team_id')
+    Task.objects.filter(team_of_task__isnull=True).update(
+        team_of_task=models.Subquery(team_tasks.values('team_id')[:1])
+    )
+
+
+def restore_team_tasks(apps, schema_editor):
+    """Copy team_of_task back into the Team.tasks join table."""
+
+    Task = apps.get_model('tasks', 'Task')
+    Team = apps.get_model('tasks', 'Team')
+    Team.tasks.through.objects.bulk_create([
+        Team.tasks.through(team_id=team_id, task_id=task_id)
+        for task_id, team_id in Task.objects.filter(team_of_task__isnull=False).values_list('id', 'team_of_task_id')
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_membership'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_team_of_task, restore_team_tasks),
+        migrations.RemoveField(
+            model_name='team',
+            name='tasks',
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='team_of_task',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tasks', to='tasks.team'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:03
+
+from django.db import migrations, models
+from tasks.counters import rebuild_counters
+
+
+def count_existing_tasks(apps, schema_editor):
+    """Fill the new counters from the existing tasks."""
+
+    rebuild_counters(apps.get_model('tasks', 'Task'), apps.get_model('tasks', 'User'), apps.get_model('tasks', 'Team'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='team',
+            name='assigned_task_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='team',
+            name='completed_task_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='team',
+            name='in_progress_task_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='assigned_task_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='completed_task_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='in_progress_task_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_existing_tasks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0008_saved_view'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='team',
+            name='assigned_task_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='team',
+            name='completed_task_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='team',
+            name='in_progress_task_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='assigned_task_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='completed_task_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='in_progress_task_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+import tasks.search
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0009_task_counters_not_editable'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskSearchEntry',
+            fields=[
+                ('task', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='tasks.task')),
+                ('title', models.CharField(max_length=50)),
+                ('description', models.CharField(max_length=400)),
+                ('index', tasks.search.FullTextIndexField(db_column='tasks_task_fts')),
+            ],
+            options={
+                'db_table': 'tasks_task_fts',
+                'managed': False,
+            },
+        ),
+    ]
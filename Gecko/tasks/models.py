@@ -1,12 +1,44 @@
 from typing import Any
 from django.core.validators import RegexValidator
 from django.contrib.auth.models import AbstractUser, Group
-from django.db import models
-from libgravatar import Gravatar
+from django.db import models, transaction
 from django.utils import timezone
 from django.core.exceptions import ValidationError
+from tasks.avatars import avatar_url
+from tasks.search import FullTextIndexField
 
-class User(AbstractUser):
+class TaskCounters(models.Model):
+    """Number of tasks in each status, maintained by the task signals and the rebuild_counters command."""
+
+    COUNTER_FIELDS = ['assigned_task_count', 'in_progress_task_count', 'completed_task_count']
+
+    assigned_task_count = models.PositiveIntegerField(default=0, editable=False)
+    in_progress_task_count = models.PositiveIntegerField(default=0, editable=False)
+    completed_task_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        """Model options."""
+
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        """Save the row without its counters, so values loaded earlier never overwrite newer increments."""
+
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    def open_task_count(self):
+        return self.assigned_task_count + self.in_progress_task_count
+
+    def task_count(self):
+        return self.open_task_count() + self.completed_task_count
+
+
+class User(AbstractUser, TaskCounters):
     """Model used for user authentication, and team member related information."""
 
     username = models.CharField(
@@ -20,7 +52,6 @@ class User(AbstractUser):
     first_name = models.CharField(max_length=50, blank=False)
     last_name = models.CharField(max_length=50, blank=False)
     email = models.EmailField(unique=True, blank=False)
-    teams = models.ManyToManyField('Team', related_name='teams', blank=True )
     invites = models.ManyToManyField('Team', related_name='invites', blank=True )
 
     class Meta:
@@ -33,12 +64,23 @@ class User(AbstractUser):
 
         return f'{self.first_name} {self.last_name}'
 
+    def __init__(self, *args: Any, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._saved_email = self.__dict__.get('email')
+        self._gravatar_urls = {}
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        if self.email != self._saved_email:
+            self._saved_email = self.email
+            self._gravatar_urls = {}
+
     def gravatar(self, size=120):
-        """Return a URL to the user's gravatar."""
+        """Return a URL to the user's gravatar, memoized until the email is changed and saved."""
 
-        gravatar_object = Gravatar(self.email)
-        gravatar_url = gravatar_object.get_image(size=size, default='mp')
-        return gravatar_url
+        if size not in self._gravatar_urls:
+            self._gravatar_urls[size] = avatar_url(self.email, size)
+        return self._gravatar_urls[size]
 
     def mini_gravatar(self):
         """Return a URL to a miniature version of the user's gravatar."""
@@ -70,7 +112,7 @@ class Task(models.Model):
         "Team",
         on_delete=models.CASCADE,
         null= True,
-        related_name='team_of_task'
+        related_name='tasks'
         )
     
     STATUS_CHOICES = [
@@ -86,17 +128,69 @@ class Task(models.Model):
         (3, 'High'),
     ]
     priority = models.IntegerField(choices=PRIORITY_CHOICES, default=2)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """Model options."""
+
+        indexes = [
+            models.Index(fields=['assignee', 'status', 'due_date'], name='task_assignee_status_due_idx'),
+            models.Index(fields=['assignee', 'priority'], name='task_assignee_priority_idx'),
+            models.Index(fields=['assignee', 'due_date'], name='task_assignee_due_idx'),
+            models.Index(fields=['team_of_task', 'due_date'], name='task_team_due_idx'),
+        ]
 
     def __init__(self, *args: Any, **kwargs):
         super().__init__(*args, **kwargs)
         self.existing_task= False
+        self._remember_saved_state()
+
+    def _remember_saved_state(self):
+        """Remember the fields the signal handlers compare against to find what a save changed."""
+
+        self._saved_assignee_id = self.__dict__.get('assignee_id')
+        self._saved_team_id = self.__dict__.get('team_of_task_id')
+        self._saved_status = self.__dict__.get('status')
+        self._saved_text = (self.__dict__.get('title'), self.__dict__.get('description'))
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._remember_saved_state()
+
+    def save(self, *args, **kwargs):
+        """Save the task, updating the counters of its assignee and team in the same transaction."""
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+        self._remember_saved_state()
     
     def clean(self):
         super().clean()
         if not self.existing_task and self.due_date is not None and self.due_date < timezone.now():
             raise ValidationError("Due date cannot be in the past")
 
-class Team(models.Model):
+class TaskSearchEntry(models.Model):
+    """Row of the SQLite full-text index of a task, written by the search backend rather than the ORM."""
+
+    task = models.OneToOneField(
+        Task,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_entry',
+    )
+    title = models.CharField(max_length=50)
+    description = models.CharField(max_length=400)
+    index = FullTextIndexField(db_column='tasks_task_fts')
+
+    class Meta:
+        """Model options."""
+
+        managed = False
+        db_table = 'tasks_task_fts'
+
+
+class Team(TaskCounters):
     """Teams can be created by a user"""
     name = models.CharField(max_length=50, blank=False, unique=True)
     description = models.CharField(max_length=500, blank=True)
@@ -105,14 +199,18 @@ class Team(models.Model):
             on_delete=models.CASCADE,
             blank = False
         )
-    members = models.ManyToManyField(User, related_name='members',blank = False)
-    tasks = models.ManyToManyField(Task, related_name='tasks',blank = True)
+    members = models.ManyToManyField(User, through='Membership', related_name='teams', blank = False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def get_members(self):
         return ",".join([str(m) for m in self.members.all()]) 
    
     def set_admin(self,user):
         self.admin = user
+        self.memberships.update(role=models.Case(
+            models.When(user=user, then=models.Value(Membership.ADMIN)),
+            default=models.Value(Membership.MEMBER),
+        ))
         
     def clean(self):
         super().clean()
@@ -121,6 +219,57 @@ class Team(models.Model):
         return self.name
 
     def get_tasks(self):
-        return ",".join([str(m) for m in self.tasks.all()]) 
-     
+        return ",".join([str(m) for m in self.tasks.all()])
+
+
+class Membership(models.Model):
+    """A user's membership of a team, backing both User.teams and Team.members."""
+
+    ADMIN = 'admin'
+    MEMBER = 'member'
+    ROLE_CHOICES = [
+        (ADMIN, 'Admin'),
+        (MEMBER, 'Member'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='memberships')
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='memberships')
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES, default=MEMBER)
+    joined_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        """Model options."""
 
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'team'], name='membership_user_team_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['team', 'user'], name='membership_team_user_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user} in {self.team}'
+
+
+class SavedView(models.Model):
+    """A named task dashboard query of a user, with the ids of the tasks it matches materialized.
+
+    task_ids is kept up to date by the task signals and set to None when a bulk change
+    makes it stale, in which case it is rebuilt the next time the view is opened.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='saved_views')
+    name = models.CharField(max_length=50, blank=False)
+    query = models.CharField(max_length=1000, blank=True)
+    task_ids = models.JSONField(null=True, blank=True)
+
+    class Meta:
+        """Model options."""
+
+        ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'name'], name='saved_view_user_name_unique'),
+        ]
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,161 @@
+"""Keyset (cursor) pagination for task listings."""
+import base64
+import datetime
+import json
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(values):
+    """Encode the ordering values of a row into an opaque URL-safe cursor."""
+
+    data = json.dumps(values, default=_encode_value, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor made by encode_cursor, raising ValueError if it is malformed."""
+
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (TypeError, ValueError) as error:
+        raise ValueError(f"Invalid cursor {cursor!r}") from error
+    if not isinstance(values, list):
+        raise ValueError(f"Invalid cursor {cursor!r}")
+    return values
+
+
+class KeysetPage:
+    """One page of rows, with cursors pointing at its neighbours."""
+
+    def __init__(self, object_list, next_cursor, previous_cursor, query):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.query = query
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def next_query(self):
+        """Return the query string of the next page."""
+
+        return self._query_with('after', self.next_cursor)
+
+    def previous_query(self):
+        """Return the query string of the previous page."""
+
+        return self._query_with('before', self.previous_cursor)
+
+    def _query_with(self, key, cursor):
+        query = self.query.copy()
+        query.pop('after', None)
+        query.pop('before', None)
+        query[key] = cursor
+        return query.urlencode()
+
+
+class KeysetPaginator:
+    """Paginate a queryset by seeking past the ordering values of the last row seen.
+
+    Every page is a single range query on the ordering columns, so deep pages cost
+    the same as the first one when the ordering is backed by an index.
+    """
+
+    def __init__(self, queryset, ordering=None, per_page=None):
+        self.queryset = queryset
+        self.per_page = per_page or settings.TASKS_PER_PAGE
+        ordering = ordering or queryset.query.order_by
+        self.keys = [(key.lstrip('-'), key.startswith('-')) for key in ordering]
+        if 'pk' not in [name for name, _ in self.keys]:
+            self.keys.append(('pk', self.keys[0][1] if self.keys else False))
+
+    def page(self, request):
+        """Return the page selected by the after/before cursor of the request."""
+
+        values, reverse = self._position(request)
+        rows = list(self._seek(values, reverse)[:self.per_page + 1])
+        return self._page(rows, values, reverse, request)
+
+    async def apage(self, request):
+        """Return the page selected by the after/before cursor of the request, fetching it with the async ORM."""
+
+        values, reverse = self._position(request)
+        rows = [row async for row in self._seek(values, reverse)[:self.per_page + 1]]
+        return self._page(rows, values, reverse, request)
+
+    def _position(self, request):
+        """Return the ordering values of the request's cursor, and whether it pages backwards."""
+
+        after = request.GET.get('after')
+        before = request.GET.get('before')
+        try:
+            if after:
+                return self._check_cursor(decode_cursor(after)), False
+            if before:
+                return self._check_cursor(decode_cursor(before)), True
+        except (ValueError, ValidationError):
+            pass
+        return None, False
+
+    def _check_cursor(self, values):
+        if len(values) != len(self.keys):
+            raise ValueError("Cursor does not match the ordering")
+        return [self._to_python(name, value) for (name, _), value in zip(self.keys, values)]
+
+    def _page(self, rows, values, reverse, request):
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse:
+            rows = rows[::-1]
+            next_cursor = self._cursor(rows[-1]) if rows else None
+            previous_cursor = self._cursor(rows[0]) if more else None
+        else:
+            next_cursor = self._cursor(rows[-1]) if more else None
+            previous_cursor = self._cursor(rows[0]) if values is not None and rows else None
+        return KeysetPage(rows, next_cursor, previous_cursor, request.GET)
+
+    def _seek(self, values, reverse):
+        """Return the rows strictly after (or before) the given ordering values."""
+
+        queryset = self.queryset.order_by(*[
+            ('-' if descending != reverse else '') + name for name, descending in self.keys
+        ])
+        if values is None:
+            return queryset
+        condition = Q()
+        for index, (name, descending) in enumerate(self.keys):
+            lookup = 'lt' if descending != reverse else 'gt'
+            step = Q(**{f'{name}__{lookup}': values[index]})
+            for previous, (previous_name, _) in enumerate(self.keys[:index]):
+                step &= Q(**{previous_name: values[previous]})
+            condition |= step
+        return queryset.filter(condition)
+
+    def _to_python(self, name, value):
+        model = self.queryset.model
+        try:
+            field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return value
+        return field.to_python(value)
+
+    def _cursor(self, row):
+        return encode_cursor([getattr(row, name) for name, _ in self.keys])
@@ -0,0 +1,106 @@
+"""Saved task dashboard queries whose matching task ids are materialized and kept up to date."""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import QueryDict
+from tasks.caching import invalidate_users
+from tasks.forms import TaskFilterForm
+from tasks.models import SavedView, Task
+from tasks.search import get_search_backend
+
+TASK_ORDERINGS = ['title', 'status', 'due_date', 'priority', '-priority']
+PAGE_PARAMETERS = ['after', 'before', 'view']
+
+
+def query_tasks(tasks, params, form, relative=True):
+    """Return the tasks matching the search, filters and sorting of a task dashboard query."""
+
+    tasks = tasks.order_by('due_date')
+
+    search_task = params.get('search_input')
+    if search_task:
+        tasks = get_search_backend().search(tasks, search_task)
+
+    if form.is_valid():
+        tasks = form.filter_queryset(tasks, relative=relative)
+        sort_by = params.get('sort_by', None if search_task else 'due_date')
+        if sort_by in TASK_ORDERINGS:
+            tasks = tasks.order_by(sort_by)
+    return tasks
+
+
+def saved_query(params):
+    """Return the query string of a task dashboard query, without its page and view parameters."""
+
+    params = params.copy()
+    for name in PAGE_PARAMETERS:
+        params.pop(name, None)
+    return params.urlencode()
+
+
+def view_params(view):
+    return QueryDict(view.query)
+
+
+def view_matches(view, tasks):
+    """Return the tasks of the view's user matching its query, leaving out any relative due window.
+
+    The relative window moves with time, so it is applied when the view is opened instead
+    of being baked into the materialized ids.
+    """
+
+    params = view_params(view)
+    tasks = tasks.filter(assignee_id=view.user_id)
+    return query_tasks(tasks, params, TaskFilterForm(params or None), relative=False)
+
+
+def materialize(view):
+    """Store the ids of every task matching the view."""
+
+    view.task_ids = sorted(view_matches(view, Task.objects.all()).order_by().values_list('pk', flat=True))
+    SavedView.objects.filter(pk=view.pk).update(task_ids=view.task_ids)
+
+
+def saved_view_tasks(view):
+    """Return the view's tasks, fetched by their materialized ids and sorted as the view asks."""
+
+    if view.task_ids is None:
+        materialize(view)
+    params = view_params(view)
+    tasks = Task.objects.filter(pk__in=view.task_ids, assignee_id=view.user_id)
+    return query_tasks(tasks, params, TaskFilterForm(params or None))
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def refresh_saved_views(sender, instance, **kwargs):
+    """Add a saved or deleted task to, or remove it from, the materialized views of its assignees.
+
+    Only the one task is checked against each view, so the cost of a change does not
+    depend on how many tasks the views match.
+    """
+
+    deleted = kwargs['signal'] is post_delete
+    user_ids = {instance.assignee_id, instance._saved_assignee_id}
+    views = SavedView.objects.select_for_update().filter(user_id__in=user_ids, task_ids__isnull=False)
+    for view in views:
+        matches = (
+            not deleted
+            and view.user_id == instance.assignee_id
+            and view_matches(view, Task.objects.filter(pk=instance.pk)).exists()
+        )
+        if matches == (instance.pk in view.task_ids):
+            continue
+        task_ids = set(view.task_ids)
+        if matches:
+            task_ids.add(instance.pk)
+        else:
+            task_ids.discard(instance.pk)
+        SavedView.objects.filter(pk=view.pk).update(task_ids=sorted(task_ids))
+
+
+@receiver(post_save, sender=SavedView)
+@receiver(post_delete, sender=SavedView)
+def invalidate_view_owner(sender, instance, **kwargs):
+    """Expire the cached pages listing the user's saved views."""
+
+    invalidate_users([instance.user_id])
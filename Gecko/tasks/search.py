@@ -0,0 +1,161 @@
+"""Full-text search backends for tasks."""
+import re
+from django.conf import settings
+from django.db import connection, models
+from django.db.models import F, FloatField, Func, Lookup, Q, TextField, Value
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+from django.utils.safestring import mark_safe
+
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+
+
+def search_terms(query):
+    """Split a raw search string into the words it is made of."""
+
+    return re.findall(r'\w+', query)
+
+
+def highlight(snippet):
+    """Return an escaped snippet with the matched terms wrapped in <mark> tags."""
+
+    if not snippet:
+        return ''
+    html = escape(snippet)
+    html = html.replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_END, '</mark>')
+    return mark_safe(html)
+
+
+class FullTextIndexField(models.TextField):
+    """Hidden column of an SQLite FTS5 table, named after the table, that full-text queries go through."""
+
+
+@FullTextIndexField.register_lookup
+class Match(Lookup):
+    """FTS5 MATCH of a full-text query against the index."""
+
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+
+class BasicSearchBackend:
+    """Search backend using plain substring matching, available on every database."""
+
+    def search(self, tasks, query):
+        """Return the tasks matching every word of the query."""
+
+        terms = search_terms(query)
+        if not terms:
+            return tasks.none()
+        for term in terms:
+            tasks = tasks.filter(Q(title__icontains=term) | Q(description__icontains=term))
+        return tasks.annotate(search_rank=Value(0.0), search_snippet=F('description'))
+
+    def index_task(self, task):
+        """Add or refresh a task in the search index."""
+
+    def index_tasks(self, tasks):
+        """Add many tasks, written in bulk without signals, to the search index."""
+
+    def remove_task(self, task):
+        """Remove a task from the search index."""
+
+    def rebuild(self):
+        """Rebuild the search index from the task table."""
+
+
+class SQLiteSearchBackend(BasicSearchBackend):
+    """Search backend using an SQLite FTS5 virtual table kept in sync by signals."""
+
+    table = 'tasks_task_fts'
+
+    def match_expression(self, query):
+        """Turn a raw search string into an FTS5 prefix query."""
+
+        return ' '.join(f'"{term}"*' for term in search_terms(query))
+
+    def search(self, tasks, query):
+        """Return the matching tasks ranked by bm25, best match first.
+
+        The index is joined once, so the rank and snippet come from the same row as the match.
+        """
+
+        match = self.match_expression(query)
+        if not match:
+            return tasks.none()
+        index = F('search_entry__index')
+        return tasks.filter(search_entry__index__match=match).annotate(
+            search_rank=Func(index, Value(10.0), Value(1.0), function='bm25', output_field=FloatField()),
+            search_snippet=Func(
+                index, Value(-1), Value(HIGHLIGHT_START), Value(HIGHLIGHT_END), Value('...'), Value(16),
+                function='snippet', output_field=TextField()
+            ),
+        ).order_by('search_rank')
+
+    def index_task(self, task):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [task.pk])
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, title, description) VALUES (%s, %s, %s)',
+                [task.pk, task.title, task.description]
+            )
+
+    def index_tasks(self, tasks):
+        rows = [(task.pk, task.title, task.description) for task in tasks]
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {self.table} WHERE rowid = %s', [row[:1] for row in rows])
+            cursor.executemany(f'INSERT INTO {self.table} (rowid, title, description) VALUES (%s, %s, %s)', rows)
+
+    def remove_task(self, task):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [task.pk])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, title, description) '
+                f'SELECT id, title, description FROM tasks_task'
+            )
+
+
+class PostgresSearchBackend(BasicSearchBackend):
+    """Search backend using a tsvector expression backed by a GIN index."""
+
+    config = 'english'
+
+    def search(self, tasks, query):
+        """Return the matching tasks ranked by ts_rank, best match first."""
+
+        from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector
+
+        terms = search_terms(query)
+        if not terms:
+            return tasks.none()
+        search_query = SearchQuery(' & '.join(f'{term}:*' for term in terms), search_type='raw', config=self.config)
+        vector = SearchVector('title', 'description', config=self.config)
+        return tasks.annotate(search_vector=vector).filter(search_vector=search_query).annotate(
+            search_rank=SearchRank(vector, search_query),
+            search_snippet=SearchHeadline(
+                'description', search_query, config=self.config,
+                start_sel=HIGHLIGHT_START, stop_sel=HIGHLIGHT_END
+            ),
+        ).order_by('-search_rank')
+
+
+def get_search_backend():
+    """Return the search backend configured for the default database."""
+
+    backend_path = getattr(settings, 'TASK_SEARCH_BACKEND', None)
+    if backend_path:
+        return import_string(backend_path)()
+    if connection.vendor == 'sqlite':
+        return SQLiteSearchBackend()
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    return BasicSearchBackend()
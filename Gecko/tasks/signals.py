@@ -0,0 +1,148 @@
+"""Signal handlers keeping derived task data in sync with the models."""
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from tasks.caching import invalidate_teams, invalidate_users
+from tasks.counters import count_task
+from tasks.events import publish_task_event
+from tasks.models import Membership, SavedView, Task, Team, User
+from tasks.search import get_search_backend
+
+
+@receiver(post_save, sender=Task)
+def index_task(sender, instance, created, **kwargs):
+    """Add a created task, or an edited one whose text changed, to the search index."""
+
+    if created or (instance.title, instance.description) != instance._saved_text:
+        get_search_backend().index_task(instance)
+
+
+@receiver(post_delete, sender=Task)
+def unindex_task(sender, instance, **kwargs):
+    """Remove a deleted task from the search index."""
+
+    get_search_backend().remove_task(instance)
+
+
+def touch_teams(team_ids):
+    """Mark teams as updated once the current transaction commits, so the conditional GETs of their pages stop validating."""
+
+    team_ids = {team_id for team_id in team_ids if team_id is not None}
+    if team_ids:
+        transaction.on_commit(lambda: Team.objects.filter(pk__in=team_ids).update(updated_at=timezone.now()))
+
+
+def expire_saved_views(user_ids):
+    """Drop the materialized task ids of users' saved views, so they are rebuilt the next time they are opened."""
+
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if user_ids:
+        SavedView.objects.filter(user_id__in=user_ids).update(task_ids=None)
+
+
+@receiver(post_save, sender=Task)
+def count_saved_task(sender, instance, created, **kwargs):
+    """Move a created, reassigned or progressed task between the counters of its assignee and team."""
+
+    current = (instance.assignee_id, instance.team_of_task_id, instance.status)
+    saved = (instance._saved_assignee_id, instance._saved_team_id, instance._saved_status)
+    if not created and current == saved:
+        return
+    if not created:
+        count_task(User, Team, *saved, -1)
+    count_task(User, Team, *current, 1)
+
+
+@receiver(pre_delete, sender=Task)
+def read_deleted_task(sender, instance, **kwargs):
+    """Take the assignee, team and status a deletion undoes from the task's row, which a stale instance may not match."""
+
+    row = Task.objects.select_for_update().filter(pk=instance.pk).values_list(
+        'assignee_id', 'team_of_task_id', 'status'
+    ).first()
+    if row is not None:
+        instance._saved_assignee_id, instance._saved_team_id, instance._saved_status = row
+
+
+@receiver(post_delete, sender=Task)
+def count_deleted_task(sender, instance, **kwargs):
+    """Remove a deleted task from the counters of its assignee and team."""
+
+    count_task(User, Team, instance._saved_assignee_id, instance._saved_team_id, instance._saved_status, -1)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_task_assignees(sender, instance, **kwargs):
+    """Expire the cached dashboards and team pages showing a task, before and after the change."""
+
+    invalidate_users([instance.assignee_id, instance._saved_assignee_id])
+    touch_teams([instance.team_of_task_id, instance._saved_team_id])
+
+
+@receiver(post_save, sender=Task)
+def push_saved_task(sender, instance, **kwargs):
+    """Push a created or edited task to the event streams of its old and new team."""
+
+    publish_task_event(instance)
+
+
+@receiver(post_delete, sender=Task)
+def push_deleted_task(sender, instance, **kwargs):
+    """Push the removal of a deleted task to the event stream of its team."""
+
+    publish_task_event(instance, deleted=True)
+
+
+@receiver(post_save, sender=Team)
+def invalidate_team_members(sender, instance, created, **kwargs):
+    """Expire the cached dashboards showing an edited team."""
+
+    members = [] if created else instance.memberships.values_list('user_id', flat=True)
+    invalidate_users([instance.admin_id, *members])
+
+
+@receiver(post_save, sender=Membership)
+@receiver(post_delete, sender=Membership)
+def invalidate_member(sender, instance, **kwargs):
+    """Expire the cached dashboard of a user joining or leaving a team, the team page and its member choices."""
+
+    invalidate_users([instance.user_id])
+    invalidate_teams([instance.team_id])
+    touch_teams([instance.team_id])
+
+
+@receiver(m2m_changed, sender=Team.members.through)
+def invalidate_changed_members(sender, instance, action, reverse, pk_set, **kwargs):
+    """Expire the cached dashboards, team pages and member choices of users added to or removed from teams in bulk."""
+
+    if action == 'pre_clear':
+        related = instance.teams if reverse else instance.members
+        instance._cleared_pks = list(related.values_list('pk', flat=True))
+        return
+    if action == 'post_clear':
+        pk_set = instance._cleared_pks
+    elif action not in ('post_add', 'post_remove'):
+        return
+    if reverse:
+        invalidate_users([instance.pk])
+        invalidate_teams(pk_set)
+        touch_teams(pk_set)
+    else:
+        invalidate_users(pk_set)
+        invalidate_teams([instance.pk])
+        touch_teams([instance.pk])
+
+
+@receiver(post_save, sender=User)
+def invalidate_team_admin(sender, instance, created, update_fields, **kwargs):
+    """Expire the cached dashboards naming an edited user as team admin, their team pages and member choices."""
+
+    if created or update_fields == frozenset(['last_login']):
+        return
+    members = Membership.objects.filter(team__admin=instance).values_list('user_id', flat=True)
+    team_ids = list(instance.memberships.values_list('team_id', flat=True))
+    invalidate_users([instance.pk, *members])
+    invalidate_teams(team_ids)
+    touch_teams(team_ids)
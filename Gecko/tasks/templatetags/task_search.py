@@ -0,0 +1,10 @@
+from django import template
+from tasks.search import highlight
+
+register = template.Library()
+
+@register.filter(name='highlight')
+def highlight_filter(snippet):
+    """Render a search snippet with its matched terms highlighted."""
+
+    return highlight(snippet)
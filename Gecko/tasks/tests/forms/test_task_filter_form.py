@@ -0,0 +1,94 @@
+"""Unit tests of the task filter form."""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.test import TestCase
+from django.urls import reverse
+from tasks.forms import TaskFilterForm
+from tasks.models import User, Task, Team
+
+
+class TaskFilterFormTestCase(TestCase):
+    """Unit tests of the task filter form."""
+
+    fixtures = ['tasks/tests/fixtures/default_user.json', 'tasks/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        # A Wednesday, so this week runs from Monday 12th to Sunday 18th.
+        self.now = datetime(2030, 6, 12, 9, 30, tzinfo=dt_timezone.utc)
+        self.user = User.objects.get(username='@johndoe')
+        self.team = Team.objects.create(name='Gecko', admin=self.user)
+        self.team.members.add(self.user)
+        for title, due_date, status in [
+            ('Late', self.now - timedelta(days=1), 'assigned'),
+            ('Late but done', self.now - timedelta(days=1), 'completed'),
+            ('This morning', self.now - timedelta(hours=1), 'in progress'),
+            ('Tonight', self.now.replace(hour=23, minute=59), 'assigned'),
+            ('Sunday', datetime(2030, 6, 16, 12, tzinfo=dt_timezone.utc), 'assigned'),
+            ('Next week', datetime(2030, 6, 18, 12, tzinfo=dt_timezone.utc), 'assigned'),
+            ('Next month', self.now + timedelta(days=25), 'assigned'),
+        ]:
+            Task.objects.create(
+                title=title, assignee=self.user, team_of_task=self.team, due_date=due_date, status=status,
+            )
+
+    def _titles(self, data):
+        form = TaskFilterForm(data, now=self.now)
+        self.assertTrue(form.is_valid())
+        return set(form.filter_queryset(Task.objects.all()).values_list('title', flat=True))
+
+    def test_overdue_excludes_completed_tasks(self):
+        self.assertEqual(self._titles({'due_window': 'overdue'}), {'Late', 'This morning'})
+
+    def test_today_covers_the_whole_day(self):
+        self.assertEqual(self._titles({'due_window': 'today'}), {'This morning', 'Tonight'})
+
+    def test_this_week_runs_from_monday_to_sunday(self):
+        self.assertEqual(
+            self._titles({'due_window': 'this_week'}),
+            {'Late', 'Late but done', 'This morning', 'Tonight', 'Sunday'},
+        )
+
+    def test_next_7_days_starts_now(self):
+        self.assertEqual(self._titles({'due_window': 'next_7_days'}), {'Tonight', 'Sunday', 'Next week'})
+
+    def test_next_30_days(self):
+        self.assertEqual(
+            self._titles({'due_window': 'next_30_days'}), {'Tonight', 'Sunday', 'Next week', 'Next month'}
+        )
+
+    def test_bare_end_date_covers_that_whole_day(self):
+        self.assertEqual(
+            self._titles({'due_date_start': '2030-06-12', 'due_date_end': '2030-06-12'}),
+            {'This morning', 'Tonight'},
+        )
+
+    def test_end_datetime_is_inclusive(self):
+        self.assertEqual(
+            self._titles({'due_date_start': '2030-06-12 00:00', 'due_date_end': '2030-06-12 23:59'}),
+            {'This morning', 'Tonight'},
+        )
+
+    def test_window_narrows_explicit_range(self):
+        self.assertEqual(
+            self._titles({'due_date_start': '2030-06-12', 'due_window': 'this_week'}),
+            {'This morning', 'Tonight', 'Sunday'},
+        )
+
+    def test_end_before_start_is_invalid(self):
+        form = TaskFilterForm({'due_date_start': '2030-06-12', 'due_date_end': '2030-06-11'}, now=self.now)
+        self.assertFalse(form.is_valid())
+        self.assertIn('due_date_end', form.errors)
+
+    def test_unknown_window_is_invalid(self):
+        form = TaskFilterForm({'due_window': 'someday'}, now=self.now)
+        self.assertFalse(form.is_valid())
+
+    def test_window_uses_the_due_date_index(self):
+        form = TaskFilterForm({'due_window': 'next_7_days'}, now=self.now)
+        self.assertTrue(form.is_valid())
+        plan = form.filter_queryset(Task.objects.filter(assignee=self.user)).explain()
+        self.assertIn('task_assignee_due_idx', plan)
+
+    def test_task_dashboard_keeps_the_window_in_the_url(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('task_dashboard'), {'due_window': 'overdue'})
+        self.assertContains(response, '<option value="overdue" selected>', html=False)
@@ -1,3 +1,5 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from with_asserts.mixin import AssertHTMLMixin
 
@@ -34,4 +36,25 @@ class MenuTesterMixin(AssertHTMLMixin):
         """Check that no menu is present."""
         
         for url in self.menu_urls:
-            self.assertNotHTML(response, f'a[href="{url}"]')
\ No newline at end of file
+            self.assertNotHTML(response, f'a[href="{url}"]')
+
+
+class QueryCountTesterMixin:
+    """Class to extend tests with a budget on the number of queries a view may run."""
+
+    def count_queries(self, url):
+        """Return the number of queries run when fetching the given url."""
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def assert_query_budget(self, url, budget, grow):
+        """Check that the view stays within budget and runs no more queries after grow() adds rows."""
+
+        before = self.count_queries(url)
+        grow()
+        after = self.count_queries(url)
+        self.assertLessEqual(after, budget, f"{url} ran {after} queries, budget is {budget}")
+        self.assertEqual(before, after, f"{url} query count grew from {before} to {after} with more rows")
@@ -0,0 +1,41 @@
+from tasks.models import Membership, Team, User
+from django.db import IntegrityError
+from django.test import TestCase
+
+class MembershipTest(TestCase):
+    """Unit tests for the membership model."""
+
+    fixtures = ['tasks/tests/fixtures/default_user.json', 'tasks/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        self.admin = User.objects.get(username='@johndoe')
+        self.member = User.objects.get(username='@janedoe')
+        self.team = Team.objects.create(name='Gecko', admin=self.admin)
+        self.team.members.add(self.admin, through_defaults={'role': Membership.ADMIN})
+
+    def test_user_teams_and_team_members_share_one_table(self):
+        self.member.teams.add(self.team)
+        self.assertIn(self.member, self.team.members.all())
+        self.assertEqual(Membership.objects.filter(team=self.team).count(), 2)
+
+    def test_removing_from_either_side_removes_membership(self):
+        self.team.members.add(self.member)
+        self.member.teams.remove(self.team)
+        self.assertNotIn(self.member, self.team.members.all())
+        self.assertFalse(Membership.objects.filter(user=self.member).exists())
+
+    def test_default_role_is_member(self):
+        self.team.members.add(self.member)
+        membership = Membership.objects.get(user=self.member, team=self.team)
+        self.assertEqual(membership.role, Membership.MEMBER)
+        self.assertIsNotNone(membership.joined_at)
+
+    def test_set_admin_updates_roles(self):
+        self.team.members.add(self.member)
+        self.team.set_admin(self.member)
+        roles = dict(self.team.memberships.values_list('user__username', 'role'))
+        self.assertEqual(roles, {'@johndoe': Membership.MEMBER, '@janedoe': Membership.ADMIN})
+
+    def test_user_cannot_join_team_twice(self):
+        with self.assertRaises(IntegrityError):
+            Membership.objects.create(user=self.admin, team=self.team)
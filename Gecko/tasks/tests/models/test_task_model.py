@@ -104,6 +104,14 @@ class TaskTest(TestCase):
         self.task.team_of_task= self.team
         self._assert_task_is_valid(self.task)
 
+    def test_assignee_status_queries_use_composite_index(self):
+        plan= Task.objects.filter(assignee= self.user, status= 'assigned').order_by('due_date').explain()
+        self.assertIn('task_assignee_status_due_idx', plan)
+
+    def test_team_task_queries_use_composite_index(self):
+        plan= Task.objects.filter(team_of_task= self.team).order_by('due_date').explain()
+        self.assertIn('task_team_due_idx', plan)
+
     def _assert_task_is_valid(self, task):
         try:
             task.full_clean()
@@ -109,3 +109,15 @@ class TeamTest(TestCase):
         expected_tasks = ",".join([str(task) for task in [task1, task2]])
         self.assertEqual(self.team.get_tasks(), expected_tasks)
 
+    def test_tasks_are_the_tasks_whose_team_of_task_is_the_team(self):
+        task = Task.objects.create(title='Task 1',
+            assignee= self.user_1,
+            team_of_task= self.team,
+            due_date=timezone.now() + timezone.timedelta(days= 3))
+        self.assertEqual(list(self.team.tasks.all()), [task])
+        other_team = Team.objects.create(name='Other', admin=self.user_admin)
+        other_team.tasks.add(task)
+        task.refresh_from_db()
+        self.assertEqual(task.team_of_task, other_team)
+        self.assertFalse(self.team.tasks.exists())
+
@@ -1,6 +1,8 @@
 """Unit tests for the User model."""
 from django.core.exceptions import ValidationError
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from unittest.mock import patch
 from tasks.models import User, Team
 
 class UserModelTestCase(TestCase):
@@ -143,6 +145,23 @@ class UserModelTestCase(TestCase):
         expected_gravatar_url = self._gravatar_url(size=60)
         self.assertEqual(actual_gravatar_url, expected_gravatar_url)
 
+    def test_gravatar_is_memoized(self):
+        self.user.gravatar()
+        with patch('tasks.models.avatar_url') as avatar_url:
+            self.user.gravatar()
+        avatar_url.assert_not_called()
+
+    def test_gravatar_follows_saved_email_change(self):
+        self.user.gravatar()
+        self.user.email = 'john.doe@example.org'
+        self.user.save()
+        self.assertNotEqual(self.user.gravatar(), self._gravatar_url(size=120))
+
+    @override_settings(AVATAR_PROXY=True)
+    def test_gravatar_uses_avatar_proxy_when_enabled(self):
+        expected_url = reverse('avatar', kwargs={'email_hash': UserModelTestCase.GRAVATAR_URL.split('/')[-1], 'size': 120})
+        self.assertEqual(self.user.gravatar(), expected_url)
+
     def _gravatar_url(self, size):
         gravatar_url = f"{UserModelTestCase.GRAVATAR_URL}?size={size}&default=mp"
         return gravatar_url
@@ -0,0 +1,69 @@
+"""Tests of the admin changelists."""
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from tasks.models import User, Task, Team
+
+
+class AdminChangelistTestCase(TestCase):
+    """Tests of the admin changelists."""
+
+    def setUp(self):
+        self.superuser = User.objects.create_superuser('@admin', email='admin@example.org', password='Password123')
+        self.client.force_login(self.superuser)
+
+    def _create_teams(self, count, start=0):
+        for number in range(start, start + count):
+            user = User.objects.create_user(f'@user{number}', email=f'user{number}@example.org')
+            team = Team.objects.create(name=f'Team {number}', admin=user)
+            team.members.add(user)
+            team.invites.add(self.superuser)
+            Task.objects.create(
+                title=f'Task {number}',
+                assignee=user,
+                team_of_task=team,
+                due_date=timezone.now() + timezone.timedelta(days=1),
+            )
+
+    def _count_changelist_queries(self, model_name):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse(f'admin:tasks_{model_name}_changelist'))
+        self.assertEqual(response.status_code, 200)
+        return response, len(context.captured_queries)
+
+    def _assert_constant_queries(self, model_name):
+        self._create_teams(2)
+        _, few = self._count_changelist_queries(model_name)
+        self._create_teams(10, start=2)
+        response, many = self._count_changelist_queries(model_name)
+        self.assertEqual(few, many)
+        return response
+
+    def test_user_changelist_queries_do_not_grow_with_rows(self):
+        response = self._assert_constant_queries('user')
+        self.assertContains(response, 'Team 11')
+
+    def test_team_changelist_queries_do_not_grow_with_rows(self):
+        response = self._assert_constant_queries('team')
+        self.assertContains(response, '@user11')
+
+    def test_task_changelist_queries_do_not_grow_with_rows(self):
+        response = self._assert_constant_queries('task')
+        self.assertContains(response, 'Task 11')
+
+    def test_user_autocomplete_searches_usernames(self):
+        self._create_teams(2)
+        response = self.client.get(reverse('admin:autocomplete'), {
+            'app_label': 'tasks', 'model_name': 'task', 'field_name': 'assignee', 'term': 'user1',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['text'] for result in response.json()['results']], ['@user1'])
+
+    def test_team_change_page_lists_memberships(self):
+        self._create_teams(1)
+        team = Team.objects.get(name='Team 0')
+        response = self.client.get(reverse('admin:tasks_team_change', args=[team.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'memberships-0-user')
@@ -0,0 +1,252 @@
+"""Tests of the JSON API."""
+import json
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from tasks.models import User, Task, Team
+
+
+class ApiTestCase(TestCase):
+    """Tests of the JSON API."""
+
+    fixtures = ['tasks/tests/fixtures/default_user.json', 'tasks/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.other_user = User.objects.get(username='@janedoe')
+        self.outsider = User.objects.get(username='@petrapickles')
+        self.client.force_login(self.user)
+        self.team = Team.objects.create(name='Gecko', admin=self.user)
+        self.team.members.add(self.user, self.other_user)
+        self.other_team = Team.objects.create(name='Iguana', admin=self.outsider)
+        self.other_team.members.add(self.outsider)
+        self.task = self._create_task('Write report', self.user, self.team, days=1)
+        self._create_task('Review report', self.other_user, self.team, days=2, status='completed')
+        self._create_task('Hidden report', self.outsider, self.other_team, days=3)
+
+    def _create_task(self, title, assignee, team, days, **fields):
+        return Task.objects.create(
+            title=title,
+            assignee=assignee,
+            team_of_task=team,
+            due_date=timezone.now() + timezone.timedelta(days=days),
+            **fields
+        )
+
+    def _send(self, method, url, data):
+        return getattr(self.client, method)(url, json.dumps(data), content_type='application/json')
+
+    def test_anonymous_request_is_unauthorized(self):
+        self.client.logout()
+        response = self.client.get(reverse('api_task_list'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_list_tasks_of_own_teams(self):
+        response = self.client.get(reverse('api_task_list'))
+        self.assertEqual(response.status_code, 200)
+        titles = [task['title'] for task in response.json()['results']]
+        self.assertEqual(titles, ['Write report', 'Review report'])
+
+    def test_sparse_fieldset(self):
+        response = self.client.get(reverse('api_task_list'), {'fields': 'title,due_date'})
+        self.assertEqual(set(response.json()['results'][0]), {'id', 'title', 'due_date'})
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get(reverse('api_task_list'), {'fields': 'title,password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fields', response.json()['errors'])
+
+    def test_filters_mirror_task_filter_form(self):
+        response = self.client.get(reverse('api_task_list'), {'status': 'completed'})
+        self.assertEqual([task['title'] for task in response.json()['results']], ['Review report'])
+        response = self.client.get(reverse('api_task_list'), {'assignee': self.user.pk, 'title': 'write'})
+        self.assertEqual([task['title'] for task in response.json()['results']], ['Write report'])
+
+    def test_filter_by_team(self):
+        response = self.client.get(reverse('api_task_list'), {'team': self.team.pk, 'fields': 'title'})
+        self.assertEqual(len(response.json()['results']), 2)
+        response = self.client.get(reverse('api_task_list'), {'team': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('team', response.json()['errors'])
+
+    @override_settings(TASKS_PER_PAGE=1)
+    def test_cursor_pagination(self):
+        first = self.client.get(reverse('api_task_list'), {'fields': 'title'}).json()
+        self.assertEqual([task['title'] for task in first['results']], ['Write report'])
+        second = self.client.get(first['next']).json()
+        self.assertEqual([task['title'] for task in second['results']], ['Review report'])
+        self.assertIsNone(second['next'])
+        self.assertIn('fields=title', second['previous'])
+
+    def test_create_task(self):
+        response = self._send('post', reverse('api_task_list'), {
+            'title': 'Send report',
+            'assignee': self.other_user.pk,
+            'team': self.team.pk,
+            'due_date': (timezone.now() + timezone.timedelta(days=4)).isoformat(),
+            'status': 'assigned',
+            'priority': 3,
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['assignee'], {'id': self.other_user.pk, 'username': '@janedoe'})
+        self.assertTrue(Task.objects.filter(title='Send report', team_of_task=self.team).exists())
+
+    def test_create_task_validates_with_task_form_rules(self):
+        response = self._send('post', reverse('api_task_list'), {
+            'title': 'Send report',
+            'assignee': self.outsider.pk,
+            'team': self.team.pk,
+            'due_date': (timezone.now() - timezone.timedelta(days=1)).isoformat(),
+            'status': 'assigned',
+            'priority': 3,
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()['errors']), {'assignee', 'due_date'})
+
+    def test_create_task_in_foreign_team_is_rejected(self):
+        response = self._send('post', reverse('api_task_list'), {'title': 'Sneaky', 'team': self.other_team.pk})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('team', response.json()['errors'])
+
+    def test_patch_task(self):
+        Task.objects.filter(pk=self.task.pk).update(due_date=timezone.now() - timezone.timedelta(days=1))
+        url = reverse('api_task_detail', kwargs={'pk': self.task.pk})
+        response = self._send('patch', url, {'status': 'in progress'})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, 'in progress')
+        self.assertEqual(self.task.title, 'Write report')
+
+    def test_hidden_task_is_not_found(self):
+        hidden = Task.objects.get(title='Hidden report')
+        response = self.client.get(reverse('api_task_detail', kwargs={'pk': hidden.pk}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_delete_task(self):
+        response = self.client.delete(reverse('api_task_detail', kwargs={'pk': self.task.pk}))
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Task.objects.filter(pk=self.task.pk).exists())
+
+    def test_list_teams_with_members(self):
+        response = self.client.get(reverse('api_team_list'), {'fields': 'name,members,task_counts'})
+        team = response.json()['results'][0]
+        self.assertEqual(team['name'], 'Gecko')
+        self.assertEqual({member['username'] for member in team['members']}, {'@johndoe', '@janedoe'})
+        self.assertEqual(team['task_counts'], {'assigned': 1, 'in_progress': 0, 'completed': 1})
+        self.assertEqual(len(response.json()['results']), 1)
+
+    def test_patch_team_requires_admin(self):
+        url = reverse('api_team_detail', kwargs={'pk': self.team.pk})
+        response = self._send('patch', url, {'description': 'Reptiles'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Team.objects.get(pk=self.team.pk).description, 'Reptiles')
+        self.client.force_login(self.other_user)
+        response = self._send('patch', url, {'description': 'Mammals'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_patch_team_rejects_values_that_are_not_strings(self):
+        response = self._send('patch', reverse('api_team_detail', kwargs={'pk': self.team.pk}), {'name': ['a']})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('name', response.json()['errors'])
+        self.assertEqual(Team.objects.get(pk=self.team.pk).name, 'Gecko')
+
+    def test_invite_rejects_ids_that_are_not_integers(self):
+        response = self._send('post', reverse('api_team_invites', kwargs={'pk': self.team.pk}), {'users': ['abc']})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('users', response.json()['errors'])
+
+    def test_invite_and_accept(self):
+        response = self._send('post', reverse('api_team_invites', kwargs={'pk': self.team.pk}), {'users': [self.outsider.pk]})
+        self.assertEqual(response.json()['results'], [{'id': self.outsider.pk, 'username': '@petrapickles'}])
+        self.client.force_login(self.outsider)
+        invites = self.client.get(reverse('api_invite_list')).json()['results']
+        self.assertEqual([team['name'] for team in invites], ['Gecko'])
+        url = reverse('api_invite_response', kwargs={'pk': self.team.pk, 'action': 'accept'})
+        self.assertEqual(self.client.post(url).status_code, 200)
+        self.assertIn(self.outsider, self.team.members.all())
+        self.assertFalse(self.outsider.invites.exists())
+
+    def test_wrong_method_is_not_allowed(self):
+        response = self.client.put(reverse('api_task_list'))
+        self.assertEqual(response.status_code, 405)
+
+
+class BulkUpdateApiTestCase(TestCase):
+    """Tests of the bulk task update endpoint."""
+
+    fixtures = ['tasks/tests/fixtures/default_user.json', 'tasks/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.other_user = User.objects.get(username='@janedoe')
+        self.outsider = User.objects.get(username='@petrapickles')
+        self.client.force_login(self.user)
+        self.team = Team.objects.create(name='Gecko', admin=self.user)
+        self.team.members.add(self.user, self.other_user)
+        self.other_team = Team.objects.create(name='Iguana', admin=self.user)
+        self.other_team.members.add(self.user)
+        self.tasks = [
+            Task.objects.create(
+                title=f'Task {number}',
+                assignee=self.user,
+                team_of_task=self.team if number < 3 else self.other_team,
+                due_date=timezone.now() + timezone.timedelta(days=1),
+            )
+            for number in range(4)
+        ]
+        self.url = reverse('api_task_bulk_update')
+
+    def _post(self, ids, changes):
+        return self.client.post(self.url, json.dumps({'ids': ids, 'changes': changes}), content_type='application/json')
+
+    def test_bulk_status_change(self):
+        response = self._post([task.pk for task in self.tasks], {'status': 'completed', 'priority': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['updated'], 4)
+        self.assertEqual(Task.objects.filter(status='completed', priority=3).count(), 4)
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.assigned_task_count, self.user.completed_task_count), (0, 4))
+
+    def test_bulk_update_queries_do_not_grow_with_tasks(self):
+        counts = []
+        for tasks in (self.tasks[:1], self.tasks[1:3]):
+            with CaptureQueriesContext(connection) as context:
+                self._post([task.pk for task in tasks], {'status': 'in progress'})
+            counts.append(len(context.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_assignee_must_belong_to_each_task_team(self):
+        response = self._post([task.pk for task in self.tasks], {'assignee': self.other_user.pk})
+        results = response.json()['results']
+        self.assertEqual(response.json()['updated'], 3)
+        self.assertIn('assignee', results[3]['errors'])
+        self.assertEqual(Task.objects.get(pk=self.tasks[3].pk).assignee, self.user)
+        self.other_user.refresh_from_db()
+        self.assertEqual(self.other_user.assigned_task_count, 3)
+        self.team.refresh_from_db()
+        self.assertEqual(self.team.assigned_task_count, 3)
+
+    def test_invisible_and_missing_tasks_are_reported(self):
+        hidden_team = Team.objects.create(name='Hidden', admin=self.outsider)
+        hidden = Task.objects.create(
+            title='Hidden task', assignee=self.outsider, team_of_task=hidden_team,
+            due_date=timezone.now() + timezone.timedelta(days=1),
+        )
+        response = self._post([self.tasks[0].pk, hidden.pk, 9999], {'status': 'completed'})
+        results = response.json()['results']
+        self.assertEqual([result.get('updated', False) for result in results], [True, False, False])
+        self.assertEqual(Task.objects.get(pk=hidden.pk).status, 'assigned')
+
+    def test_invalid_changes_are_rejected(self):
+        response = self._post([self.tasks[0].pk], {'status': 'lost', 'due_date': '2000-01-01T00:00'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()['errors']), {'status', 'due_date'})
+        response = self._post([self.tasks[0].pk], {})
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_ids_are_rejected(self):
+        response = self._post('all', {'status': 'completed'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ids', response.json()['errors'])
@@ -0,0 +1,66 @@
+"""Tests of the benchmark report comparison."""
+import asyncio
+from django.test import SimpleTestCase
+from tasks.management.commands.benchmark import compare_reports, percentile
+from tasks.management.commands.loadtest import read_response
+
+
+class CompareReportsTest(SimpleTestCase):
+    """Tests of the benchmark report comparison."""
+
+    def setUp(self):
+        self.previous = {'routes': {'dashboard': {'p95_ms': 10.0, 'max_queries': 4, 'bytes': 1000}}}
+
+    def _report(self, p95_ms=10.0, max_queries=4, size=1000):
+        return {'routes': {'dashboard': {'p95_ms': p95_ms, 'max_queries': max_queries, 'bytes': size}}}
+
+    def test_unchanged_report_has_no_regressions(self):
+        self.assertEqual(compare_reports(self.previous, self._report(), 1.2), [])
+
+    def test_slowdown_within_threshold_is_not_a_regression(self):
+        self.assertEqual(compare_reports(self.previous, self._report(p95_ms=11.9), 1.2), [])
+
+    def test_slowdown_beyond_threshold_is_a_regression(self):
+        regressions = compare_reports(self.previous, self._report(p95_ms=13.0), 1.2)
+        self.assertEqual(regressions, ['dashboard: p95 10.0ms -> 13.0ms'])
+
+    def test_extra_query_is_a_regression(self):
+        regressions = compare_reports(self.previous, self._report(max_queries=5), 1.2)
+        self.assertEqual(regressions, ['dashboard: queries 4 -> 5'])
+
+    def test_larger_response_is_a_regression(self):
+        regressions = compare_reports(self.previous, self._report(size=2000), 1.2)
+        self.assertEqual(regressions, ['dashboard: response size 1000 -> 2000 bytes'])
+
+    def test_new_route_is_not_a_regression(self):
+        current = {'routes': {'team_detail': {'p95_ms': 50.0, 'max_queries': 9, 'bytes': 9000}}}
+        self.assertEqual(compare_reports(self.previous, current, 1.2), [])
+
+    def test_percentile_uses_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+
+
+class ReadResponseTest(SimpleTestCase):
+    """Tests of the HTTP response reader of the load test clients."""
+
+    def _read(self, data):
+        async def read():
+            reader = asyncio.StreamReader()
+            reader.feed_data(data)
+            reader.feed_eof()
+            return await read_response(reader)
+        return asyncio.run(read())
+
+    def test_reads_response_with_content_length(self):
+        self.assertEqual(self._read(b'HTTP/1.1 200 OK\r\nContent-Length: 5\r\n\r\nhello'), (200, 5))
+
+    def test_reads_chunked_response(self):
+        data = b'HTTP/1.1 302 Found\r\nTransfer-Encoding: chunked\r\n\r\n3\r\nabc\r\n2\r\nde\r\n0\r\n\r\n'
+        self.assertEqual(self._read(data), (302, 5))
+
+    def test_closed_connection_is_an_error(self):
+        with self.assertRaises(ConnectionError):
+            self._read(b'')
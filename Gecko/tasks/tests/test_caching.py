@@ -0,0 +1,177 @@
+"""Tests of the cached dashboard fragments."""
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from tasks.caching import dashboard_cache_key, invalidate_users, user_generation
+from tasks.forms import TaskForm
+from tasks.models import User, Task, Team
+
+
+class DashboardCacheTestCase(TestCase):
+    """Tests of the cached dashboard fragments."""
+
+    fixtures = ['tasks/tests/fixtures/default_user.json', 'tasks/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.get(username='@johndoe')
+        self.other_user = User.objects.get(username='@janedoe')
+        self.client.force_login(self.user)
+        self.url = reverse('dashboard')
+        self.team = Team.objects.create(name='Gecko', admin=self.other_user)
+        self.team.members.add(self.user, self.other_user)
+        self.task = Task.objects.create(
+            title='Write report',
+            assignee=self.user,
+            team_of_task=self.team,
+            due_date=timezone.now() + timezone.timedelta(days=1),
+        )
+
+    def _get_dashboard(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(context.captured_queries)
+
+    def test_repeat_load_runs_only_session_queries(self):
+        _, first = self._get_dashboard()
+        response, second = self._get_dashboard()
+        self.assertContains(response, 'Write report')
+        self.assertContains(response, 'Gecko')
+        self.assertEqual(second, 2)
+        self.assertLess(second, first)
+
+    def test_task_edit_invalidates_dashboard(self):
+        self._get_dashboard()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.title = 'Write summary'
+            self.task.save()
+        response, _ = self._get_dashboard()
+        self.assertContains(response, 'Write summary')
+
+    def test_reassigned_task_leaves_previous_assignee_dashboard(self):
+        self._get_dashboard()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.assignee = self.other_user
+            self.task.save()
+        response, _ = self._get_dashboard()
+        self.assertNotContains(response, 'Write report')
+
+    def test_team_rename_invalidates_member_dashboard(self):
+        self._get_dashboard()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.team.name = 'Iguana'
+            self.team.save()
+        response, _ = self._get_dashboard()
+        self.assertContains(response, 'Iguana')
+
+    def test_membership_removal_invalidates_dashboard(self):
+        self.task.delete()
+        self._get_dashboard()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.team.members.remove(self.user)
+        response, _ = self._get_dashboard()
+        self.assertNotContains(response, 'Gecko')
+
+    def test_admin_rename_invalidates_member_dashboard(self):
+        self._get_dashboard()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other_user.username = '@janesmith'
+            self.other_user.save()
+        response, _ = self._get_dashboard()
+        self.assertContains(response, '@janesmith')
+
+    def test_invalidation_waits_for_the_commit(self):
+        key = dashboard_cache_key(self.user.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.task.title = 'Write summary'
+            self.task.save()
+        self.assertEqual(dashboard_cache_key(self.user.pk), key)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(dashboard_cache_key(self.user.pk), key)
+
+    def test_invalidation_only_affects_given_users(self):
+        key = dashboard_cache_key(self.user.pk)
+        other_generation = user_generation(self.other_user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_users([self.user.pk])
+            self.assertEqual(dashboard_cache_key(self.user.pk), key)
+        self.assertNotEqual(dashboard_cache_key(self.user.pk), key)
+        self.assertEqual(user_generation(self.other_user.pk), other_generation)
+
+    def test_cache_key_depends_on_query_string(self):
+        self.assertNotEqual(dashboard_cache_key(self.user.pk, 'after=a'), dashboard_cache_key(self.user.pk))
+
+
+class AssigneeChoicesCacheTestCase(TestCase):
+    """Tests of the cached assignee choices of the task form."""
+
+    fixtures = ['tasks/tests/fixtures/default_user.json', 'tasks/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.get(username='@johndoe')
+        self.other_user = User.objects.get(username='@janedoe')
+        self.outsider = User.objects.get(username='@petrapickles')
+        self.team = Team.objects.create(name='Gecko', admin=self.user)
+        self.team.members.add(self.user, self.other_user)
+
+    def _render_assignee_select(self):
+        with CaptureQueriesContext(connection) as context:
+            html = str(TaskForm(team_id=self.team.pk)['assignee'])
+        return html, len(context.captured_queries)
+
+    def test_choices_list_team_members_only(self):
+        html, _ = self._render_assignee_select()
+        self.assertIn('@johndoe', html)
+        self.assertIn('@janedoe', html)
+        self.assertNotIn('@petrapickles', html)
+
+    def test_repeat_render_runs_no_queries(self):
+        first, _ = self._render_assignee_select()
+        second, queries = self._render_assignee_select()
+        self.assertEqual(first, second)
+        self.assertEqual(queries, 0)
+
+    def test_selected_value_is_rendered(self):
+        self._render_assignee_select()
+        form = TaskForm(team_id=self.team.pk, initial={'assignee': self.other_user.pk})
+        self.assertIn(f'value="{self.other_user.pk}" selected', str(form['assignee']))
+
+    def test_new_member_invalidates_choices(self):
+        self._render_assignee_select()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.team.members.add(self.outsider)
+        html, _ = self._render_assignee_select()
+        self.assertIn('@petrapickles', html)
+
+    def test_removed_member_invalidates_choices(self):
+        self._render_assignee_select()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.team.members.remove(self.other_user)
+        html, _ = self._render_assignee_select()
+        self.assertNotIn('@janedoe', html)
+
+    def test_renamed_member_invalidates_choices(self):
+        self._render_assignee_select()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other_user.username = '@janesmith'
+            self.other_user.save()
+        html, _ = self._render_assignee_select()
+        self.assertIn('@janesmith', html)
+
+    def test_invalid_assignee_is_rejected(self):
+        form = TaskForm(team_id=self.team.pk, data={
+            'title': 'Write report',
+            'description': 'Quarterly report',
+            'assignee': self.outsider.pk,
+            'due_date': timezone.now() + timezone.timedelta(days=1),
+            'status': 'assigned',
+            'priority': 2,
+        })
+        self.assertFalse(form.is_valid())
+        self.assertIn('assignee', form.errors)
@@ -0,0 +1,109 @@
+"""Tests of the denormalized task counters."""
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from tasks.forms import BulkTaskChangeForm
+from tasks.models import User, Task, Team
+
+
+class TaskCountersTestCase(TestCase):
+    """Tests of the denormalized task counters."""
+
+    fixtures = ['tasks/tests/fixtures/default_user.json', 'tasks/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.other_user = User.objects.get(username='@janedoe')
+        self.team = Team.objects.create(name='Gecko', admin=self.user)
+        self.other_team = Team.objects.create(name='Iguana', admin=self.user)
+        self.task = self._create_task('Write report')
+
+    def _create_task(self, title, **fields):
+        return Task.objects.create(
+            title=title,
+            assignee=fields.pop('assignee', self.user),
+            team_of_task=fields.pop('team_of_task', self.team),
+            due_date=timezone.now() + timezone.timedelta(days=1),
+            **fields
+        )
+
+    def _counts(self, obj):
+        obj.refresh_from_db()
+        return obj.assigned_task_count, obj.in_progress_task_count, obj.completed_task_count
+
+    def test_create_counts_task(self):
+        self._create_task('Review report', status='completed')
+        self.assertEqual(self._counts(self.user), (1, 0, 1))
+        self.assertEqual(self._counts(self.team), (1, 0, 1))
+        self.assertEqual(self.team.open_task_count(), 1)
+        self.assertEqual(self.team.task_count(), 2)
+
+    def test_status_change_moves_count(self):
+        self.task.status = 'in progress'
+        self.task.save()
+        self.assertEqual(self._counts(self.user), (0, 1, 0))
+        self.assertEqual(self._counts(self.team), (0, 1, 0))
+
+    def test_unchanged_save_keeps_counts(self):
+        self.task.description = 'Quarterly figures'
+        self.task.save()
+        self.task.save()
+        self.assertEqual(self._counts(self.user), (1, 0, 0))
+
+    def test_reassign_moves_count_between_users_and_teams(self):
+        self.task.assignee = self.other_user
+        self.task.team_of_task = self.other_team
+        self.task.save()
+        self.assertEqual(self._counts(self.user), (0, 0, 0))
+        self.assertEqual(self._counts(self.other_user), (1, 0, 0))
+        self.assertEqual(self._counts(self.team), (0, 0, 0))
+        self.assertEqual(self._counts(self.other_team), (1, 0, 0))
+
+    def test_delete_uncounts_task(self):
+        self.task.delete()
+        self.assertEqual(self._counts(self.user), (0, 0, 0))
+        self.assertEqual(self._counts(self.team), (0, 0, 0))
+
+    def test_team_delete_uncounts_its_tasks(self):
+        self._create_task('Review report', team_of_task=self.other_team)
+        self.team.delete()
+        self.assertEqual(self._counts(self.user), (1, 0, 0))
+
+    def test_saving_a_stale_team_or_user_keeps_counts(self):
+        stale_team = Team.objects.get(pk=self.team.pk)
+        stale_user = User.objects.get(pk=self.user.pk)
+        self._create_task('Review report')
+        stale_team.description = 'Reptiles'
+        stale_team.save()
+        stale_user.first_name = 'Johnny'
+        stale_user.save()
+        self.assertEqual(self._counts(self.team), (2, 0, 0))
+        self.assertEqual(self._counts(self.user), (2, 0, 0))
+        self.assertEqual(self.team.description, 'Reptiles')
+        self.assertEqual(self.user.first_name, 'Johnny')
+
+    def test_bulk_update_refresh_then_delete_uncounts_task(self):
+        form = BulkTaskChangeForm({'status': 'completed'})
+        self.assertTrue(form.is_valid())
+        form.save(Task.objects.all(), [self.task.pk])
+        self.task.refresh_from_db()
+        self.task.delete()
+        self.assertEqual(self._counts(self.user), (0, 0, 0))
+        self.assertEqual(self._counts(self.team), (0, 0, 0))
+
+    def test_deleting_a_stale_task_uncounts_its_current_row(self):
+        stale = Task.objects.get(pk=self.task.pk)
+        self.task.assignee = self.other_user
+        self.task.save()
+        stale.delete()
+        self.assertEqual(self._counts(self.user), (0, 0, 0))
+        self.assertEqual(self._counts(self.other_user), (0, 0, 0))
+
+    def test_rebuild_counters_repairs_bulk_writes(self):
+        Task.objects.filter(pk=self.task.pk).update(status='completed')
+        User.objects.update(assigned_task_count=7)
+        call_command('rebuild_counters', stdout=StringIO())
+        self.assertEqual(self._counts(self.user), (0, 0, 1))
+        self.assertEqual(self._counts(self.other_user), (0, 0, 0))
+        self.assertEqual(self._counts(self.team), (0, 0, 1))
@@ -0,0 +1,159 @@
+"""Tests of the task change event streams."""
+import asyncio
+import json
+import threading
+from asgiref.sync import sync_to_async
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from tasks.events import InProcessBroker, get_event_broker, task_event
+from tasks.forms import BulkTaskChangeForm
+from tasks.models import User, Task, Team
+
+
+class RecordingBroker:
+    """Broker remembering what was published, for the tests."""
+
+    published = []
+
+    def publish(self, team_id, event):
+        self.published.append((team_id, event))
+
+
+class InProcessBrokerTestCase(TestCase):
+    """Tests of the in-process event broker."""
+
+    def test_subscriber_receives_events_published_from_other_threads(self):
+        async def run():
+            broker = InProcessBroker()
+            subscription = await broker.subscribe([1, 2])
+            thread = threading.Thread(target=broker.publish, args=(2, {'type': 'saved', 'id': 7}))
+            thread.start()
+            thread.join()
+            event = await subscription.get(1)
+            await subscription.close()
+            return event, broker.subscriptions
+        event, subscriptions = asyncio.run(run())
+        self.assertEqual(event, {'type': 'saved', 'id': 7})
+        self.assertEqual(subscriptions, {})
+
+    def test_other_teams_events_are_not_received(self):
+        async def run():
+            broker = InProcessBroker()
+            subscription = await broker.subscribe([1])
+            broker.publish(2, {'type': 'saved', 'id': 7})
+            return await subscription.get(0.01)
+        self.assertIsNone(asyncio.run(run()))
+
+    @override_settings(TASK_EVENTS_QUEUE_SIZE=2)
+    def test_slow_subscriber_is_told_to_refresh(self):
+        async def run():
+            broker = InProcessBroker()
+            subscription = await broker.subscribe([1])
+            for number in range(3):
+                broker.publish(1, {'type': 'saved', 'id': number, 'team': 1})
+            await asyncio.sleep(0)
+            return [await subscription.get(0.01) for _ in range(2)]
+        self.assertEqual(asyncio.run(run()), [{'type': 'refresh', 'team': 1}, None])
+
+
+class TaskEventsTestCase(TestCase):
+    """Tests of the task events published by the task signals and streamed to team members."""
+
+    fixtures = ['tasks/tests/fixtures/default_user.json', 'tasks/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.outsider = User.objects.get(username='@janedoe')
+        self.team = Team.objects.create(name='Gecko', admin=self.user)
+        self.team.members.add(self.user)
+        self.other_team = Team.objects.create(name='Iguana', admin=self.user)
+        self.other_team.members.add(self.user)
+        self.client.force_login(self.user)
+        self.async_client.force_login(self.user)
+        RecordingBroker.published = []
+
+    def _create_task(self):
+        return Task.objects.create(
+            title='Write report',
+            assignee=self.user,
+            team_of_task=self.team,
+            due_date=timezone.now() + timezone.timedelta(days=1),
+        )
+
+    @override_settings(TASK_EVENTS_BROKER='tasks.tests.test_events.RecordingBroker')
+    def test_saved_task_is_published_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task = self._create_task()
+            self.assertEqual(RecordingBroker.published, [])
+        [(team_id, event)] = RecordingBroker.published
+        self.assertEqual(team_id, self.team.pk)
+        self.assertEqual(event['type'], 'saved')
+        self.assertEqual(event['id'], task.pk)
+
+    @override_settings(TASK_EVENTS_BROKER='tasks.tests.test_events.RecordingBroker')
+    def test_moved_task_is_published_to_both_teams(self):
+        task = self._create_task()
+        with self.captureOnCommitCallbacks(execute=True):
+            task.team_of_task = self.other_team
+            task.save()
+        self.assertEqual({team_id for team_id, _ in RecordingBroker.published}, {self.team.pk, self.other_team.pk})
+
+    @override_settings(TASK_EVENTS_BROKER='tasks.tests.test_events.RecordingBroker')
+    def test_deleted_task_is_published(self):
+        task = self._create_task()
+        with self.captureOnCommitCallbacks(execute=True):
+            task_id = task.pk
+            task.delete()
+        self.assertEqual(RecordingBroker.published, [(self.team.pk, {'type': 'deleted', 'id': task_id, 'team': self.team.pk})])
+
+    @override_settings(TASK_EVENTS_BROKER='tasks.tests.test_events.RecordingBroker')
+    def test_bulk_update_tells_the_team_to_refresh(self):
+        task = self._create_task()
+        form = BulkTaskChangeForm({'status': 'completed'})
+        self.assertTrue(form.is_valid())
+        with self.captureOnCommitCallbacks(execute=True):
+            form.save(Task.objects.all(), [task.pk])
+        self.assertEqual(RecordingBroker.published, [(self.team.pk, {'type': 'refresh', 'team': self.team.pk})])
+
+    def test_building_an_event_does_not_query(self):
+        task = Task.objects.get(pk=self._create_task().pk)
+        with self.assertNumQueries(0):
+            event = task_event(task)
+        self.assertEqual(event['assignee'], self.user.pk)
+        self.assertNotIn('assignee_name', event)
+
+    def test_streams_are_not_served_under_wsgi(self):
+        response = self.client.get(reverse('team_events', kwargs={'pk': self.team.pk}))
+        self.assertEqual(response.status_code, 204)
+
+    async def test_team_stream_delivers_task_changes(self):
+        response = await self.async_client.get(reverse('team_events', kwargs={'pk': self.team.pk}))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content.__aiter__()
+        self.assertEqual(await stream.__anext__(), b'retry: 5000\n\n')
+        task = await sync_to_async(self._create_task)()
+        await sync_to_async(get_event_broker().publish)(self.team.pk, task_event(task))
+        event_name, data = (await stream.__anext__()).decode().strip().split('\n')
+        self.assertEqual(event_name, 'event: saved')
+        self.assertEqual(json.loads(data[len('data: '):])['id'], task.pk)
+        await stream.aclose()
+
+    @override_settings(TASK_EVENTS_HEARTBEAT=0.01)
+    async def test_idle_stream_sends_keep_alive_comments(self):
+        response = await self.async_client.get(reverse('task_events'))
+        stream = response.streaming_content.__aiter__()
+        await stream.__anext__()
+        self.assertEqual(await stream.__anext__(), b': keep-alive\n\n')
+        await stream.aclose()
+
+    @override_settings(TASK_EVENTS_STREAM_SECONDS=0)
+    async def test_stream_ends_for_the_browser_to_reconnect(self):
+        response = await self.async_client.get(reverse('task_events'))
+        self.assertEqual([chunk async for chunk in response.streaming_content], [b'retry: 5000\n\n'])
+        self.assertEqual(get_event_broker().subscriptions, {})
+
+    def test_non_members_cannot_follow_a_team(self):
+        self.client.force_login(self.outsider)
+        response = self.client.get(reverse('team_events', kwargs={'pk': self.team.pk}))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,77 @@
+"""Tests of the task and team exports."""
+import csv
+import json
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from tasks.models import User, Task, Team
+
+
+class ExportTestCase(TestCase):
+    """Tests of the task and team exports."""
+
+    fixtures = ['tasks/tests/fixtures/default_user.json', 'tasks/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.other_user = User.objects.get(username='@janedoe')
+        self.client.force_login(self.user)
+        self.team = Team.objects.create(name='Gecko', admin=self.user)
+        self.team.members.add(self.user, self.other_user)
+        for number, (assignee, status) in enumerate([
+            (self.user, 'assigned'), (self.user, 'completed'), (self.other_user, 'assigned'),
+        ]):
+            Task.objects.create(
+                title=f'Report {number}',
+                description=f'Quarterly report, part {number}',
+                assignee=assignee,
+                team_of_task=self.team,
+                status=status,
+                due_date=timezone.now() + timezone.timedelta(days=number + 1),
+            )
+
+    def _content(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_export_tasks_csv_streams_own_tasks(self):
+        response = self.client.get(reverse('export_tasks'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('attachment; filename="tasks.csv"', response['Content-Disposition'])
+        rows = list(csv.DictReader(StringIO(self._content(response))))
+        self.assertEqual([row['title'] for row in rows], ['Report 0', 'Report 1'])
+        self.assertEqual(rows[0]['assignee'], '@johndoe')
+        self.assertEqual(rows[0]['team'], 'Gecko')
+        self.assertEqual(rows[0]['description'], 'Quarterly report, part 0')
+
+    def test_export_tasks_honours_dashboard_filters(self):
+        response = self.client.get(reverse('export_tasks'), {'status': 'completed', 'format': 'jsonl'})
+        rows = [json.loads(line) for line in self._content(response).splitlines()]
+        self.assertEqual([row['title'] for row in rows], ['Report 1'])
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+    def test_export_tasks_honours_dashboard_search(self):
+        response = self.client.get(reverse('export_tasks'), {'search_input': 'part 1'})
+        rows = list(csv.DictReader(StringIO(self._content(response))))
+        self.assertEqual([row['title'] for row in rows], ['Report 1'])
+
+    def test_export_teams(self):
+        response = self.client.get(reverse('export_teams'))
+        rows = list(csv.DictReader(StringIO(self._content(response))))
+        self.assertEqual(rows[0]['name'], 'Gecko')
+        self.assertEqual(rows[0]['assigned_tasks'], '2')
+
+    def test_export_command(self):
+        out = StringIO()
+        call_command('export', 'tasks', format='jsonl', status='assigned', chunk_size=1, stdout=out)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([row['title'] for row in rows], ['Report 0', 'Report 2'])
+
+    def test_export_command_filters_by_assignee_username(self):
+        out = StringIO()
+        call_command('export', 'tasks', assignee='@janedoe', stdout=out)
+        rows = list(csv.DictReader(StringIO(out.getvalue())))
+        self.assertEqual([row['title'] for row in rows], ['Report 2'])
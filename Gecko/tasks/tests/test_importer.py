@@ -0,0 +1,136 @@
+"""Tests of the task import command and view."""
+import csv
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from tasks.models import User, Task, Team
+from tasks.search import SQLiteSearchBackend, get_search_backend
+
+
+class TaskImportTestCase(TestCase):
+    """Tests of the task import command and view."""
+
+    fixtures = ['tasks/tests/fixtures/default_user.json', 'tasks/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.other_user = User.objects.get(username='@janedoe')
+        self.outsider = User.objects.get(username='@petrapickles')
+        self.team = Team.objects.create(name='Gecko', admin=self.user)
+        self.team.members.add(self.user, self.other_user)
+        self.hidden_team = Team.objects.create(name='Hidden', admin=self.outsider)
+        self.hidden_team.members.add(self.outsider)
+        Task.objects.create(
+            title='Existing task', assignee=self.user, team_of_task=self.team,
+            due_date=timezone.now() + timezone.timedelta(days=1),
+        )
+        self.future = (timezone.now() + timezone.timedelta(days=3)).strftime('%Y-%m-%d %H:%M')
+        self.past = (timezone.now() - timezone.timedelta(days=3)).strftime('%Y-%m-%d %H:%M')
+
+    def _csv(self):
+        return (
+            "title,description,due_date,assignee,team,status,priority\n"
+            f"Write report,Quarterly,{self.future},@johndoe,Gecko,assigned,3\n"
+            f"Review report,,{self.future},@janedoe,Gecko,completed,low\n"
+            f"Late report,,{self.past},@johndoe,Gecko,,\n"
+            f"Stranger report,,{self.future},@petrapickles,Gecko,,\n"
+            f"Existing task,,{self.future},@johndoe,Gecko,,\n"
+            f"Write report,,{self.future},@johndoe,Gecko,,\n"
+            f"Lost report,,{self.future},@johndoe,Nowhere,lost,9\n"
+        ).encode()
+
+    def _import(self, content, suffix):
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as source:
+            source.write(content)
+        errors_path = source.name + '.errors'
+        out = StringIO()
+        try:
+            call_command('import_tasks', source.name, errors=errors_path, batch_size=2, stdout=out)
+            with open(errors_path) as report:
+                errors = [json.loads(line) for line in report]
+        finally:
+            os.remove(source.name)
+            if os.path.exists(errors_path):
+                os.remove(errors_path)
+        return out.getvalue(), errors
+
+    def test_import_csv(self):
+        output, errors = self._import(self._csv(), '.csv')
+        self.assertIn('Imported 2 tasks, rejected 5 rows.', output)
+        self.assertEqual([error['line'] for error in errors], [4, 5, 6, 7, 8])
+        self.assertEqual(list(errors[0]['errors']), ['due_date'])
+        self.assertEqual(list(errors[1]['errors']), ['assignee'])
+        self.assertEqual(list(errors[2]['errors']), ['title'])
+        self.assertEqual(list(errors[3]['errors']), ['title'])
+        self.assertEqual(set(errors[4]['errors']), {'team', 'status', 'priority'})
+        review = Task.objects.get(title='Review report')
+        self.assertEqual((review.assignee, review.team_of_task, review.status, review.priority), (self.other_user, self.team, 'completed', 1))
+
+    def test_import_updates_counters(self):
+        self._import(self._csv(), '.csv')
+        self.team.refresh_from_db()
+        self.assertEqual((self.team.assigned_task_count, self.team.completed_task_count), (2, 1))
+
+    def test_import_indexes_only_the_imported_tasks(self):
+        with patch.object(SQLiteSearchBackend, 'rebuild') as rebuild:
+            self._import(self._csv(), '.csv')
+        rebuild.assert_not_called()
+        results = get_search_backend().search(Task.objects.all(), 'review')
+        self.assertEqual([task.title for task in results], ['Review report'])
+
+    def test_import_json_lines(self):
+        rows = [
+            {'title': 'Write report', 'due_date': self.future, 'assignee': '@johndoe', 'team': 'Gecko', 'priority': 1},
+            'not an object',
+        ]
+        content = '\n'.join(json.dumps(row) for row in rows).encode()
+        output, errors = self._import(content, '.jsonl')
+        self.assertIn('Imported 1 tasks, rejected 1 rows.', output)
+        self.assertEqual(errors[0]['line'], 2)
+        self.assertEqual(Task.objects.get(title='Write report').priority, 1)
+
+    def test_upload_view_only_imports_into_own_teams(self):
+        self.client.force_login(self.user)
+        content = (
+            "title,due_date,assignee,team\n"
+            f"Write report,{self.future},@johndoe,Gecko\n"
+            f"Hidden report,{self.future},@petrapickles,Hidden\n"
+        ).encode()
+        response = self.client.post(reverse('import_tasks'), {'file': SimpleUploadedFile('tasks.csv', content)})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'import_tasks.html')
+        self.assertEqual(response.context['importer'].imported, 1)
+        self.assertEqual(response.context['errors'][0]['line'], 3)
+        self.assertFalse(Task.objects.filter(title='Hidden report').exists())
+
+    def test_upload_view_reports_a_file_that_is_not_utf8(self):
+        self.client.force_login(self.user)
+        content = (
+            f"title,due_date,assignee,team\nWrite report,{self.future},@johndoe,Gecko\n".encode()
+            + b'\xff\xfe,,,\n'
+        )
+        response = self.client.post(reverse('import_tasks'), {'file': SimpleUploadedFile('tasks.csv', content)})
+        self.assertEqual(response.status_code, 200)
+        self.assertFormError(response.context['form'], 'file', 'Line 3 is not UTF-8 text.')
+        self.assertTrue(Task.objects.filter(title='Write report').exists())
+
+    def test_command_rejects_malformed_csv(self):
+        with self.assertRaisesMessage(CommandError, 'not valid CSV after line 1'):
+            self._import(b'title,description\n"Write report,' + b'x' * (csv.field_size_limit() + 1) + b'\n', '.csv')
+
+    def test_command_rejects_a_file_that_is_not_utf8(self):
+        with self.assertRaisesMessage(CommandError, 'not UTF-8'):
+            self._import(b'\xff\xfetitle\n', '.csv')
+
+    def test_get_import_view(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('import_tasks'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context['importer'])
@@ -0,0 +1,87 @@
+"""Tests of the request metrics middleware and histograms."""
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from tasks.metrics import Histogram, ViewStats, load_metrics, recorder
+from tasks.middleware import QueryCollector
+from tasks.models import User
+
+
+class HistogramTest(TestCase):
+    """Tests of the logarithmic histogram."""
+
+    def test_percentiles_are_within_ten_percent(self):
+        histogram = Histogram()
+        for value in range(1, 101):
+            histogram.add(value)
+        for percent in (50, 95, 99):
+            self.assertAlmostEqual(histogram.percentile(percent), percent, delta=percent * 0.1)
+
+    def test_exact_histogram_keeps_integers(self):
+        histogram = Histogram(exact=True)
+        for value in (3, 3, 4, 10):
+            histogram.add(value)
+        self.assertEqual(histogram.percentile(50), 3)
+        self.assertEqual(histogram.percentile(99), 10)
+
+    def test_empty_histogram_has_no_percentile(self):
+        self.assertIsNone(Histogram().percentile(50))
+
+
+class QueryTimingMiddlewareTest(TestCase):
+    """Tests of the request metrics middleware."""
+
+    fixtures = ['tasks/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(REQUEST_METRICS_DIR=self.directory.name)
+        self.settings_override.enable()
+        recorder.reset()
+        self.user = User.objects.get(username='@johndoe')
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        recorder.reset()
+        self.settings_override.disable()
+        self.directory.cleanup()
+
+    def test_response_has_server_timing_header(self):
+        response = self.client.get(reverse('dashboard'))
+        self.assertRegex(response['Server-Timing'], r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries"$')
+
+    def test_metrics_are_recorded_per_view(self):
+        for _ in range(3):
+            self.client.get(reverse('dashboard'))
+        self.client.get(reverse('task_dashboard'))
+        recorder.flush()
+        views = load_metrics()
+        self.assertEqual(views['dashboard'].requests(), 3)
+        self.assertEqual(views['task_dashboard'].requests(), 1)
+        self.assertGreater(views['dashboard'].queries.percentile(50), 0)
+
+    @override_settings(REQUEST_METRICS_MAX_STATEMENTS=2)
+    def test_distinct_statements_are_capped(self):
+        collector = QueryCollector()
+        for sql in ['SELECT 1', 'SELECT 2', 'SELECT 3', 'SELECT 3', 'SELECT 1']:
+            collector(lambda *args: None, sql, None, False, None)
+        self.assertEqual(collector.count(), 5)
+        self.assertEqual(collector.duplicates(), {'SELECT 1': 1})
+        stats = ViewStats()
+        stats.add(1.0, 1.0, 5, {'SELECT 1': 1, 'SELECT 2': 3, 'SELECT 3': 2})
+        self.assertEqual(dict(stats.duplicates), {'SELECT 2': 3, 'SELECT 3': 2})
+
+    def test_view_metrics_command_reports_views(self):
+        self.client.get(reverse('dashboard'))
+        recorder.flush()
+        output = StringIO()
+        call_command('view_metrics', stdout=output)
+        self.assertIn('dashboard', output.getvalue())
+
+    def test_view_metrics_command_resets_metrics(self):
+        self.client.get(reverse('dashboard'))
+        recorder.flush()
+        call_command('view_metrics', '--reset', stdout=StringIO())
+        self.assertEqual(load_metrics(), {})
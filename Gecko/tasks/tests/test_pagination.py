@@ -0,0 +1,67 @@
+"""Tests of the keyset paginator."""
+from django.test import TestCase, RequestFactory
+from django.utils import timezone
+from tasks.models import User, Task
+from tasks.pagination import KeysetPaginator, encode_cursor
+
+
+class KeysetPaginatorTest(TestCase):
+    """Tests of the keyset paginator."""
+
+    fixtures = ['tasks/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.user = User.objects.get(username='@johndoe')
+        due_date = timezone.now() + timezone.timedelta(days=1)
+        for number in range(7):
+            Task.objects.create(
+                title=f'Task {number}',
+                assignee=self.user,
+                due_date=due_date + timezone.timedelta(microseconds=number % 3),
+                priority=number % 3 + 1,
+            )
+        self.tasks = Task.objects.filter(assignee=self.user)
+
+    def _walk_forward(self, ordering):
+        paginator = KeysetPaginator(self.tasks, ordering, per_page=3)
+        page = paginator.page(self.factory.get('/'))
+        seen = list(page)
+        while page.has_next():
+            page = paginator.page(self.factory.get('/', {'after': page.next_cursor}))
+            seen += list(page)
+        return seen
+
+    def test_first_page_is_limited_to_page_size(self):
+        page = KeysetPaginator(self.tasks, ['due_date'], per_page=3).page(self.factory.get('/'))
+        self.assertEqual(len(page), 3)
+        self.assertTrue(page.has_next())
+        self.assertFalse(page.has_previous())
+
+    def test_walking_forward_visits_every_row_once_in_order(self):
+        for ordering in (['due_date'], ['-priority'], ['title']):
+            expected = list(self.tasks.order_by(*ordering, 'pk' if ordering[0][0] != '-' else '-pk'))
+            self.assertEqual(self._walk_forward(ordering), expected)
+
+    def test_previous_page_returns_rows_before_cursor(self):
+        paginator = KeysetPaginator(self.tasks, ['due_date'], per_page=3)
+        first = paginator.page(self.factory.get('/'))
+        second = paginator.page(self.factory.get('/', {'after': first.next_cursor}))
+        previous = paginator.page(self.factory.get('/', {'before': second.previous_cursor}))
+        self.assertEqual(list(previous), list(first))
+        self.assertFalse(previous.has_previous())
+
+    def test_ordering_defaults_to_queryset_ordering(self):
+        page = KeysetPaginator(self.tasks.order_by('title'), per_page=2).page(self.factory.get('/'))
+        self.assertEqual([task.title for task in page], ['Task 0', 'Task 1'])
+
+    def test_invalid_cursor_returns_first_page(self):
+        paginator = KeysetPaginator(self.tasks, ['due_date'], per_page=3)
+        for cursor in ('not-a-cursor', encode_cursor(['x'])):
+            page = paginator.page(self.factory.get('/', {'after': cursor}))
+            self.assertEqual(list(page), list(paginator.page(self.factory.get('/'))))
+
+    def test_page_query_keeps_other_parameters(self):
+        paginator = KeysetPaginator(self.tasks, ['due_date'], per_page=3)
+        page = paginator.page(self.factory.get('/', {'sort_by': 'due_date'}))
+        self.assertEqual(page.next_query(), f'sort_by=due_date&after={page.next_cursor}')
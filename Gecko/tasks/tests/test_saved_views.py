@@ -0,0 +1,158 @@
+"""Tests of the saved task dashboard views."""
+from io import StringIO
+from unittest.mock import patch
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from tasks.forms import BulkTaskChangeForm
+from tasks.models import SavedView, User, Task, Team
+from tasks.saved_views import materialize, saved_view_tasks
+
+
+class SavedViewTestCase(TestCase):
+    """Tests of the saved task dashboard views."""
+
+    fixtures = ['tasks/tests/fixtures/default_user.json', 'tasks/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.other_user = User.objects.get(username='@janedoe')
+        self.team = Team.objects.create(name='Gecko', admin=self.user)
+        self.team.members.add(self.user, self.other_user)
+        self.urgent = self._create_task('Fix outage', priority=3)
+        self.later = self._create_task('Tidy wiki', priority=1)
+        self.view = SavedView.objects.create(user=self.user, name='Urgent', query='priority=3&sort_by=title')
+        materialize(self.view)
+
+    def _create_task(self, title, priority=2, assignee=None, days=1):
+        return Task.objects.create(
+            title=title,
+            assignee=assignee or self.user,
+            team_of_task=self.team,
+            due_date=timezone.now() + timezone.timedelta(days=days),
+            priority=priority,
+        )
+
+    def _task_ids(self):
+        self.view.refresh_from_db()
+        return self.view.task_ids
+
+    def test_materialize_stores_matching_ids(self):
+        self.assertEqual(self._task_ids(), [self.urgent.pk])
+
+    def test_new_matching_task_is_added(self):
+        task = self._create_task('Restore backups', priority=3)
+        self.assertEqual(self._task_ids(), [self.urgent.pk, task.pk])
+
+    def test_edited_task_leaving_the_view_is_removed(self):
+        self.urgent.priority = 1
+        self.urgent.save()
+        self.assertEqual(self._task_ids(), [])
+
+    def test_edited_task_entering_the_view_is_added(self):
+        self.later.priority = 3
+        self.later.save()
+        self.assertEqual(self._task_ids(), [self.urgent.pk, self.later.pk])
+
+    def test_reassigned_task_leaves_the_previous_assignee_view(self):
+        self.urgent.assignee = self.other_user
+        self.urgent.save()
+        self.assertEqual(self._task_ids(), [])
+
+    def test_other_users_tasks_are_not_added(self):
+        self._create_task('Their outage', priority=3, assignee=self.other_user)
+        self.assertEqual(self._task_ids(), [self.urgent.pk])
+
+    def test_deleted_task_is_removed(self):
+        self.urgent.delete()
+        self.assertEqual(self._task_ids(), [])
+
+    def test_bulk_update_expires_the_view(self):
+        form = BulkTaskChangeForm({'priority': 3})
+        self.assertTrue(form.is_valid())
+        form.save(Task.objects.all(), [self.later.pk])
+        self.assertIsNone(self._task_ids())
+        self.assertEqual([task.title for task in saved_view_tasks(self.view)], ['Fix outage', 'Tidy wiki'])
+        self.assertEqual(self._task_ids(), [self.urgent.pk, self.later.pk])
+
+    def test_opening_the_view_fetches_by_id(self):
+        with CaptureQueriesContext(connection) as context:
+            titles = [task.title for task in saved_view_tasks(self.view)]
+        self.assertEqual(titles, ['Fix outage'])
+        self.assertEqual(len(context.captured_queries), 1)
+
+    def test_relative_window_is_applied_when_opened(self):
+        view = SavedView.objects.create(user=self.user, name='This month', query='due_window=next_30_days')
+        self._create_task('Next quarter', days=90)
+        materialize(view)
+        self.assertEqual(len(view.task_ids), 3)
+        self.assertEqual({task.title for task in saved_view_tasks(view)}, {'Fix outage', 'Tidy wiki'})
+
+
+class SavedViewPagesTestCase(TestCase):
+    """Tests of saving, opening and deleting views from the task dashboard."""
+
+    fixtures = ['tasks/tests/fixtures/default_user.json', 'tasks/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.client.force_login(self.user)
+        team = Team.objects.create(name='Gecko', admin=self.user)
+        team.members.add(self.user)
+        for title, priority in [('Fix outage', 3), ('Tidy wiki', 1)]:
+            Task.objects.create(
+                title=title,
+                assignee=self.user,
+                team_of_task=team,
+                due_date=timezone.now() + timezone.timedelta(days=1),
+                priority=priority,
+            )
+
+    def test_save_view_redirects_to_it(self):
+        response = self.client.post(reverse('save_task_view'), {'name': 'Urgent', 'query': 'priority=3&after=abc'})
+        view = SavedView.objects.get(user=self.user, name='Urgent')
+        self.assertEqual(view.query, 'priority=3')
+        self.assertRedirects(response, reverse('task_dashboard') + f'?view={view.pk}')
+        response = self.client.get(response['Location'])
+        self.assertContains(response, 'Fix outage')
+        self.assertNotContains(response, 'Tidy wiki')
+        self.assertContains(response, 'Urgent')
+
+    def test_saving_the_same_name_replaces_the_query(self):
+        self.client.post(reverse('save_task_view'), {'name': 'Urgent', 'query': 'priority=3'})
+        self.client.post(reverse('save_task_view'), {'name': 'Urgent', 'query': 'priority=1'})
+        self.assertEqual(SavedView.objects.get(user=self.user, name='Urgent').query, 'priority=1')
+
+    def test_invalid_query_is_not_saved(self):
+        self.client.post(reverse('save_task_view'), {'name': 'Broken', 'query': 'due_window=someday'})
+        self.assertFalse(SavedView.objects.exists())
+
+    def test_other_users_view_is_not_found(self):
+        view = SavedView.objects.create(user=User.objects.get(username='@janedoe'), name='Theirs')
+        response = self.client.get(reverse('task_dashboard'), {'view': view.pk})
+        self.assertEqual(response.status_code, 404)
+
+    def test_delete_view(self):
+        view = SavedView.objects.create(user=self.user, name='Urgent', query='priority=3')
+        response = self.client.post(reverse('delete_task_view', kwargs={'pk': view.pk}))
+        self.assertRedirects(response, reverse('task_dashboard'))
+        self.assertFalse(SavedView.objects.exists())
+
+    def test_saved_relative_window_ties_the_etag_to_the_minute(self):
+        view = SavedView.objects.create(user=self.user, name='Overdue', query='due_window=overdue')
+        now = timezone.now()
+        with patch('tasks.views.timezone.now', return_value=now):
+            response = self.client.get(reverse('task_dashboard'), {'view': view.pk})
+            cached = self.client.get(reverse('task_dashboard'), {'view': view.pk}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        with patch('tasks.views.timezone.now', return_value=now + timezone.timedelta(minutes=1)):
+            response = self.client.get(reverse('task_dashboard'), {'view': view.pk}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_unseed_deletes_saved_views(self):
+        SavedView.objects.create(user=self.user, name='Urgent', query='priority=3')
+        call_command('unseed', stdout=StringIO())
+        self.assertFalse(SavedView.objects.exists())
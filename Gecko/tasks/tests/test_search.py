@@ -0,0 +1,83 @@
+"""Tests of the task search backends."""
+from unittest.mock import patch
+from django.test import TestCase
+from django.utils import timezone
+from tasks.models import User, Task, Team
+from tasks.search import BasicSearchBackend, SQLiteSearchBackend, get_search_backend, highlight
+
+
+class SearchBackendTest(TestCase):
+    """Tests of the task search backends."""
+
+    fixtures = ['tasks/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.team = Team.objects.create(name='Gecko', admin=self.user)
+        self.meeting = Task.objects.create(
+            title='Project meeting',
+            description='Discuss the design of the new project',
+            assignee=self.user,
+            team_of_task=self.team,
+            due_date=timezone.now() + timezone.timedelta(days=3),
+        )
+        self.report = Task.objects.create(
+            title='Write report',
+            description='Summarise the meeting notes',
+            assignee=self.user,
+            team_of_task=self.team,
+            due_date=timezone.now() + timezone.timedelta(days=5),
+        )
+
+    def test_sqlite_is_default_backend(self):
+        self.assertIsInstance(get_search_backend(), SQLiteSearchBackend)
+
+    def test_search_ranks_title_matches_first(self):
+        tasks = list(get_search_backend().search(Task.objects.all(), 'meeting'))
+        self.assertEqual(tasks, [self.meeting, self.report])
+
+    def test_search_matches_prefixes(self):
+        tasks = get_search_backend().search(Task.objects.all(), 'desig')
+        self.assertEqual(list(tasks), [self.meeting])
+
+    def test_search_requires_every_term(self):
+        tasks = get_search_backend().search(Task.objects.all(), 'meeting notes')
+        self.assertEqual(list(tasks), [self.report])
+
+    def test_search_without_terms_returns_nothing(self):
+        tasks = get_search_backend().search(Task.objects.all(), '!!')
+        self.assertEqual(tasks.count(), 0)
+
+    def test_search_snippet_highlights_match(self):
+        task = get_search_backend().search(Task.objects.all(), 'notes').get()
+        self.assertEqual(highlight(task.search_snippet), 'Summarise the meeting <mark>notes</mark>')
+
+    def test_edited_task_is_reindexed(self):
+        self.report.title = 'Write summary'
+        self.report.description = ''
+        self.report.save()
+        tasks = get_search_backend().search(Task.objects.all(), 'meeting')
+        self.assertEqual(list(tasks), [self.meeting])
+
+    def test_save_without_text_change_is_not_reindexed(self):
+        self.report.status = 'completed'
+        with patch.object(SQLiteSearchBackend, 'index_task') as index_task:
+            self.report.save()
+        index_task.assert_not_called()
+
+    def test_search_joins_the_index_once(self):
+        sql = str(get_search_backend().search(Task.objects.all(), 'meeting').query)
+        self.assertEqual(sql.count(' MATCH '), 1)
+        self.assertEqual(sql.count('tasks_task_fts" ON'), 1)
+
+    def test_deleted_task_is_removed_from_index(self):
+        self.meeting.delete()
+        tasks = get_search_backend().search(Task.objects.all(), 'project')
+        self.assertEqual(tasks.count(), 0)
+
+    def test_basic_backend_matches_substrings(self):
+        tasks = BasicSearchBackend().search(Task.objects.all(), 'report')
+        self.assertEqual(list(tasks), [self.report])
+
+    def test_highlight_escapes_html(self):
+        self.assertEqual(highlight('<b>\x02x\x03</b>'), '&lt;b&gt;<mark>x</mark>&lt;/b&gt;')
@@ -0,0 +1,93 @@
+"""Tests of the async views served through the ASGI request handler."""
+from urllib.parse import quote
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from tasks.models import User, Task, Team
+
+
+class AsyncViewsTestCase(TestCase):
+    """Tests of the async views served through the ASGI request handler."""
+
+    fixtures = ['tasks/tests/fixtures/default_user.json', 'tasks/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.get(username='@johndoe')
+        self.other_user = User.objects.get(username='@janedoe')
+        self.team = Team.objects.create(name='Gecko', description='Research project', admin=self.other_user)
+        self.team.members.add(self.user, self.other_user)
+        self.invite = Team.objects.create(name='Iguana', admin=self.other_user)
+        self.user.invites.add(self.invite)
+        self.task = Task.objects.create(
+            title='Write report',
+            description='Quarterly report',
+            assignee=self.user,
+            team_of_task=self.team,
+            due_date=timezone.now() + timezone.timedelta(days=1),
+        )
+        self.async_client.force_login(self.user)
+
+    async def test_dashboard(self):
+        response = await self.async_client.get(reverse('dashboard'))
+        self.assertContains(response, 'Write report')
+        self.assertContains(response, 'Gecko')
+
+    async def test_dashboard_redirects_anonymous_users(self):
+        self.async_client.cookies.clear()
+        response = await self.async_client.get(reverse('dashboard'))
+        self.assertRedirects(response, f"{reverse('log_in')}?next={reverse('dashboard')}", fetch_redirect_response=False)
+
+    async def test_task_dashboard_and_invites_redirect_anonymous_users(self):
+        self.async_client.cookies.clear()
+        for url in [reverse('task_dashboard'), f"{reverse('task_dashboard')}?view=1", reverse('invites')]:
+            response = await self.async_client.get(url)
+            self.assertRedirects(response, f"{reverse('log_in')}?next={quote(url, safe='/')}", fetch_redirect_response=False)
+
+    async def test_unknown_team_and_task_are_not_found(self):
+        response = await self.async_client.get(reverse('team_detail', kwargs={'pk': 1000}))
+        self.assertEqual(response.status_code, 404)
+        response = await self.async_client.get(reverse('task_description', kwargs={'pk': 1000}))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_task_dashboard(self):
+        response = await self.async_client.get(reverse('task_dashboard'), {'priority': 2})
+        self.assertContains(response, 'Write report')
+        self.assertEqual(len(response.context['tasks']), 1)
+
+    async def test_task_dashboard_unknown_view_is_not_found(self):
+        response = await self.async_client.get(reverse('task_dashboard'), {'view': 1000})
+        self.assertEqual(response.status_code, 404)
+
+    async def test_team_detail(self):
+        response = await self.async_client.get(reverse('team_detail', kwargs={'pk': self.team.pk}))
+        self.assertContains(response, 'Research project')
+        self.assertContains(response, '@janedoe')
+        self.assertFalse(response.context['is_admin'])
+
+    async def test_task_description(self):
+        response = await self.async_client.get(reverse('task_description', kwargs={'pk': self.task.pk}))
+        self.assertContains(response, 'Quarterly report')
+        self.assertContains(response, 'Gecko')
+
+    async def test_team_invites(self):
+        response = await self.async_client.get(reverse('invites'))
+        self.assertContains(response, 'Iguana')
+        self.assertContains(response, '@janedoe')
+
+    async def test_unchanged_page_is_not_modified(self):
+        url = reverse('task_description', kwargs={'pk': self.task.pk})
+        response = await self.async_client.get(url)
+        response = await self.async_client.get(url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_queries_are_timed(self):
+        response = await self.async_client.get(reverse('dashboard'))
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="[1-9]\d* queries"$')
+
+    def test_join_team_redirects_to_invites(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('join_team', kwargs={'team': self.invite.name}))
+        self.assertRedirects(response, reverse('invites'))
+        self.assertTrue(self.invite.members.filter(pk=self.user.pk).exists())
@@ -0,0 +1,85 @@
+"""Tests of the avatar proxy view."""
+import os
+import tempfile
+from io import BytesIO
+from unittest.mock import patch
+from urllib.error import URLError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from tasks.avatars import gravatar_hash
+from tasks.models import Team, User
+from tasks.tests.helpers import reverse_with_next
+
+
+class AvatarViewTestCase(TestCase):
+    """Tests of the avatar proxy view."""
+
+    fixtures = ['tasks/tests/fixtures/default_user.json', 'tasks/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(AVATAR_CACHE_DIR=self.directory.name)
+        self.settings_override.enable()
+        self.user = User.objects.get(username='@johndoe')
+        self.client.force_login(self.user)
+        self.EMAIL_HASH = gravatar_hash(self.user.email)
+        self.url = reverse('avatar', kwargs={'email_hash': self.EMAIL_HASH, 'size': 60})
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.directory.cleanup()
+
+    def test_avatar_url(self):
+        self.assertEqual(self.url, f'/avatar/{self.EMAIL_HASH}/60/')
+
+    def test_avatar_redirects_when_not_logged_in(self):
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertRedirects(response, reverse_with_next('log_in', self.url), fetch_redirect_response=False)
+
+    @patch('tasks.avatars.urlopen', return_value=BytesIO(b'image'))
+    def test_teammate_avatar_is_served(self, urlopen):
+        teammate = User.objects.get(username='@janedoe')
+        team = Team.objects.create(name='Gecko', admin=self.user)
+        team.members.add(self.user, teammate)
+        response = self.client.get(reverse('avatar', kwargs={'email_hash': gravatar_hash(teammate.email), 'size': 120}))
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+    @patch('tasks.avatars.urlopen')
+    def test_avatar_of_unknown_email_is_not_found(self, urlopen):
+        for email_hash in ['0' * 32, gravatar_hash(User.objects.get(username='@janedoe').email)]:
+            response = self.client.get(reverse('avatar', kwargs={'email_hash': email_hash, 'size': 60}))
+            self.assertEqual(response.status_code, 404)
+        urlopen.assert_not_called()
+
+    @override_settings(AVATAR_CACHE_MAX_FILES=1)
+    @patch('tasks.avatars.urlopen', side_effect=lambda *args, **kwargs: BytesIO(b'image'))
+    def test_cache_keeps_at_most_the_configured_number_of_avatars(self, urlopen):
+        for size in [60, 120]:
+            self.client.get(reverse('avatar', kwargs={'email_hash': self.EMAIL_HASH, 'size': size})).close()
+        self.assertEqual(len(os.listdir(self.directory.name)), 1)
+
+    @patch('tasks.avatars.urlopen', return_value=BytesIO(b'image'))
+    def test_avatar_is_downloaded_once_then_served_from_disk(self, urlopen):
+        for _ in range(2):
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(b''.join(response.streaming_content), b'image')
+            response.close()
+        self.assertEqual(urlopen.call_count, 1)
+        self.assertIn('max-age', response['Cache-Control'])
+        self.assertTrue(os.path.exists(os.path.join(self.directory.name, f'{self.EMAIL_HASH}-60.jpg')))
+
+    @patch('tasks.avatars.urlopen', side_effect=URLError('offline'))
+    def test_failed_download_redirects_to_gravatar(self, urlopen):
+        response = self.client.get(self.url)
+        self.assertRedirects(response, f'https://www.gravatar.com/avatar/{self.EMAIL_HASH}.jpg?size=60&default=mp', fetch_redirect_response=False)
+
+    def test_invalid_hash_is_not_found(self):
+        response = self.client.get(reverse('avatar', kwargs={'email_hash': 'not-a-hash', 'size': 60}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_invalid_size_is_not_found(self):
+        response = self.client.get(reverse('avatar', kwargs={'email_hash': self.EMAIL_HASH, 'size': 61}))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,91 @@
+"""Tests of the conditional GET support of the task and team pages."""
+from django.contrib import messages
+from django.contrib.messages.storage.base import Message
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from tasks.models import User, Task, Team
+
+
+class ConditionalGetTestCase(TestCase):
+    """Tests of the conditional GET support of the task and team pages."""
+
+    fixtures = ['tasks/tests/fixtures/default_user.json', 'tasks/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.other_user = User.objects.get(username='@janedoe')
+        self.client.force_login(self.user)
+        self.team = Team.objects.create(name='Gecko', admin=self.user)
+        self.team.members.add(self.user, self.other_user)
+        self.task = Task.objects.create(
+            title='Write report',
+            assignee=self.user,
+            team_of_task=self.team,
+            due_date=timezone.now() + timezone.timedelta(days=1),
+        )
+        self.task_url = reverse('task_description', kwargs={'pk': self.task.pk})
+        self.team_url = reverse('team_detail', kwargs={'pk': self.team.pk})
+
+    def _revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_unchanged_pages_are_not_modified(self):
+        for url in (reverse('dashboard'), reverse('task_dashboard'), self.task_url, self.team_url):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('private', response['Cache-Control'])
+            revalidated = self._revalidate(url, response)
+            self.assertEqual(revalidated.status_code, 304, url)
+            self.assertEqual(revalidated.content, b'')
+
+    def test_detail_pages_send_last_modified(self):
+        for url in (self.task_url, self.team_url):
+            response = self.client.get(url)
+            self.assertTrue(response.has_header('Last-Modified'))
+
+    def test_task_edit_changes_task_and_team_pages(self):
+        task_response = self.client.get(self.task_url)
+        team_response = self.client.get(self.team_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.status = 'in progress'
+            self.task.save()
+        self.assertEqual(self._revalidate(self.task_url, task_response).status_code, 200)
+        self.assertEqual(self._revalidate(self.team_url, team_response).status_code, 200)
+
+    def test_team_rename_changes_task_page(self):
+        response = self.client.get(self.task_url)
+        self.team.name = 'Iguana'
+        self.team.save()
+        self.assertEqual(self._revalidate(self.task_url, response).status_code, 200)
+
+    def test_membership_change_changes_team_page(self):
+        response = self.client.get(self.team_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.team.members.remove(self.other_user)
+        self.assertEqual(self._revalidate(self.team_url, response).status_code, 200)
+
+    def test_task_change_changes_dashboard(self):
+        response = self.client.get(reverse('dashboard'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(
+                title='Review report',
+                assignee=self.user,
+                team_of_task=self.team,
+                due_date=timezone.now() + timezone.timedelta(days=2),
+            )
+        self.assertEqual(self._revalidate(reverse('dashboard'), response).status_code, 200)
+
+    def test_etag_differs_between_users(self):
+        response = self.client.get(self.team_url)
+        self.client.force_login(self.other_user)
+        self.assertEqual(self._revalidate(self.team_url, response).status_code, 200)
+
+    def test_pending_messages_disable_revalidation(self):
+        response = self.client.get(reverse('dashboard'))
+        storage = CookieStorage(response.wsgi_request)
+        self.client.cookies[storage.cookie_name] = storage._encode([Message(messages.SUCCESS, 'Task updated!')])
+        revalidated = self._revalidate(reverse('dashboard'), response)
+        self.assertEqual(revalidated.status_code, 200)
+        self.assertContains(revalidated, 'Task updated!')
@@ -63,3 +63,9 @@ class TaskDashboardViewTests(TestCase):
         self.assertEqual(response.context['tasks'][0].title, 'Test Task 1')
 
 
+    def test_task_dashboard_search_highlights_matches(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('task_dashboard'), {'search_input': 'Task 1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['tasks']), [Task.objects.get(title='Test Task 1')])
+        self.assertContains(response, '<mark>Task</mark> <mark>1</mark>')
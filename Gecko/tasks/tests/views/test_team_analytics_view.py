@@ -0,0 +1,81 @@
+"""Tests of the team analytics view."""
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from tasks.models import User, Task, Team
+
+
+class TeamAnalyticsViewTestCase(TestCase):
+    """Tests of the team analytics view."""
+
+    fixtures = ['tasks/tests/fixtures/default_user.json', 'tasks/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.get(username='@johndoe')
+        self.other_user = User.objects.get(username='@janedoe')
+        self.team = Team.objects.create(name='Gecko', admin=self.user)
+        self.team.members.add(self.user, self.other_user)
+        self.url = reverse('team_analytics', kwargs={'pk': self.team.pk})
+        self._create_task('Write report', self.user, status='completed', priority=3)
+        self._create_task('Review report', self.user, priority=3)
+        self._create_task('Send report', self.other_user, status='in progress')
+        overdue = self._create_task('File report', self.other_user)
+        Task.objects.filter(pk=overdue.pk).update(due_date=timezone.now() - timezone.timedelta(days=1))
+        self.team.refresh_from_db()
+
+    def _create_task(self, title, assignee, **fields):
+        return Task.objects.create(
+            title=title,
+            assignee=assignee,
+            team_of_task=self.team,
+            due_date=timezone.now() + timezone.timedelta(days=1),
+            **fields
+        )
+
+    def test_team_analytics_url(self):
+        self.assertEqual(self.url, f'/team_analytics/{self.team.pk}/')
+
+    def test_get_team_analytics(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'team_analytics.html')
+        analytics = response.context['analytics']
+        self.assertEqual(analytics['summary'], {'total': 4, 'completed': 1, 'overdue': 1})
+        self.assertEqual(
+            analytics['by_status'],
+            [{'status': 'Assigned', 'count': 2}, {'status': 'Completed', 'count': 1}, {'status': 'In Progress', 'count': 1}],
+        )
+        self.assertEqual(analytics['by_priority'], [{'priority': 'High', 'count': 2}, {'priority': 'Medium', 'count': 2}])
+        self.assertEqual(
+            analytics['by_assignee'],
+            [
+                {'assignee__username': '@janedoe', 'total': 2, 'completed': 0, 'overdue': 1},
+                {'assignee__username': '@johndoe', 'total': 2, 'completed': 1, 'overdue': 0},
+            ],
+        )
+        self.assertEqual(sum(row['completed'] for row in analytics['throughput']), 1)
+
+    def test_analytics_are_served_from_cache(self):
+        self.client.force_login(self.user)
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(self.url)
+        self.assertFalse(any('GROUP BY' in query['sql'] for query in context.captured_queries))
+
+    def test_task_change_refreshes_analytics(self):
+        self.client.force_login(self.user)
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self._create_task('Archive report', self.user, status='completed')
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['analytics']['summary']['completed'], 2)
+
+    def test_non_admin_is_redirected_to_team_detail(self):
+        self.client.force_login(self.other_user)
+        response = self.client.get(self.url)
+        self.assertRedirects(response, reverse('team_detail', kwargs={'pk': self.team.pk}), fetch_redirect_response=False)
@@ -0,0 +1,43 @@
+"""Tests of the number of queries run by the list views."""
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from tasks.models import User, Task, Team
+from tasks.tests.helpers import QueryCountTesterMixin
+
+
+class ViewQueryCountTestCase(TestCase, QueryCountTesterMixin):
+    """Tests of the number of queries run by the list views."""
+
+    fixtures = ['tasks/tests/fixtures/default_user.json', 'tasks/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.client.force_login(self.user)
+        self.team = Team.objects.create(name='Gecko', admin=self.user)
+        self.team.members.add(self.user)
+        self.task_count = 0
+        self._add_rows()
+
+    def _add_rows(self):
+        for user in User.objects.all():
+            team = Team.objects.create(name=f'Team {Team.objects.count()}', admin=user)
+            team.members.add(self.user, user)
+            self.team.members.add(user)
+            for assignee in (self.user, user):
+                self.task_count += 1
+                Task.objects.create(
+                    title=f'Task {self.task_count}',
+                    assignee=assignee,
+                    team_of_task=self.team if assignee == self.user else team,
+                    due_date=timezone.now() + timezone.timedelta(days=self.task_count),
+                )
+
+    def test_dashboard_query_budget(self):
+        self.assert_query_budget(reverse('dashboard'), 6, self._add_rows)
+
+    def test_task_dashboard_query_budget(self):
+        self.assert_query_budget(reverse('task_dashboard'), 6, self._add_rows)
+
+    def test_team_detail_query_budget(self):
+        self.assert_query_budget(reverse('team_detail', kwargs={'pk': self.team.pk}), 6, self._add_rows)
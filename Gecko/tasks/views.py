@@ -1,61 +1,183 @@
 from email.utils import parsedate_to_datetime
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.exceptions import ImproperlyConfigured
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Prefetch, Q
+from django.http import FileResponse, Http404, HttpResponse, QueryDict, StreamingHttpResponse
 from django.shortcuts import redirect, render
+from django.template.loader import render_to_string
+from django.utils.cache import patch_cache_control
+from django.utils import timezone
 from django.views.generic import View, FormView, UpdateView, DeleteView
 from django.urls import reverse, reverse_lazy
-from tasks.forms import LogInForm, PasswordForm, UserForm, SignUpForm, TaskForm, TeamForm, TeamSelectForm, TaskFilterForm, AssignNewAdminForm, AddMembersForm, RemoveMembersForm,InviteTeamMembersForm
-from tasks.helpers import login_prohibited
-from tasks.models import Task, Team, User
+from tasks.forms import LogInForm, PasswordForm, UserForm, SignUpForm, TaskForm, TaskImportForm, SavedViewForm, TeamForm, TeamSelectForm, TaskFilterForm, AssignNewAdminForm, AddMembersForm, RemoveMembersForm,InviteTeamMembersForm
+from tasks.analytics import get_team_analytics
+from tasks.avatars import cached_avatar_path, gravatar_hash, remote_avatar_url
+from tasks.events import event_stream
+from tasks.exporter import EXPORT_FORMATS, TASK_COLUMNS, TEAM_COLUMNS, export_rows
+from tasks.caching import acached_fragment, dashboard_cache_key
+from tasks.helpers import async_login_required, conditional_page, load_user, login_prohibited
+from tasks.importer import ImportFileError, TaskImporter, guess_format
+from tasks.models import Membership, SavedView, Task, Team, User
+from tasks.pagination import KeysetPaginator
+from tasks.saved_views import query_tasks, saved_query, saved_view_tasks, view_params
 import random
-
-@login_required
-def dashboard(request):
+import re
+
+def user_page_version(request, *args, **kwargs):
+    """Return the version of a page built only from the current user's data.
+
+    The ETag already covers the user's cache generation, which every change to their
+    teams and tasks bumps.
+    """
+
+    if not request.user.is_authenticated:
+        return None
+    return request.resolver_match.view_name, None
+
+def task_dashboard_version(request):
+    """Return the version of the task dashboard, which a relative due window also ties to the current minute.
+
+    The window may come from the query string or from the saved view it names.
+    """
+
+    version = user_page_version(request)
+    if version is None:
+        return None
+    params = request.GET
+    if params.get('view'):
+        try:
+            query = request.user.saved_views.filter(pk=params['view']).values_list('query', flat=True).first()
+        except ValueError:
+            query = None
+        params = QueryDict(query or '')
+    if params.get('due_window'):
+        return (version[0], timezone.now().replace(second=0, microsecond=0).isoformat()), None
+    return version
+
+def task_version(request, pk):
+    """Return the version of a task page from the task and its team."""
+
+    stamps = Task.objects.filter(pk=pk).values_list('updated_at', 'team_of_task__updated_at').first()
+    if stamps is None:
+        return None
+    return stamps, max(stamp for stamp in stamps if stamp is not None)
+
+def team_version(request, pk):
+    """Return the version of a team page, touched by every change to its members and tasks."""
+
+    updated_at = Team.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        return None
+    return updated_at, updated_at
+
+@async_login_required
+@conditional_page(user_page_version)
+async def dashboard(request):
     """Display the current user's dashboard."""
 
-    current_user = User.objects.get(username = request.user)
-    user_teams = Team.objects.filter(members=request.user)
-    user_tasks = Task.objects.filter(assignee=request.user)
+    async def render_content():
+        user_teams = Team.objects.filter(members=request.user).select_related('admin')
+        user_tasks = Task.objects.filter(assignee=request.user).select_related('team_of_task')
+        context = {
+            'user_teams': [team async for team in user_teams],
+            'user_tasks': await KeysetPaginator(user_tasks, ['due_date']).apage(request)
+        }
+        return await sync_to_async(render_to_string)('partials/dashboard_content.html', context, request)
+
+    key = await sync_to_async(dashboard_cache_key)(request.user.pk, request.GET.urlencode())
     context = {
-        'user': current_user,
-        'user_teams': user_teams,
-        'user_tasks': user_tasks
+        'user': request.user,
+        'dashboard_content': await acached_fragment(key, render_content)
     }
 
-    return render(request, 'dashboard.html', context)
+    return await sync_to_async(render)(request, 'dashboard.html', context)
+
+@async_login_required
+@conditional_page(task_dashboard_version)
+async def task_dashboard(request):
+    """Display the current user's task dashboard, or one of their saved views of it."""
+
+    user = await load_user(request)
+    view = None
+    if request.GET.get('view'):
+        try:
+            view = await user.saved_views.aget(pk=request.GET['view'])
+        except (SavedView.DoesNotExist, ValueError):
+            raise Http404("Saved view not found")
+        form = TaskFilterForm(view_params(view) or None)
+        tasks = await sync_to_async(saved_view_tasks)(view)
+    else:
+        form = TaskFilterForm(request.GET or None)
+        tasks = await sync_to_async(filtered_user_tasks)(request, form)
+    context = {
+        'tasks': await KeysetPaginator(tasks.select_related('team_of_task')).apage(request),
+        'form': form,
+        'view': view,
+        'saved_views': [saved_view async for saved_view in user.saved_views.only('name')],
+        'saved_view_form': SavedViewForm(),
+        'query': view.query if view else saved_query(request.GET),
+    }
+    return await sync_to_async(render)(request, 'task_dashboard.html', context)
 
-def task_dashboard(request):
-    """Display the current user's task dashboard."""
+def filtered_user_tasks(request, form):
+    """Return the current user's tasks matching the search, filters and sorting of the task dashboard."""
 
-    current_user = request.user
-    form = TaskFilterForm(request.GET or None)
-    tasks = Task.objects.filter(assignee=current_user)
+    return query_tasks(Task.objects.filter(assignee=request.user), request.GET, form)
 
-    search_task = request.GET.get('search_input')
-    if search_task:
-        tasks = tasks.filter(title__icontains=search_task) | tasks.filter(description__icontains=search_task)
+@login_required
+def save_task_view(request):
+    """Save the current task dashboard query as a named view of the current user, replacing any of the same name."""
+
+    if request.method != 'POST':
+        return redirect('task_dashboard')
+    form = SavedViewForm(request.POST)
+    query = saved_query(QueryDict(request.POST.get('query', '')))
+    if not form.is_valid() or not TaskFilterForm(QueryDict(query) or None).is_valid():
+        messages.error(request, 'The view could not be saved.')
+        return redirect(reverse('task_dashboard') + (f'?{query}' if query else ''))
+    view, _ = SavedView.objects.update_or_create(
+        user=request.user, name=form.cleaned_data['name'], defaults={'query': query, 'task_ids': None}
+    )
+    messages.success(request, f'Saved view {view}.')
+    return redirect(reverse('task_dashboard') + f'?view={view.pk}')
 
-    if form.is_valid():
-        if form.cleaned_data['title']:
-            tasks = tasks.filter(title__icontains=form.cleaned_data['title'])
-        if form.cleaned_data['status']:
-            tasks = tasks.filter(status=form.cleaned_data['status'])
-        if form.cleaned_data['due_date']:
-            tasks = tasks.filter(due_date=form.cleaned_data['due_date'])
-        if form.cleaned_data['team_of_task']:
-            tasks = tasks.filter(team_of_task=form.cleaned_data['team_of_task'])
-        if form.cleaned_data.get('priority'):
-            tasks = tasks.filter(priority=form.cleaned_data['priority'])
+@login_required
+def delete_task_view(request, pk):
+    """Delete one of the current user's saved views."""
 
-        sort_by = request.GET.get('sort_by', 'due_date')
-        if sort_by in ['title', 'status', 'due_date', 'priority', '-priority']:
-            tasks = tasks.order_by(sort_by)
+    if request.method == 'POST':
+        request.user.saved_views.filter(pk=pk).delete()
+        messages.success(request, 'Saved view deleted.')
+    return redirect('task_dashboard')
+
+@login_required
+def export_tasks(request):
+    """Stream the current user's tasks matching the task dashboard filters as CSV or JSON Lines."""
 
-    return render(request, 'task_dashboard.html', {'tasks': tasks, 'form': form})
+    tasks = filtered_user_tasks(request, TaskFilterForm(request.GET or None))
+    return export_response(tasks, TASK_COLUMNS, request.GET.get('format'), 'tasks')
+
+@login_required
+def export_teams(request):
+    """Stream the current user's teams as CSV or JSON Lines."""
+
+    teams = Team.objects.filter(members=request.user).order_by('name')
+    return export_response(teams, TEAM_COLUMNS, request.GET.get('format'), 'teams')
+
+def export_response(queryset, columns, file_format, name):
+    file_format = file_format if file_format in EXPORT_FORMATS else 'csv'
+    response = StreamingHttpResponse(
+        export_rows(queryset, columns, file_format),
+        content_type=EXPORT_FORMATS[file_format],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{name}.{file_format}"'
+    return response
 
 class TeamCreateView(LoginRequiredMixin, FormView): 
     """"Display the current user's team dashboard"""
@@ -76,25 +198,26 @@ class TeamCreateView(LoginRequiredMixin, FormView):
         return super().form_invalid(form)
     
 class InvitesView(LoginRequiredMixin, View):
-    def team_invites(request):
-        user_invites = User.objects.get(username = request.user).invites.all()
-        return render(request, 'invites.html', {'user_invites': user_invites})
+    @async_login_required
+    async def team_invites(request):
+        user = await load_user(request)
+        user_invites = [team async for team in user.invites.select_related('admin')]
+        return await sync_to_async(render)(request, 'invites.html', {'user_invites': user_invites})
     
     def join_team(request, team):
         team = Team.objects.get(name=team)
 
         request.user.teams.add(team)
         request.user.invites.remove(team)
-        team.members.add(request.user)
         messages.add_message(request, messages.SUCCESS , f"Joined Team {team} successfully")
-        return InvitesView.team_invites(request)
+        return redirect('invites')
         
 
     def reject_invite(request, team):
         team = Team.objects.get(name=team)
         request.user.invites.remove(team)
         messages.add_message(request, messages.SUCCESS , f"Rejected Team {team} successfully")
-        return InvitesView.team_invites(request)
+        return redirect('invites')
 
 def transfer_admin(request, pk):
     """" Transfer admin role to another team member. """
@@ -106,7 +229,7 @@ def transfer_admin(request, pk):
         form = AssignNewAdminForm(request.POST, team_members=team.members.exclude(id=request.user.id))
         if form.is_valid():
             new_admin = form.cleaned_data['new_admin']
-            team.admin = new_admin
+            team.set_admin(new_admin)
             team.save()
             messages.success(request, f'{new_admin} is now the admin of {team}.')
             return redirect('team_detail', pk=pk)
@@ -146,7 +269,6 @@ def remove_members(request, pk):
             members_to_remove = form.cleaned_data['members_to_remove']
             for member in members_to_remove:
                 team.members.remove(member)
-                member.teams.remove(team)
                 messages.success(request, f'{member} removed from team.')
             return redirect('team_detail', pk=pk)
     else:
@@ -162,7 +284,7 @@ def leave_team(request, pk):
         if request.user == team.admin:
             if members.count() > 1:
                 new_admin = random.choice(members.exclude(id=request.user.id))
-                team.admin = new_admin
+                team.set_admin(new_admin)
                 messages.success(request, f'{new_admin} is now the admin of {team}.')
                 team.save()
             else:
@@ -170,7 +292,6 @@ def leave_team(request, pk):
                 messages.success(request, 'Left team and team deleted successfully.')
                 return redirect('dashboard')
         team.members.remove(request.user)
-        request.user.teams.remove(team)
         messages.success(request, 'Left team successfully.')
 
         return redirect('dashboard')
@@ -193,18 +314,67 @@ def delete_team(request, pk):
     return redirect('dashboard')  
 
 
-def team_detail(request, pk):
+@conditional_page(team_version)
+async def team_detail(request, pk):
     """ Display the current team's details. """
-    team = Team.objects.get(pk=pk)
-    tasks = Task.objects.filter(team_of_task = team)
-    is_admin = team.admin == request.user
+    user = await load_user(request)
+    try:
+        team = await Team.objects.select_related('admin').prefetch_related(
+            Prefetch('members', queryset=User.objects.only('username'))
+        ).aget(pk=pk)
+    except Team.DoesNotExist:
+        raise Http404("Team not found")
+    tasks = Task.objects.filter(team_of_task = team).select_related('assignee')
+    tasks = await KeysetPaginator(tasks, ['due_date']).apage(request)
+    is_admin = team.admin_id == user.id
     context = {
         'team': team,
         'tasks': tasks,
         'is_admin': is_admin,
     }
-    return render(request, 'team_detail.html', context)
+    return await sync_to_async(render)(request, 'team_detail.html', context)
     
+@async_login_required
+async def team_events(request, pk):
+    """Stream the task changes of one of the current user's teams as server-sent events."""
+
+    if not await Membership.objects.filter(team_id=pk, user=request.user).aexists():
+        raise Http404("Team not found")
+    return event_stream_response(request, [pk])
+
+@async_login_required
+async def task_events(request):
+    """Stream the task changes of all of the current user's teams as server-sent events."""
+
+    team_ids = [team_id async for team_id in Membership.objects.filter(user=request.user).values_list('team_id', flat=True)]
+    return event_stream_response(request, team_ids)
+
+def event_stream_response(request, team_ids):
+    """Return the event stream of the given teams, or 204 No Content under WSGI.
+
+    A WSGI worker thread would be held for the whole life of each stream, so the
+    streams are only served under ASGI; 204 tells EventSource not to reconnect.
+    """
+
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    response = StreamingHttpResponse(event_stream(team_ids), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+def team_analytics(request, pk):
+    """ Display task statistics of the team to its admin. """
+    team = Team.objects.get(pk=pk)
+    if request.user.id != team.admin_id:
+        messages.error(request, 'Only the admin can view team analytics.')
+        return redirect('team_detail', pk=pk)
+    context = {
+        'team': team,
+        'analytics': get_team_analytics(team),
+    }
+    return render(request, 'team_analytics.html', context)
+
 class TaskCreateView(LoginRequiredMixin, View):
     template_name = 'create_task.html'
     
@@ -250,11 +420,38 @@ class TaskCreateView(LoginRequiredMixin, View):
         return render(request, self.template_name, {'team_form': team_form, 'task_form': task_form})
 
 
-def task_description(request, pk):
+@login_required
+def import_tasks(request):
+    """Import tasks for the current user's teams from an uploaded CSV or JSON Lines file."""
+
+    importer = None
+    if request.method == 'POST':
+        form = TaskImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            importer = TaskImporter(user=request.user)
+            try:
+                importer.run(upload, form.cleaned_data['format'] or guess_format(upload.name))
+            except ImportFileError as error:
+                form.add_error('file', str(error))
+    else:
+        form = TaskImportForm()
+    context = {
+        'form': form,
+        'importer': importer,
+        'errors': importer.errors[:settings.IMPORT_ERRORS_SHOWN] if importer else [],
+    }
+    return render(request, 'import_tasks.html', context)
+
+@conditional_page(task_version)
+async def task_description(request, pk):
     """Display the current task's description."""
 
-    task = Task.objects.get(pk=pk)
-    return render(request, 'task_description.html', {'task': task})
+    try:
+        task = await Task.objects.select_related('team_of_task').aget(pk=pk)
+    except Task.DoesNotExist:
+        raise Http404("Task not found")
+    return await sync_to_async(render)(request, 'task_description.html', {'task': task})
 
 class TaskEditView(LoginRequiredMixin, UpdateView):
     """ Edit all current task details. """""
@@ -268,6 +465,12 @@ class TaskEditView(LoginRequiredMixin, UpdateView):
         task = Task.objects.get(pk=pk)
         return task
 
+    def get_form_kwargs(self):
+        """Limit the assignee choices to the members of the task's team."""
+        kwargs = super().get_form_kwargs()
+        kwargs['team_id'] = self.object.team_of_task_id
+        return kwargs
+
     def get_success_url(self):
         """Return redirect URL after successful update."""
         messages.add_message(self.request, messages.SUCCESS, "Task updated!")
@@ -303,6 +506,25 @@ class TaskDeleteView(DeleteView):
     success_url = reverse_lazy('dashboard') 
 
 
+@login_required
+def avatar(request, email_hash, size):
+    """Serve the gravatar of the user or a teammate from the local avatar cache, falling back to gravatar.com."""
+
+    if not re.fullmatch(r'[0-9a-f]{32}', email_hash) or size not in settings.AVATAR_SIZES:
+        raise Http404("Unknown avatar")
+    emails = User.objects.filter(
+        Q(pk=request.user.pk) | Q(memberships__team__memberships__user=request.user)
+    ).values_list('email', flat=True).distinct()
+    if email_hash not in {gravatar_hash(email) for email in emails}:
+        raise Http404("Unknown avatar")
+    try:
+        path = cached_avatar_path(email_hash, size)
+    except OSError:
+        return redirect(remote_avatar_url(email_hash, size))
+    response = FileResponse(open(path, 'rb'), content_type='image/jpeg')
+    patch_cache_control(response, private=True, max_age=settings.AVATAR_MAX_AGE)
+    return response
+
 @login_prohibited
 def home(request):
     """Display the application's start/home screen."""